@@ -0,0 +1,88 @@
+"""
+Alert handling: per-message list inserts vs. episode aggregation.
+
+    python -m benchmarks.bench_alert_episodes
+
+Replays a one-hour shift of alerts from 50 workers. Most incidents are
+sustained hazards that repeat their alert every second, some of them
+flapping (short gaps under the debounce window), with rare one-off
+alerts in between. The old path inserted every message at the front of
+a 50-slot session list; the new one folds them into episodes. Reports
+the cost per alert, the rows a dashboard has to render, and how many
+distinct incidents are still visible at the end of the shift. "Redraws"
+counts the alerts that change the rendered summary: every one of them
+for the list, only episode openings and closings for the tracker.
+"""
+import random
+import time
+
+from safety_core.episodes import CLEAR_AFTER, EpisodeTracker
+
+WORKERS = 50
+SHIFT = 3600
+INCIDENTS = 400
+CAP = 50
+
+
+def incident_stream(rng):
+    """``(t, alert, incident_id)`` tuples, in time order."""
+    events = []
+    kinds = (("gas_alert", "gas_ppm", 520, 700), ("temp_alert", "body_temp", 38.6, 40.0),
+             ("radiation_alert", "radiation_uSvh", 1.05, 2.0))
+    for incident in range(INCIDENTS):
+        worker = f"W-{rng.randrange(WORKERS):03d}"
+        kind, field, low, high = rng.choice(kinds)
+        t = rng.uniform(0, SHIFT)
+        repeats = 1 if rng.random() < 0.2 else rng.randint(30, 600)
+        for _ in range(repeats):
+            events.append((t, {"worker_id": worker, kind: "HIGH", field: round(rng.uniform(low, high), 2)}, incident))
+            # Flapping: now and then the reading dips and the alert pauses
+            t += rng.uniform(5, CLEAR_AFTER - 5) if rng.random() < 0.05 else 1.0
+    events.sort(key=lambda e: e[0])
+    return events
+
+
+def list_path(events):
+    alerts = []
+    for _, alert, _ in events:
+        alerts.insert(0, alert)
+        if len(alerts) > CAP:
+            alerts.pop()
+    return alerts
+
+
+def episode_path(events):
+    tracker = EpisodeTracker()
+    for t, alert, _ in events:
+        tracker.observe(alert, t)
+    tracker.sweep(SHIFT * 2)
+    return tracker
+
+
+def main():
+    rng = random.Random(5)
+    events = incident_stream(rng)
+    incident_of = {id(alert): incident for _, alert, incident in events}
+    # Incidents that overlap in worker, type and time are one hazard to
+    # the tracker, so count what the stream actually contains.
+    distinct = len(episode_path(events).closed)
+    print(f"{len(events):,} alerts, {INCIDENTS} generated incidents, {distinct} distinct episodes")
+
+    t = time.perf_counter()
+    alerts = list_path(events)
+    list_time = time.perf_counter() - t
+    t = time.perf_counter()
+    tracker = episode_path(events)
+    episode_time = time.perf_counter() - t
+
+    visible = len({incident_of[id(a)] for a in alerts})
+    print(f"\n{'path':>16} | {'us/alert':>8} {'redraws':>8} {'rows':>5} {'incidents visible':>18}")
+    print(f"{'list insert(0)':>16} | {list_time / len(events) * 1e6:>8.2f} {len(events):>8,} "
+          f"{len(alerts):>5} {visible:>18}")
+    print(f"{'episodes':>16} | {episode_time / len(events) * 1e6:>8.2f} {tracker.version:>8,} "
+          f"{len(tracker.closed):>5} {len(tracker.closed):>18}")
+    assert sum(ep.count for ep in tracker.closed) == len(events)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Alert search: inverted index vs. the per-keystroke linear scan.
+
+    python -m benchmarks.bench_alert_index
+
+Builds an AlertIndex over 1M synthetic alerts from 200 workers spread
+over a week, then times keyword, faceted and paged searches against the
+scan the dashboard used to run on every rerun
+(``any(keyword in str(v).lower() for v in alert.values())``). The first
+20k alerts are also searched both ways to check that the index returns
+the same alerts for whole-word keywords.
+"""
+import random
+import time
+
+from safety_core.alert_index import AlertIndex
+
+ALERTS = 1_000_000
+WORKERS = 200
+WEEK = 7 * 24 * 3600
+PARITY = 20_000
+QUERIES = {
+    "gas": {"text": "gas"},
+    "high heart": {"text": "high heart"},
+    "w-017": {"text": "w-017"},
+    "worker + severity": {"worker": "W-017", "severity": "CRITICAL"},
+    "type, last hour": {"kind": "radiation", "start": WEEK - 3600},
+    "gas, page 50": {"text": "gas", "offset": 49 * 6},
+}
+
+
+def sample_alert(rng):
+    kind = rng.choice(("temp", "heart", "gas", "radiation", "spo2"))
+    message = {
+        "temp": "High body temperature",
+        "heart": "Abnormal heart rate",
+        "gas": "Toxic gas level high",
+        "radiation": "Radiation exposure rising",
+        "spo2": "Low blood oxygen",
+    }[kind]
+    alert = {"worker_id": f"W-{rng.randrange(WORKERS):03d}", f"{kind}_alert": message}
+    if rng.random() < 0.3:
+        alert["severity"] = "CRITICAL"
+    return alert
+
+
+def linear_scan(alerts, keyword):
+    keyword = keyword.lower()
+    return [a for a in alerts if any(keyword in str(v).lower() for v in a.values())]
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t)
+    return best, result
+
+
+def main():
+    rng = random.Random(13)
+    alerts = [sample_alert(rng) for _ in range(ALERTS)]
+    stamps = sorted(rng.uniform(0, WEEK) for _ in range(ALERTS))
+
+    index = AlertIndex()
+    t = time.perf_counter()
+    for alert, ts in zip(alerts, stamps):
+        index.add(alert, ts)
+    build = time.perf_counter() - t
+    print(f"index build: {ALERTS:,} alerts in {build:.1f} s ({build / ALERTS * 1e6:.1f} us/alert)")
+
+    subset = AlertIndex()
+    for alert, ts in zip(alerts[:PARITY], stamps[:PARITY]):
+        subset.add(alert, ts)
+    for keyword in ("gas", "W-017", "oxygen", "critical"):
+        _, found = subset.search(keyword, limit=PARITY)
+        expected = linear_scan(alerts[:PARITY], keyword)
+        assert [id(a) for a in found] == [id(a) for a in reversed(expected)], keyword
+    print(f"parity with the linear scan on {PARITY:,} alerts: ok")
+
+    print(f"\n{'query':>18} | {'matches':>8} {'index ms':>9} | {'scan ms':>8}")
+    for label, query in QUERIES.items():
+        elapsed, (total, page) = timed(lambda: index.search(limit=6, **query))
+        if set(query) == {"text"}:
+            scan, _ = timed(lambda: linear_scan(alerts, query["text"]), repeat=1)
+            scan = f"{scan * 1e3:>8.0f}"
+        else:
+            scan = f"{'-':>8}"
+        print(f"{label:>18} | {total:>8,} {elapsed * 1e3:>9.2f} | {scan}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Streaming anomaly detection: cost per sample and what it catches.
+
+    python -m benchmarks.bench_anomaly
+
+Drives ``AnomalyDetector`` with frames from virtual workers (see
+``tools.synth``). First checks that the vectorised detector raises the
+same events and ends with the same baselines as a per-sample evaluation
+of the same equations, whether each ``step`` gets one frame per worker or
+a minute of them, and again with channels missing from some frames. Then times both for fleets of 1,000 and 10,000 workers.
+Finally runs a quiet fleet to count false alarms per worker-hour and a
+fleet with incidents to see how long before the firmware's threshold
+alert each incident was flagged.
+"""
+import math
+import statistics
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from safety_core import anomaly
+from safety_core.anomaly import CHANNELS, AnomalyDetector
+from safety_core.rules import RULES
+
+from .common import fleet_ticks, warning_leads
+
+INTERVAL = 2.0
+FLEETS = (1000, 10000)
+TIMED_TICKS = 30
+PARITY_WORKERS = 100
+PARITY_SECONDS = 3600
+QUALITY_WORKERS = 50
+QUALITY_HOURS = 3
+HAZARD_RATE = 3.0
+
+
+class ScalarDetector:
+    """The detector's equations evaluated one sample and channel at a time."""
+
+    def __init__(self):
+        self.state = {}
+        self.events = []
+
+    def add(self, worker_id, t, frame):
+        a = anomaly
+        for ch in CHANNELS:
+            x = frame.get(ch)
+            s = self.state.setdefault((worker_id, ch), [0.0, 0.0, 0.0, 0.0, 0, False, None])
+            mean, var, high, low, count, active, last_t = s
+            if x is None:
+                s[6] = t
+                continue
+            std = math.sqrt(max(var, a.MIN_STD[ch] ** 2))
+            z = (x - mean) / std
+            warm = count >= a.WARMUP
+            rising = RULES[ch].direction == "above"
+            zc = min(max(z, -a.Z_LIMIT), a.Z_LIMIT)
+            high = min(max(0.0, high + zc - a.CUSUM_K), 2 * a.CUSUM_H) if warm else 0.0
+            low = min(max(0.0, low - zc - a.CUSUM_K), 2 * a.CUSUM_H) if warm else 0.0
+            jump = warm and (z > a.Z_LIMIT if rising else z < -a.Z_LIMIT)
+            drift = warm and ((high if rising else low) > a.CUSUM_H)
+            settled = abs(z) < a.Z_CLEAR and high < a.CUSUM_H / 2 and low < a.CUSUM_H / 2
+            if (jump or drift) and not active:
+                self.events.append((worker_id, t, ch, x, mean, z, "ewma" if jump else "cusum"))
+            active = jump or drift or (active and not settled)
+
+            alpha = 1.0 if last_t is None else -math.expm1(-min(max(t - last_t, 0.0), a.MAX_GAP) / a.TAU)
+            alpha = max(alpha, 1.0 / (count + 1))
+            target = min(max(x, mean - a.Z_LIMIT * std), mean + a.Z_LIMIT * std) if warm else x
+            diff = target - mean
+            s[:] = [mean + alpha * diff, (1 - alpha) * (var + alpha * diff * diff), high, low,
+                    count + 1, active, t]
+
+
+def check_parity(ticks):
+    reference = ScalarDetector()
+    for tick in ticks:
+        for worker_id, t, frame in tick:
+            reference.add(worker_id, t, frame)
+    for per_step in (1, 30):
+        detector = AnomalyDetector()
+        events = []
+        for k in range(0, len(ticks), per_step):
+            for tick in ticks[k:k + per_step]:
+                for worker_id, t, frame in tick:
+                    detector.add(worker_id, t, frame)
+            events += detector.step()
+        key = lambda e: (e[0], e[1], e[2])
+        got, want = sorted(events, key=key), sorted(reference.events, key=key)
+        assert [key(e) for e in got] == [key(e) for e in want], \
+            f"events differ from the per-sample reference with {per_step} frames per worker and step"
+        assert np.allclose([e[3:6] for e in got], [e[3:6] for e in want]) if got else True
+        for (worker_id, ch), s in reference.state.items():
+            row, c = detector.rows[worker_id], CHANNELS.index(ch)
+            assert np.allclose([detector.mean[row, c], detector.var[row, c], detector.high[row, c],
+                                detector.low[row, c]], s[:4]), f"state of {worker_id}/{ch} differs"
+    return len(reference.events)
+
+
+def drop_channels(ticks, share=1 / 3, seed=8):
+    """The same ticks with each channel left out of ``share`` of the frames."""
+    rng = np.random.default_rng(seed)
+    return [[(worker_id, t, {k: v for k, v in frame.items() if k not in CHANNELS or rng.random() >= share})
+             for worker_id, t, frame in tick] for tick in ticks]
+
+
+def check_missing_channels():
+    """A drift still fires when the drifting channel skips every third frame."""
+    fired = []
+    for skip in (0, 3):
+        detector = AnomalyDetector()
+        rng = np.random.default_rng(9)
+        for k in range(400):
+            t = 1.7e9 + k * INTERVAL
+            frame = {"heart_rate": 80 + rng.normal(0, 3)}
+            if not skip or k % skip:
+                frame["gas_ppm"] = 20 + rng.normal(0, 2) + max(0, k - 60) * 0.5
+            detector.add("W-00000", t, frame)
+            if detector.step():
+                fired.append(skip)
+                break
+    assert fired == [0, 3], "a drift was missed when its channel was absent from some frames"
+
+
+def time_scalar(ticks):
+    detector = ScalarDetector()
+    t = time.perf_counter()
+    for tick in ticks:
+        for worker_id, ts, frame in tick:
+            detector.add(worker_id, ts, frame)
+    return time.perf_counter() - t
+
+
+def time_vectorised(ticks, batch):
+    """Adds every frame and steps whenever ``batch`` samples are queued."""
+    detector = AnomalyDetector()
+    t = time.perf_counter()
+    for tick in ticks:
+        for worker_id, ts, frame in tick:
+            detector.add(worker_id, ts, frame)
+            if detector.pending >= batch:
+                detector.step()
+    detector.step()
+    return time.perf_counter() - t
+
+
+def run_quality(ticks):
+    detector = AnomalyDetector()
+    flagged = defaultdict(list)
+    for tick in ticks:
+        for worker_id, t, frame in tick:
+            detector.add(worker_id, t, frame)
+        for worker_id, t, ch, *_ in detector.step():
+            flagged[(worker_id, ch)].append(t)
+    return flagged
+
+
+def main():
+    ticks, _ = fleet_ticks(PARITY_WORKERS, PARITY_SECONDS, HAZARD_RATE)
+    events = check_parity(ticks)
+    print(f"parity: {PARITY_WORKERS} workers x {PARITY_SECONDS // 60} min, {events} events, identical to the "
+          f"per-sample reference with 1 and 30 frames per worker and step")
+    events = check_parity(drop_channels(ticks))
+    check_missing_channels()
+    print(f"parity: the same with a third of each channel's samples missing, {events} events")
+
+    print(f"\n{'workers':>8} | {'scalar':>9} {'per tick':>9} {'batch 512':>9}   us/sample")
+    for workers in FLEETS:
+        ticks, _ = fleet_ticks(workers, TIMED_TICKS * INTERVAL, HAZARD_RATE)
+        samples = workers * TIMED_TICKS
+        row = [time_scalar(ticks), time_vectorised(ticks, workers), time_vectorised(ticks, 512)]
+        print(f"{workers:>8,} | " + " ".join(f"{s / samples * 1e6:>9.2f}" for s in row))
+
+    hours = QUALITY_WORKERS * QUALITY_HOURS
+    ticks, _ = fleet_ticks(QUALITY_WORKERS, QUALITY_HOURS * 3600, hazard_rate=0.0, seed=6)
+    quiet = run_quality(ticks)
+    counts = Counter(ch for (_, ch), times in quiet.items() for _ in times)
+    print(f"\nno incidents, {hours} worker-hours: {sum(counts.values()) / hours:.2f} anomalies per "
+          f"worker-hour {dict(counts)}")
+
+    ticks, alerts = fleet_ticks(QUALITY_WORKERS, QUALITY_HOURS * 3600, HAZARD_RATE, seed=7)
+    found, missed = warning_leads(alerts, run_quality(ticks), CHANNELS)
+    print(f"{HAZARD_RATE:g} incidents per worker-hour, flagged ahead of the threshold alert:")
+    for ch in CHANNELS:
+        if found[ch] or missed[ch]:
+            lead = f"median {statistics.median(found[ch]):.0f} s" if found[ch] else "-"
+            print(f"{ch:>16} | {len(found[ch]):>4} of {len(found[ch]) + missed[ch]:<4} {lead}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Shift exposure accounting: incremental integration vs. rescanning history.
+
+    python -m benchmarks.bench_exposure
+
+Streams a shift of frames from virtual workers, with hot spots, gas
+leaks and the odd dropout, through ``ExposureAccount`` and checks the
+dose and TWA against a trapezoid over each worker's whole recorded
+signal. Then compares the per-frame cost with recomputing the figures
+from stored history on every frame, and the time to get every account
+back after a restart: loading the checkpoint and replaying the frames
+stored after it, against reading the whole shift back from the store.
+"""
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from safety_core.exposure import LIMITS, MAX_GAP, ExposureAccount
+from safety_core.storage import TelemetryStore
+from tools.synth import VirtualWorker
+
+INTERVAL = 2.0
+START = 1.7e9
+WORKERS = 200
+HOURS = 8
+# Share of frames lost, in runs of up to two minutes
+DROPOUT = 0.002
+RESCAN_FRAMES = 2000
+# Frames stored after the last checkpoint, per worker (30 s of them)
+TAIL = 15
+
+
+def traffic(seed=3):
+    """Per worker, arrays of event times and of each channel in ``LIMITS``."""
+    rng = random.Random(seed)
+    out = []
+    for i in range(WORKERS):
+        worker = VirtualWorker(f"W-{i:04d}", random.Random(rng.random()), hazard_rate=2.0)
+        ts, values = [], {field: [] for field in LIMITS}
+        t = START
+        while t < START + HOURS * 3600:
+            frame, _ = worker.step(INTERVAL)
+            if rng.random() < DROPOUT:
+                t += rng.uniform(10, 120)
+            ts.append(t)
+            for field in LIMITS:
+                values[field].append(frame[field])
+            t += INTERVAL
+        out.append((f"W-{i:04d}", np.array(ts), {f: np.array(v) for f, v in values.items()}))
+    return out
+
+
+def frames(ts, values):
+    names = list(values)
+    return [(t, dict(zip(names, row))) for t, row in zip(ts.tolist(), zip(*(values[n].tolist() for n in names)))]
+
+
+def reference(ts, x):
+    """Trapezoid over the whole signal, skipping intervals longer than MAX_GAP."""
+    dt = np.diff(ts)
+    area = 0.5 * (x[1:] + x[:-1]) * dt
+    return area[dt <= MAX_GAP].sum() / 3600, dt[dt > MAX_GAP].sum()
+
+
+def check_parity(fleet):
+    for _, ts, values in fleet:
+        account = ExposureAccount()
+        for t, frame in frames(ts, values):
+            account.update(frame, t)
+        for field, limit in LIMITS.items():
+            integral, unmeasured = reference(ts, values[field])
+            assert np.isclose(account.budget(field).value * (limit.hours or 1.0), integral, rtol=1e-9), field
+            assert np.isclose(account.unmeasured(field), unmeasured), field
+
+
+def time_incremental(fleet):
+    streams = [frames(ts, values) for _, ts, values in fleet]
+    t = time.perf_counter()
+    for stream in streams:
+        account = ExposureAccount()
+        for ts, frame in stream:
+            account.update(frame, ts)
+            account.budget("radiation_uSvh")
+            account.budget("gas_ppm")
+    return time.perf_counter() - t, sum(len(s) for s in streams)
+
+
+def time_rescan(fleet):
+    """Recompute both figures from the history so far after every frame."""
+    _, ts, values = fleet[0]
+    t = time.perf_counter()
+    for n in range(1, RESCAN_FRAMES + 1):
+        for field in LIMITS:
+            reference(ts[:n], values[field][:n])
+    return time.perf_counter() - t
+
+
+def time_restart(fleet):
+    root = tempfile.mkdtemp()
+    try:
+        store = TelemetryStore(root)
+        accounts = {}
+        for worker_id, ts, values in fleet:
+            account = accounts[worker_id] = ExposureAccount()
+            stream = frames(ts, values)
+            for t, frame in stream:
+                store.append(worker_id, frame, t)
+            for t, frame in stream[:-TAIL]:
+                account.update(frame, t)
+        store.write_state("exposure", {w: a.state() for w, a in accounts.items()})
+        store.close()
+
+        t = time.perf_counter()
+        store = TelemetryStore(root)
+        restored = {}
+        for worker_id, state in store.read_state("exposure").items():
+            account = restored[worker_id] = ExposureAccount()
+            account.restore(state)
+            rows = store.query(worker_id, start=account.last_t)
+            rows = rows[rows["timestamp"] > account.last_t]
+            for row in rows:
+                frame = dict(zip(rows.dtype.names, row.tolist()))
+                account.update(frame, frame["timestamp"])
+        checkpoint = time.perf_counter() - t
+        store.close()
+
+        t = time.perf_counter()
+        store = TelemetryStore(root)
+        for worker_id in store.worker_ids():
+            rows = store.query(worker_id)
+            for field in LIMITS:
+                reference(rows["timestamp"], rows[field])
+        rescan = time.perf_counter() - t
+        store.close()
+
+        for worker_id, ts, values in fleet:
+            account = restored[worker_id]
+            for field in LIMITS:
+                assert np.isclose(account.total(field), reference(ts, values[field])[0], rtol=1e-9), worker_id
+        return checkpoint, rescan
+    finally:
+        shutil.rmtree(root)
+
+
+def main():
+    fleet = traffic()
+    count = sum(len(ts) for _, ts, _ in fleet)
+    print(f"{WORKERS} workers x {HOURS} h, {count:,} frames")
+    check_parity(fleet)
+    print("parity: dose, TWA and unmeasured time match a trapezoid over the whole signal for every worker")
+
+    seconds, frames_done = time_incremental(fleet)
+    rescan = time_rescan(fleet)
+    per_rescan = rescan / RESCAN_FRAMES
+    print(f"\n{'per frame':>32} | {'us':>10}")
+    print(f"{'incremental account + budgets':>32} | {seconds / frames_done * 1e6:>10.2f}")
+    print(f"{f'rescan, first {RESCAN_FRAMES:,} frames':>32} | {per_rescan * 1e6:>10.2f}")
+    print(f"{'rescan, end of shift (est.)':>32} | {per_rescan * count / WORKERS / RESCAN_FRAMES * 2 * 1e6:>10.2f}")
+
+    checkpoint, full = time_restart(fleet)
+    print(f"\nrestart: checkpoint + {TAIL} stored frames per worker {checkpoint * 1e3:.1f} ms, "
+          f"reading the whole shift back {full * 1e3:.1f} ms; totals match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Server-side fall detection: throughput of the accelerometer stage.
+
+    python -m benchmarks.bench_fall_detection
+
+Generates one minute of 100 Hz accelerometer data for 1,000 virtual
+workers in one-second batches, with falls, walking gaits and knocks
+against equipment (see ``tools.synth``). First checks that the streaming
+``MotionStream`` finds exactly the falls a per-sample evaluation of the
+same rules finds on each worker's whole signal, and that those are the
+falls the simulator injected. Then times the detector alone at several
+batch sizes, binary and JSON decoding plus detection, and the hub's whole
+ingest path, and reports how much of one core 1,000 workers at 100 Hz
+take.
+"""
+import math
+import random
+import time
+
+import numpy as np
+
+from safety_core.falls import FREE_FALL_G, IMPACT_G, REFRACTORY, TILT_DEG, MotionStream, windows
+from safety_core.frames import FrameDecoder, encode_imu_batch
+from safety_core.mqtt_service import TelemetryHub, imu_topic
+from tools.synth import VirtualWorker
+
+WORKERS = 1000
+HZ = 100
+BATCH = 1.0
+BATCH_SIZES = (0.25, 0.5, 1.0, 2.0)
+SECONDS = 60
+# Workers checked against the per-sample reference
+REFERENCE_WORKERS = 50
+JSON_WORKERS = 100
+START = 1.7e9
+
+
+def traffic(seed=11):
+    """Per worker, a list of ``(t0, samples)`` batches and the injected fall times."""
+    rng = random.Random(seed)
+    n = round(BATCH * HZ)
+    streams, injected = [], []
+    for i in range(WORKERS):
+        # Falls are rare; a high hazard rate gives the check something to find
+        worker = VirtualWorker(f"W-{i:04d}", random.Random(rng.random()), hazard_rate=120.0)
+        batches, falls = [], []
+        for k in range(int(SECONDS / BATCH)):
+            frame, _ = worker.step(BATCH)
+            batches.append((START + k * BATCH, worker.motion(n, HZ, frame["fall_detected"])))
+            if frame["fall_detected"]:
+                falls.append(START + k * BATCH)
+        streams.append(batches)
+        injected.append(falls)
+    return streams, injected
+
+
+def reference_falls(samples, hz, t0):
+    """The detector's rules evaluated sample by sample on a whole signal."""
+    ff_window, ff_min, pre, settle, post = windows(hz)
+    rows = samples.tolist()
+    mags = [math.sqrt(x * x + y * y + z * z) for x, y, z in rows]
+    falls = []
+    last = None
+    for i in range(ff_window + pre, len(rows) - settle - post):
+        if mags[i] <= IMPACT_G:
+            continue
+        if sum(1 for m in mags[i - ff_window:i] if m < FREE_FALL_G) < ff_min:
+            continue
+        before = [sum(r[k] for r in rows[i - ff_window - pre:i - ff_window]) for k in range(3)]
+        after = [sum(r[k] for r in rows[i + settle:i + settle + post]) for k in range(3)]
+        norms = math.hypot(*before) * math.hypot(*after)
+        cos = sum(a * b for a, b in zip(before, after)) / max(norms, 1e-12)
+        if math.degrees(math.acos(min(1.0, max(-1.0, cos)))) < TILT_DEG:
+            continue
+        t = t0 + i / hz
+        if last is not None and t - last < REFRACTORY:
+            continue
+        last = t
+        falls.append(t)
+    return falls
+
+
+def stream_falls(batches):
+    stream = MotionStream()
+    falls = []
+    for t0, samples in batches:
+        falls += stream.push(samples, HZ, t0)
+    return falls
+
+
+def check_parity(streams, injected):
+    for batch in BATCH_SIZES:
+        for batches in rebatch(streams[:REFERENCE_WORKERS], batch):
+            signal = np.concatenate([samples for _, samples in batches])
+            reference = reference_falls(signal, HZ, batches[0][0])
+            got = [fall.t for fall in stream_falls(batches)]
+            assert len(got) == len(reference) and np.allclose(got, reference, rtol=0, atol=1e-6), \
+                f"stream differs from the per-sample reference with {batch:g} s batches"
+    detected = 0
+    for batches, expected in zip(streams, injected):
+        got = [fall.t for fall in stream_falls(batches)]
+        # Each injected fall lies inside its batch. Falls in the first and
+        # last two seconds lack the windows before or after the impact.
+        matched = [t0 for t0 in expected if any(t0 <= t < t0 + BATCH for t in got)]
+        missed = [t0 for t0 in expected if t0 not in matched and START + 2 <= t0 < START + SECONDS - 2]
+        assert not missed, f"missed falls at {missed}"
+        assert len(got) == len(matched), "fall detected where none was injected"
+        detected += len(got)
+    return detected
+
+
+def rebatch(streams, batch):
+    """The same signals cut into batches of ``batch`` seconds."""
+    n = round(batch * HZ)
+    out = []
+    for batches in streams:
+        signal = np.concatenate([samples for _, samples in batches])
+        out.append([(START + k / HZ, signal[k:k + n]) for k in range(0, len(signal), n)])
+    return out
+
+
+def run_streams(streams):
+    t = time.perf_counter()
+    for batches in streams:
+        stream = MotionStream()
+        for t0, samples in batches:
+            stream.push(samples, HZ, t0)
+    return time.perf_counter() - t
+
+
+def run_decode(payloads):
+    decoder = FrameDecoder()
+    streams = {}
+    t = time.perf_counter()
+    for worker_id, payload in payloads:
+        batch = decoder.decode_imu(payload)
+        stream = streams.get(worker_id)
+        if stream is None:
+            stream = streams[worker_id] = MotionStream()
+        stream.push(batch.samples, batch.hz, batch.device_time)
+    return time.perf_counter() - t
+
+
+def run_hub(messages):
+    hub = TelemetryHub()
+    t = time.perf_counter()
+    for received_ns, topic, payload in messages:
+        hub.receive(topic, payload, received_ns)
+    return time.perf_counter() - t, hub
+
+
+def interleave(streams, workers, binary=True):
+    """Batches in arrival order: every worker's first batch, then the second..."""
+    return [(f"W-{i:04d}", t0, encode_imu_batch(samples, HZ, device_time=t0, binary=binary))
+            for k in range(int(SECONDS / BATCH))
+            for i, batches in enumerate(streams[:workers])
+            for t0, samples in (batches[k],)]
+
+
+def report(label, seconds, workers, batch=BATCH):
+    samples = workers * SECONDS * HZ
+    # Share of one core for the whole fleet in real time
+    load = seconds / SECONDS * WORKERS / workers
+    print(f"{label:>30} | {seconds / (workers * SECONDS / batch) * 1e6:>8.1f} "
+          f"{samples / seconds / 1e6:>9.2f} {load:>9.1%} {samples / seconds / HZ:>9,.0f}")
+
+
+def main():
+    t = time.perf_counter()
+    streams, injected = traffic()
+    total = sum(len(f) for f in injected)
+    print(f"{WORKERS} workers x {SECONDS} s at {HZ} Hz in {BATCH:g} s batches, {total} falls injected "
+          f"(generated in {time.perf_counter() - t:.1f} s)")
+    detected = check_parity(streams, injected)
+    print(f"parity: stream matches the per-sample reference on {REFERENCE_WORKERS} workers at every batch size; "
+          f"{detected} falls detected, none missed, no false alarms")
+
+    print(f"\n{'path':>30} | {'us/batch':>8} {'Msample/s':>9} {'1k load':>9} {'workers':>9}")
+    for batch in BATCH_SIZES:
+        report(f"MotionStream, {batch:g} s batches", run_streams(rebatch(streams, batch)), WORKERS, batch)
+
+    binary = interleave(streams, WORKERS)
+    report("binary decode + detect", run_decode([(w, p) for w, _, p in binary]), WORKERS)
+    as_json = interleave(streams, JSON_WORKERS, binary=False)
+    report("JSON decode + detect", run_decode([(w, p) for w, _, p in as_json]), JSON_WORKERS)
+
+    messages = [(int((t0 + BATCH) * 1e9), imu_topic(w), p) for w, t0, p in binary]
+    seconds, hub = run_hub(messages)
+    report("hub.receive (binary)", seconds, WORKERS)
+    print(f"\nhub raised {hub.fleet.motion_counts()[1]} fall alerts; 'workers' is how many "
+          f"{HZ} Hz devices one core keeps up with, '1k load' the share of a core for {WORKERS:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+First paint and the cost of repeated full runs.
+
+    python -m benchmarks.bench_first_paint
+
+Starts the dashboard under ``streamlit run`` with a synthetic feed (see
+render_app.py) and, for a fresh websocket session, measures the time from
+connecting until the first element arrives and until the first script run
+finishes, plus the bytes of that run. It then asks for a second full run,
+as a widget change would, and reports how many bytes that costs.
+"""
+import asyncio
+import time
+
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from tornado.websocket import websocket_connect
+
+from .bench_render_bytes import free_port, rerun_message, start_server
+
+SESSIONS = 5
+
+
+async def read_run(ws, started):
+    """Read one script run; return (first delta s, finished s, bytes, largest msg)."""
+    first = None
+    total = largest = 0
+    fragment_run = False
+    while True:
+        raw = await ws.read_message()
+        if raw is None:
+            raise RuntimeError("connection closed")
+        msg = ForwardMsg()
+        msg.ParseFromString(raw)
+        kind = msg.WhichOneof("type")
+        if kind == "new_session":
+            fragment_run = bool(msg.new_session.fragment_ids_this_run)
+        if fragment_run:
+            continue
+        total += len(raw)
+        largest = max(largest, len(raw))
+        if kind in ("delta", "ref_hash") and first is None:
+            first = time.perf_counter() - started
+        if kind == "script_finished":
+            return first, time.perf_counter() - started, total, largest
+
+
+async def session(port):
+    started = time.perf_counter()
+    ws = await websocket_connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"])
+    await ws.write_message(rerun_message(), binary=True)
+    first_run = await read_run(ws, started)
+    started = time.perf_counter()
+    await ws.write_message(rerun_message(), binary=True)
+    second_run = await read_run(ws, started)
+    ws.close()
+    return first_run, second_run
+
+
+def main():
+    port = free_port()
+    proc = start_server(port, 2.0)
+    try:
+        results = [asyncio.run(session(port)) for _ in range(SESSIONS)]
+    finally:
+        proc.terminate()
+        proc.wait()
+    # The first session pays for the server's imports; report the rest.
+    results = results[1:]
+    for label, idx in (("first full run", 0), ("second full run", 1)):
+        runs = [r[idx] for r in results]
+        n = len(runs)
+        print(f"{label}")
+        print(f"  first element  {sum(r[0] for r in runs) / n * 1e3:7.1f} ms")
+        print(f"  run finished   {sum(r[1] for r in runs) / n * 1e3:7.1f} ms")
+        print(f"  bytes          {sum(r[2] for r in runs) / n / 1024:7.1f} KiB"
+              f"  (largest message {max(r[3] for r in runs) / 1024:.1f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Routing cost of the per-worker fleet store.
+
+    python -m benchmarks.bench_fleet_store
+
+Simulates every device of a fleet publishing one frame on its own
+``worker/<id>/safety/data`` topic and measures how many frames per second
+the hub can route (topic parse + store update + risk scores). A fleet of
+1,000 devices publishing every 2 s needs 500 frames/s.
+"""
+import json
+
+from safety_core.mqtt_service import TelemetryHub, data_topic
+
+from .common import sample_payloads, timed
+
+FLEET_SIZES = (10, 100, 1000, 10000)
+ROUNDS = 5
+
+
+def route(hub, topics, frames):
+    for _ in range(ROUNDS):
+        for topic, frame in zip(topics, frames):
+            hub.dispatch(topic, dict(frame))
+
+
+def main():
+    print(f"{'devices':>8} {'frames/s':>12} {'us/frame':>9} {'headroom vs 2s cadence':>24}")
+    for n in FLEET_SIZES:
+        hub = TelemetryHub()
+        topics = [data_topic(f"W-{i:05d}") for i in range(n)]
+        frames = [json.loads(p) for p in sample_payloads(n)]
+        route(hub, topics, frames)  # warm the store
+        wall, _ = timed(route, hub, topics, frames)
+        rate = n * ROUNDS / wall
+        print(f"{n:>8} {rate:>12,.0f} {1e6 / rate:>9.2f} {rate / (n / 2):>23.0f}x")
+
+
+if __name__ == "__main__":
+    main()
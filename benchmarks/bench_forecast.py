@@ -0,0 +1,175 @@
+"""
+Trend forecasts: cost per tick next to risk scoring, and warning lead time.
+
+    python -m benchmarks.bench_forecast
+
+Drives ``TrendForecaster`` with frames from virtual workers (see
+``tools.synth``). First checks that the vectorised forecaster ends with
+the same levels, trends and times to critical as a per-sample
+evaluation of the same equations, whether each ``step`` gets one frame
+per worker or a minute of them. Then times one tick of the whole fleet
+(every worker's next frame, then the time to critical of every worker)
+against scoring the same frames, both in one vectorised pass
+(``score_frames``) and frame by frame as ingest does
+(``compute_risk_scores``). Finally runs a quiet fleet to count projections
+that never came true, and a fleet with incidents to see how long before
+the firmware's threshold alert "projected critical" first showed.
+"""
+import math
+import statistics
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from safety_core import forecast
+from safety_core.forecast import CHANNELS, TrendForecaster
+from safety_core.risk import compute_risk_scores, score_frames
+from safety_core.rules import RULES
+
+from .common import fleet_ticks, warning_leads
+
+FLEETS = (1000, 10000)
+TIMED_TICKS = 30
+PARITY_WORKERS = 100
+PARITY_SECONDS = 3600
+QUALITY_WORKERS = 50
+QUALITY_HOURS = 3
+HAZARD_RATE = 3.0
+
+
+class ScalarForecaster:
+    """The forecaster's equations evaluated one sample and channel at a time."""
+
+    def __init__(self):
+        self.state = {}
+
+    def add(self, worker_id, t, frame):
+        f = forecast
+        for ch in CHANNELS:
+            x = frame.get(ch)
+            s = self.state.setdefault((worker_id, ch), [0.0, 0.0, 0, None])
+            level, trend, count, last_t = s
+            fresh = last_t is None or t - last_t > f.MAX_GAP or count == 0
+            dt = 0.0 if fresh else max(t - last_t, 0.0)
+            d = f.DAMPING[ch]
+            decay = math.exp(-dt / d)
+            predicted = level + trend * d * (1 - decay)
+            trend *= decay
+            if x is None:
+                s[:] = [predicted, trend, 0 if fresh else count, t]
+            elif fresh:
+                s[:] = [x, 0.0, 1, t]
+            else:
+                corrected = predicted + -math.expm1(-dt / f.LEVEL_TAU) * (x - predicted)
+                slope = (corrected - level) / dt if dt > 0 else 0.0
+                s[:] = [corrected, trend + -math.expm1(-dt / f.TREND_TAU) * (slope - trend), count + 1, t]
+
+    def time_to_critical(self, worker_id, ch):
+        level, trend, count, _ = self.state[(worker_id, ch)]
+        rule, d = RULES[ch], forecast.DAMPING[ch]
+        sign = 1.0 if rule.direction == "above" else -1.0
+        gap, reach = sign * (rule.critical - level), sign * trend * d
+        if gap <= 0:
+            h = 0.0
+        elif reach > gap:
+            h = -d * math.log1p(-gap / reach)
+        else:
+            return math.nan
+        return h if count >= forecast.WARMUP and h <= forecast.HORIZON else math.nan
+
+
+def check_parity(ticks):
+    reference = ScalarForecaster()
+    for tick in ticks:
+        for worker_id, t, frame in tick:
+            reference.add(worker_id, t, frame)
+    for per_step in (1, 30):
+        forecaster = TrendForecaster()
+        for k in range(0, len(ticks), per_step):
+            for tick in ticks[k:k + per_step]:
+                for worker_id, t, frame in tick:
+                    forecaster.add(worker_id, t, frame)
+            forecaster.step()
+        h = forecaster.time_to_critical()
+        for (worker_id, ch), s in reference.state.items():
+            row, c = forecaster.rows[worker_id], CHANNELS.index(ch)
+            assert np.allclose([forecaster.level[row, c], forecaster.trend[row, c]], s[:2]), \
+                f"state of {worker_id}/{ch} differs with {per_step} frames per worker and step"
+            assert np.allclose(h[row, c], reference.time_to_critical(worker_id, ch), equal_nan=True)
+    return int(np.count_nonzero(~np.isnan(h)))
+
+
+def time_forecast(ticks):
+    forecaster = TrendForecaster()
+    t = time.perf_counter()
+    for tick in ticks:
+        for worker_id, ts, frame in tick:
+            forecaster.add(worker_id, ts, frame)
+        forecaster.step()
+        forecaster.time_to_critical()
+    return time.perf_counter() - t
+
+
+def time_scoring(ticks, vectorised):
+    t = time.perf_counter()
+    for tick in ticks:
+        frames = [frame for _, _, frame in tick]
+        if vectorised:
+            score_frames(frames)
+        else:
+            for frame in frames:
+                compute_risk_scores(frame)
+    return time.perf_counter() - t
+
+
+def run_quality(ticks):
+    """Times at which each worker's "projected critical" line appeared."""
+    forecaster = TrendForecaster()
+    shown = set()
+    appeared = defaultdict(list)
+    for tick in ticks:
+        for worker_id, t, frame in tick:
+            forecaster.add(worker_id, t, frame)
+        forecaster.step()
+        h = forecaster.time_to_critical()
+        now = tick[-1][1]
+        ahead = {(forecaster.worker_ids[r], CHANNELS[c]) for r, c in zip(*np.nonzero(h > 0))}
+        for key in ahead - shown:
+            appeared[key].append(now)
+        shown = ahead
+    return appeared
+
+
+def main():
+    ticks, _ = fleet_ticks(PARITY_WORKERS, PARITY_SECONDS, HAZARD_RATE)
+    projected = check_parity(ticks)
+    print(f"parity: {PARITY_WORKERS} workers x {PARITY_SECONDS // 60} min, levels, trends and times to critical "
+          f"identical to the per-sample reference with 1 and 30 frames per worker and step "
+          f"({projected} channels projected at the end)")
+
+    print(f"\n{'workers':>8} | {'forecast':>9} {'score_frames':>12} {'risk per frame':>14}   ms/tick")
+    for workers in FLEETS:
+        ticks, _ = fleet_ticks(workers, TIMED_TICKS * 2.0, HAZARD_RATE)
+        row = [time_forecast(ticks), time_scoring(ticks, True), time_scoring(ticks, False)]
+        print(f"{workers:>8,} | {row[0] / TIMED_TICKS * 1e3:>9.2f} {row[1] / TIMED_TICKS * 1e3:>12.2f} "
+              f"{row[2] / TIMED_TICKS * 1e3:>14.2f}")
+
+    hours = QUALITY_WORKERS * QUALITY_HOURS
+    ticks, _ = fleet_ticks(QUALITY_WORKERS, QUALITY_HOURS * 3600, hazard_rate=0.0, seed=6)
+    quiet = run_quality(ticks)
+    counts = Counter(ch for (_, ch), times in quiet.items() for _ in times)
+    print(f"\nno incidents, {hours} worker-hours: {sum(counts.values()) / hours:.2f} projections per "
+          f"worker-hour {dict(counts)}")
+
+    ticks, alerts = fleet_ticks(QUALITY_WORKERS, QUALITY_HOURS * 3600, HAZARD_RATE, seed=7)
+    found, missed = warning_leads(alerts, run_quality(ticks), CHANNELS)
+    print(f"{HAZARD_RATE:g} incidents per worker-hour, projected critical ahead of the threshold alert:")
+    for ch in CHANNELS:
+        if found[ch] or missed[ch]:
+            lead = f"median {statistics.median(found[ch]):.0f} s" if found[ch] else "-"
+            print(f"{ch:>16} | {len(found[ch]):>4} of {len(found[ch]) + missed[ch]:<4} {lead}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Frame decoding: json.loads to dicts vs. validated Frame records.
+
+    python -m benchmarks.bench_frame_decode
+
+Decodes payloads on one core the way on_message sees them. "Current
+schema" is the single-wearer traffic of today: every payload is valid.
+"Fleet" is 10,000 devices on per-worker topics with 1% malformed
+payloads (broken JSON, strings for numbers, arrays). The baseline is
+the old path, ``json.loads(payload.decode())`` with no checks; the
+decoder runs with the standard json module and, when installed, orjson.
+Accepted frames are checked against the plain parse, and fractional
+values for integer fields against rounding; numbers too large for their
+field or infinite must be rejected.
+"""
+import json
+import random
+import time
+
+from safety_core import frames
+from safety_core.frames import FrameDecoder
+from safety_core.mqtt_service import data_topic, parse_topic
+
+from .common import sample_frame, sample_payloads
+
+PAYLOADS = 100_000
+FLEET = 10_000
+MALFORMED = 0.01
+
+
+def fleet_messages(rng):
+    messages = []
+    for i in range(PAYLOADS):
+        frame = sample_frame(rng)
+        if rng.random() < MALFORMED:
+            kind = rng.randrange(3)
+            if kind == 0:
+                payload = json.dumps(frame).encode()[:-5]
+            elif kind == 1:
+                frame["heart_rate"] = str(frame["heart_rate"])
+                payload = json.dumps(frame).encode()
+            else:
+                payload = json.dumps(list(frame.values())).encode()
+        else:
+            payload = json.dumps(frame).encode()
+        messages.append((data_topic(f"W-{rng.randrange(FLEET):05d}"), payload))
+    return messages
+
+
+def baseline(messages):
+    accepted = 0
+    for topic, payload in messages:
+        parse_topic(topic)
+        try:
+            json.loads(payload.decode())
+            accepted += 1
+        except ValueError:
+            pass
+    return accepted
+
+
+def decoder_run(messages):
+    decoder = FrameDecoder()
+    for topic, payload in messages:
+        parse_topic(topic)
+        decoder.decode_frame(payload, topic)
+    return decoder
+
+
+def rate(fn, messages):
+    best = float("inf")
+    for _ in range(3):
+        t = time.perf_counter()
+        result = fn(messages)
+        best = min(best, time.perf_counter() - t)
+    return len(messages) / best, result
+
+
+def check_parity(messages):
+    decoder = FrameDecoder()
+    for topic, payload in messages:
+        frame = decoder.decode_frame(payload, topic)
+        if frame is not None:
+            assert frame.as_dict() == json.loads(payload), payload
+
+
+def check_fractional_counts():
+    decoder = FrameDecoder()
+    frame = decoder.decode_frame(b'{"body_temp": 37, "heart_rate": 80.6, "radiation_cpm": 41.5}')
+    assert frame is not None and frame.as_dict() == {"body_temp": 37.0, "heart_rate": 81, "radiation_cpm": 42}
+    assert type(frame.heart_rate) is int
+    assert decoder.decode_frame(b'{"body_temp": 37, "heart_rate": "80"}') is None
+    assert decoder.rejected == {"bad_type": 1}, decoder.rejected
+    for obj in ({"body_temp": 37, "heart_rate": float("inf")}, {"body_temp": 10 ** 400},
+                {"body_temp": float("inf")}, {"body_temp": 37, "ts": float("inf")},
+                {"body_temp": 37, "ts": 10 ** 400}, {"heart_rate": 10 ** 30}):
+        try:
+            frames.build_frame(obj)
+        except frames.FrameError as e:
+            assert e.reason == "bad_type", obj
+        else:
+            raise AssertionError(f"accepted {obj}")
+
+
+def check_hostile_numbers():
+    """Huge and infinite numbers are rejected by either parser, never raised."""
+    default_loads = frames.loads
+    try:
+        for loads in (lambda p: json.loads(p.decode()), default_loads):
+            frames.loads = loads
+            decoder = FrameDecoder()
+            for payload in (b'{"body_temp": 1' + b"0" * 400 + b"}", b'{"body_temp": 1e999}',
+                            b'{"body_temp": 37, "ts": 1e999}'):
+                assert decoder.decode_frame(payload) is None, payload
+            assert decoder.rejected_total == 3, decoder.rejected
+    finally:
+        frames.loads = default_loads
+
+
+def main():
+    check_fractional_counts()
+    check_hostile_numbers()
+    rng = random.Random(17)
+    workloads = {
+        "current schema": [(data_topic("Worker-01"), p) for p in sample_payloads(PAYLOADS)],
+        "fleet, 1% bad": fleet_messages(rng),
+    }
+    parsers = [("json", lambda p: json.loads(p.decode()))]
+    if frames.orjson is not None:
+        parsers.append(("orjson", frames.orjson.loads))
+    default_loads = frames.loads
+
+    print(f"{PAYLOADS:,} payloads per workload, frames/s on one core (best of 3)\n")
+    print(f"{'workload':>15} | {'json.loads dict':>15} | " + " | ".join(f"{'Frame, ' + name:>14}" for name, _ in parsers))
+    for label, messages in workloads.items():
+        check_parity(messages[:5000])
+        base, _ = rate(baseline, messages)
+        row = f"{label:>15} | {base:>15,.0f} | "
+        cells = []
+        for name, loads in parsers:
+            frames.loads = loads
+            try:
+                speed, decoder = rate(decoder_run, messages)
+            finally:
+                frames.loads = default_loads
+            cells.append(f"{speed:>14,.0f}")
+        print(row + " | ".join(cells))
+        print(f"{'':>15}   decoded {decoder.decoded:,}, partial {decoder.partial:,}, "
+              f"rejected {decoder.rejected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Per-rerun cost of building the history DataFrame.
+
+    python -m benchmarks.bench_history_frame
+
+Before, every rerun converted the whole history four times (overview,
+environment, statistics and raw table). Now one cached frame per worker
+is extended with the rows that arrived since the previous rerun and all
+tabs slice it. One new frame arrives per rerun, as with a 2 s cadence.
+"""
+import json
+import time
+
+import pandas as pd
+
+from safety_core.ring_buffer import ColumnRing
+
+from .common import sample_payloads
+
+BUFFER_SIZES = (300, 3000, 30000)
+RERUNS = 50
+
+
+def fill(frames, capacity):
+    ring = ColumnRing(capacity)
+    legacy = []
+    now = time.time()
+    for frame in frames[:capacity]:
+        ring.append(frame, now)
+        legacy.append(frame)
+    return ring, legacy
+
+
+def legacy_rerun(legacy):
+    pd.DataFrame(legacy).tail(80)
+    pd.DataFrame(legacy).tail(50)
+    df = pd.DataFrame(legacy)
+    df["body_temp"].mean()
+    pd.DataFrame(legacy).tail(200)
+
+
+def cached_rerun(ring):
+    df = ring.frame()
+    df.tail(80)
+    df.tail(50)
+    df["body_temp"].mean()
+    df.tail(200)
+
+
+def main():
+    frames = [json.loads(p) for p in sample_payloads(max(BUFFER_SIZES) + RERUNS)]
+    print(f"{'rows':>6} | {'4x rebuild ms/rerun':>19} | {'cached ms/rerun':>15}")
+    for size in BUFFER_SIZES:
+        ring, legacy = fill(frames, size)
+        ring.frame()
+        extra = frames[size:size + RERUNS]
+
+        t = time.perf_counter()
+        for frame in extra:
+            legacy.append(frame)
+            legacy.pop(0)
+            legacy_rerun(legacy)
+        legacy_ms = (time.perf_counter() - t) / RERUNS * 1e3
+
+        now = time.time()
+        t = time.perf_counter()
+        for frame in extra:
+            ring.append(frame, now)
+            cached_rerun(ring)
+        cached_ms = (time.perf_counter() - t) / RERUNS * 1e3
+        print(f"{size:>6} | {legacy_ms:>19.2f} | {cached_ms:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
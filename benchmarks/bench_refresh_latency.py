@@ -0,0 +1,121 @@
+"""
+Publish-to-render latency and idle cost: fixed 2 s polling vs. push refresh.
+
+    python -m benchmarks.bench_refresh_latency
+
+A publisher thread dispatches frames through the real hub at random
+intervals; a session thread drains its feed, "renders" (a fixed slice of
+busy CPU) and then either sleeps 2 s (legacy) or waits on the
+RefreshScheduler. Latency is measured from dispatch to the end of the
+render that first shows the frame. The idle run counts reruns and CPU
+burned by sessions that receive no data at all.
+"""
+import random
+import threading
+import time
+
+from safety_core.mqtt_service import DATA_TOPIC, TelemetryHub
+from safety_core.refresh import RefreshScheduler
+
+from .common import sample_frame
+
+RENDER_COST = 0.05
+FRAMES = 25
+IDLE_SESSIONS = 40
+IDLE_SECONDS = 6.0
+
+
+def render():
+    end = time.perf_counter() + RENDER_COST
+    while time.perf_counter() < end:
+        pass
+
+
+def drain(feed):
+    return [frame["_sent"] for _, frame in feed.data_queue.drain()]
+
+
+def session_loop(feed, mode, stop, latencies, reruns):
+    scheduler = RefreshScheduler()
+    while not stop.is_set():
+        run_started = time.monotonic()
+        sent = drain(feed)
+        render()
+        done = time.perf_counter()
+        latencies.extend(done - t for t in sent)
+        reruns.append(1)
+        if mode == "poll":
+            stop.wait(2.0)
+        else:
+            scheduler.record_render(time.monotonic() - run_started)
+            scheduler.wait(feed, run_started, yield_point=lambda: stop.is_set() and None)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def latency_run(mode):
+    hub = TelemetryHub()
+    feed = hub.subscribe()
+    stop = threading.Event()
+    latencies, reruns = [], []
+    worker = threading.Thread(target=session_loop, args=(feed, mode, stop, latencies, reruns))
+    worker.start()
+    rng = random.Random(3)
+    for _ in range(FRAMES):
+        time.sleep(rng.uniform(0.2, 1.0))
+        frame = sample_frame(rng)
+        frame["_sent"] = time.perf_counter()
+        hub.dispatch(DATA_TOPIC, frame)
+    time.sleep(2.5)
+    stop.set()
+    hub.dispatch(DATA_TOPIC, {"_sent": time.perf_counter()})
+    worker.join()
+    return latencies[:FRAMES], len(reruns)
+
+
+def idle_run(mode):
+    hub = TelemetryHub()
+    feeds = [hub.subscribe() for _ in range(IDLE_SESSIONS)]
+    stop = threading.Event()
+    reruns = []
+    threads = [
+        threading.Thread(target=session_loop, args=(feed, mode, stop, [], reruns))
+        for feed in feeds
+    ]
+    for t in threads:
+        t.start()
+    # Let every session finish its first render before measuring.
+    time.sleep(IDLE_SESSIONS * RENDER_COST + 0.5)
+    start = len(reruns)
+    cpu0 = time.process_time()
+    time.sleep(IDLE_SECONDS)
+    cpu = time.process_time() - cpu0
+    idle_reruns = len(reruns) - start
+    stop.set()
+    for feed in feeds:
+        feed.updated.set()
+        feed.data_queue.put((None, {"_sent": time.perf_counter()}))
+    for t in threads:
+        t.join()
+    return idle_reruns, cpu
+
+
+def main():
+    print(f"render cost {RENDER_COST * 1e3:.0f} ms, {FRAMES} frames at 0.2-1.0 s spacing\n")
+    print(f"{'mode':>6} | {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'reruns':>7}")
+    for mode in ("poll", "push"):
+        lat, reruns = latency_run(mode)
+        print(f"{mode:>6} | {percentile(lat, 0.5) * 1e3:>8.0f} {percentile(lat, 0.99) * 1e3:>8.0f} "
+              f"{max(lat) * 1e3:>8.0f} {reruns:>7}")
+    print(f"\nidle: {IDLE_SESSIONS} sessions, {IDLE_SECONDS:.0f} s without data")
+    print(f"{'mode':>6} | {'reruns':>7} {'CPU s':>7}")
+    for mode in ("poll", "push"):
+        reruns, cpu = idle_run(mode)
+        print(f"{mode:>6} | {reruns:>7} {cpu:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
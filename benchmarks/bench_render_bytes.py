@@ -0,0 +1,146 @@
+"""
+Bytes sent to the browser per refresh: full-page reruns vs. fragment runs.
+
+    python -m benchmarks.bench_render_bytes
+
+Starts the dashboard under ``streamlit run`` with a synthetic feed (see
+render_app.py), connects to it over the same websocket the browser uses
+and tallies the ForwardMsg bytes of every script run. Fragment timers
+announced by the server are fired the way the frontend would fire them.
+
+The legacy dashboard reran the whole page every 2 s, so its cost per
+refresh is the size of a full run, sent whether or not anything changed.
+"""
+import asyncio
+import collections
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from tornado.websocket import websocket_connect
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "benchmarks", "render_app.py")
+LEGACY_INTERVAL = 2.0
+SECONDS = 20.0
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, frame_interval):
+    env = dict(os.environ, BENCH_FRAME_INTERVAL=str(frame_interval))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP,
+         "--server.headless", "true", "--server.port", str(port),
+         "--browser.gatherUsageStats", "false"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("streamlit did not start")
+
+
+def rerun_message(page_hash="", fragment_id=None):
+    msg = BackMsg()
+    msg.rerun_script.query_string = ""
+    msg.rerun_script.page_script_hash = page_hash
+    if fragment_id:
+        msg.rerun_script.fragment_id = fragment_id
+    return msg.SerializeToString()
+
+
+async def record_runs(port, seconds):
+    """Return a list of (kind, bytes, element counts) per script run."""
+    ws = await websocket_connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"])
+    await ws.write_message(rerun_message(), binary=True)
+    timers, runs, current, page_hash = {}, [], None, ""
+    end = time.time() + seconds
+    while time.time() < end:
+        now = time.time()
+        for fragment_id, (interval, due) in list(timers.items()):
+            if now >= due:
+                await ws.write_message(rerun_message(page_hash, fragment_id), binary=True)
+                timers[fragment_id] = (interval, now + interval)
+        try:
+            raw = await asyncio.wait_for(ws.read_message(), 0.05)
+        except asyncio.TimeoutError:
+            continue
+        if raw is None:
+            break
+        msg = ForwardMsg()
+        msg.ParseFromString(raw)
+        kind = msg.WhichOneof("type")
+        if kind == "new_session":
+            page_hash = msg.new_session.page_script_hash
+            fragment = bool(msg.new_session.fragment_ids_this_run)
+            if not fragment:
+                timers.clear()
+            current = ["fragment" if fragment else "full", 0, collections.Counter()]
+        elif kind == "auto_rerun":
+            timers[msg.auto_rerun.fragment_id] = (msg.auto_rerun.interval, time.time() + msg.auto_rerun.interval)
+        if current is None:
+            continue
+        current[1] += len(raw)
+        if kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+            current[2][msg.delta.new_element.WhichOneof("type")] += len(raw)
+        if kind == "script_finished":
+            runs.append(tuple(current))
+            current = None
+    ws.close()
+    return runs
+
+
+def measure(frame_interval, seconds):
+    port = free_port()
+    proc = start_server(port, frame_interval)
+    try:
+        return asyncio.run(record_runs(port, seconds))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def summarize(label, runs, seconds):
+    full = [b for kind, b, _ in runs if kind == "full"]
+    fragment = [b for kind, b, _ in runs if kind == "fragment"]
+    full_avg = sum(full) / len(full) if full else 0
+    fragment_avg = sum(fragment) / len(fragment) if fragment else 0
+    legacy = full_avg * seconds / LEGACY_INTERVAL
+    live = sum(fragment)
+    print(f"{label}")
+    print(f"  full page run        {full_avg / 1024:8.1f} KiB  ({len(full)} runs)")
+    print(f"  fragment run         {fragment_avg / 1024:8.1f} KiB  ({len(fragment)} runs)")
+    print(f"  legacy 2 s reruns    {legacy / seconds / 1024:8.1f} KiB/s")
+    print(f"  fragment refresh     {live / seconds / 1024:8.1f} KiB/s")
+    elements = collections.Counter()
+    for kind, _, counts in runs:
+        if kind == "fragment":
+            elements.update(counts)
+    if elements:
+        print("  fragment bytes by element: " + ", ".join(
+            f"{name} {size / 1024:.1f} KiB" for name, size in elements.most_common()
+        ))
+
+
+def main():
+    summarize(f"one frame every 2 s, {SECONDS:.0f} s", measure(2.0, SECONDS), SECONDS)
+    summarize(f"no data, {SECONDS:.0f} s", measure(0, SECONDS), SECONDS)
+
+
+if __name__ == "__main__":
+    main()
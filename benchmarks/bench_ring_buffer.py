@@ -0,0 +1,78 @@
+"""
+Columnar ring buffer vs. the original list-of-dicts history.
+
+    python -m benchmarks.bench_ring_buffer
+
+The legacy history appended each frame dict to a list and trimmed it with
+``pop(0)``. The ring buffer writes into preallocated typed columns and
+hands out tail views without copying.
+"""
+import json
+import time
+import tracemalloc
+
+from safety_core.ring_buffer import ColumnRing
+
+from .common import sample_payloads, timed
+
+CAPACITIES = (300, 3000, 30000, 100000)
+APPENDS = 150000
+TAIL = 80
+
+
+def legacy_append(frames, capacity):
+    history = []
+    for frame in frames:
+        history.append(frame)
+        if len(history) > capacity:
+            history.pop(0)
+    return history
+
+
+def ring_append(frames, capacity):
+    ring = ColumnRing(capacity)
+    now = time.time()
+    for frame in frames:
+        ring.append(frame, now)
+    return ring
+
+
+def legacy_tail(history):
+    for _ in range(1000):
+        [row["body_temp"] for row in history[-TAIL:]]
+
+
+def ring_tail(ring):
+    for _ in range(1000):
+        ring.column("body_temp", TAIL)
+
+
+def legacy_memory(frames, capacity):
+    tracemalloc.start()
+    history = [dict(f) for f in frames[-capacity:]]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del history
+    return size
+
+
+def main():
+    payloads = sample_payloads(APPENDS)
+    frames = [json.loads(p) for p in payloads]
+    print(f"{APPENDS} appends, tail of {TAIL} rows read 1000 times\n")
+    print(f"{'capacity':>8} | {'list us/append':>14} {'ring us/append':>14} "
+          f"| {'list us/tail':>12} {'ring us/tail':>12} | {'list MiB':>8} {'ring MiB':>8}")
+    for cap in CAPACITIES:
+        legacy_wall, _ = timed(legacy_append, frames, cap, repeat=1)
+        ring_wall, _ = timed(ring_append, frames, cap, repeat=1)
+        history = legacy_append(frames, cap)
+        ring = ring_append(frames, cap)
+        lt, _ = timed(legacy_tail, history)
+        rt, _ = timed(ring_tail, ring)
+        print(f"{cap:>8} | {legacy_wall / APPENDS * 1e6:>14.2f} {ring_wall / APPENDS * 1e6:>14.2f} "
+              f"| {lt * 1e3:>12.2f} {rt * 1e3:>12.2f} "
+              f"| {legacy_memory(frames, cap) / 2**20:>8.2f} {ring.nbytes / 2**20:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Risk scoring: scalar compute_risk_scores per frame vs. vectorised columns.
+
+    python -m benchmarks.bench_risk_scoring
+
+First checks that score_columns/score_frames return exactly the scalar
+values on random frames, frames sitting on every threshold and cap, and
+frames with missing fields. Then times scoring a worker's history from its
+ColumnRing and ranking fleets of 100 to 10,000 workers by their latest
+frame.
+"""
+import random
+import time
+
+import numpy as np
+
+from safety_core.fleet import FleetStore
+from safety_core.ring_buffer import ColumnRing
+from safety_core.risk import compute_risk_scores, score_columns, score_frames
+
+from .common import sample_frame
+
+HISTORY = 300
+FLEET_SIZES = (100, 1000, 10000)
+REPEAT = 20
+
+
+def edge_frames():
+    frames = [{}, {"spo2": 100}, {"fall_detected": True}]
+    for field, values in (
+        ("body_temp", (37.5, 37.50001, 39.1, 39.2, 45.0)),
+        ("heart_rate", (100, 101, 158, 159, 220)),
+        ("spo2", (95, 94, 87, 86, 50)),
+        ("gas_ppm", (300, 300.1, 435, 436, 5000)),
+        ("radiation_uSvh", (0.5, 0.51, 1.083, 1.084, 10.0)),
+    ):
+        frames.extend({field: v} for v in values)
+    frames.append({
+        "body_temp": 45.0, "heart_rate": 220, "spo2": 50,
+        "gas_ppm": 5000, "radiation_uSvh": 10.0, "fall_detected": True,
+    })
+    return frames
+
+
+def check_parity(frames):
+    expected = np.array([compute_risk_scores(f) for f in frames]).T
+    got = np.array(score_frames(frames))
+    assert (expected == got).all(), "score_frames differs from compute_risk_scores"
+
+    ring = ColumnRing(len(frames))
+    for i, frame in enumerate(frames):
+        ring.append(frame, float(i))
+    got = np.array(score_columns(ring.tail()))
+    assert (expected == got).all(), "score_columns differs from compute_risk_scores"
+
+
+def per_call(fn, *args):
+    t = time.perf_counter()
+    for _ in range(REPEAT):
+        fn(*args)
+    return (time.perf_counter() - t) / REPEAT
+
+
+def main():
+    rng = random.Random(3)
+    frames = [sample_frame(rng) for _ in range(20000)] + edge_frames()
+    check_parity(frames)
+    print(f"parity: {len(frames)} frames identical (scalar, score_frames, score_columns)")
+
+    ring = ColumnRing(HISTORY)
+    for i, frame in enumerate(frames[:HISTORY]):
+        ring.append(frame, float(i))
+    scalar = per_call(lambda: [compute_risk_scores(f) for f in frames[:HISTORY]])
+    vector = per_call(lambda: score_columns(ring.tail()))
+    print(f"\nhistory of {HISTORY} frames: scalar {scalar * 1e3:.3f} ms, "
+          f"columns {vector * 1e3:.3f} ms ({scalar / vector:.0f}x)")
+
+    print(f"\n{'workers':>8} | {'scalar ms':>9} | {'ranking ms':>10} | {'speedup':>7}")
+    for n in FLEET_SIZES:
+        fleet = FleetStore(history_size=8)
+        for i in range(n):
+            fleet.ingest(f"W-{i:05d}", sample_frame(rng), received=0.0)
+        states = fleet.states()
+
+        def scalar_rank():
+            scored = [(compute_risk_scores(s.latest), s.worker_id) for s in states]
+            scored.sort(key=lambda item: -item[0][2])
+
+        scalar = per_call(scalar_rank)
+        vector = per_call(fleet.risk_ranking)
+        print(f"{n:>8} | {scalar * 1e3:>9.3f} | {vector * 1e3:>10.3f} | {scalar / vector:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Long-range trend charts: raw frames vs. rollup tiers + LTTB.
+
+    python -m benchmarks.bench_rollups
+
+Feeds a 12-hour shift at 1 Hz through Rollups.update, then builds the
+chart table for each trend span both from raw frames and from the
+rollups (thinned with LTTB). Reports rows sent to the chart, the Arrow
+payload size and the time to build the table.
+"""
+import random
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from safety_core.rollup import Rollups, downsample
+
+from .common import sample_frame
+
+SHIFT = 12 * 3600
+CHANNELS = ("body_temp", "heart_rate", "gas_ppm", "radiation_uSvh")
+SPANS = {"15 min": 900, "1 hour": 3600, "12 hours": SHIFT}
+MAX_POINTS = 300
+
+
+def arrow_bytes(df):
+    sink = pa.BufferOutputStream()
+    table = pa.Table.from_pandas(df)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().size
+
+
+def main():
+    rng = random.Random(11)
+    t0 = 1_700_000_000.0
+    frames = [sample_frame(rng) for _ in range(SHIFT)]
+    raw = pd.DataFrame(frames)[list(CHANNELS)]
+    raw.index = pd.to_datetime(t0 + np.arange(SHIFT), unit="s")
+
+    rollups = Rollups()
+    t = time.perf_counter()
+    for i, frame in enumerate(frames):
+        rollups.update(frame, t0 + i)
+    ingest = (time.perf_counter() - t) / SHIFT
+    print(f"rollup ingest: {ingest * 1e6:.2f} us/frame")
+
+    now = t0 + SHIFT
+    print(f"\n{'span':>9} | {'raw rows':>8} {'raw KiB':>8} | {'tier':>6} {'rows':>5} {'KiB':>6} {'build ms':>8}")
+    for label, span in SPANS.items():
+        window = raw.iloc[-span:]
+        t = time.perf_counter()
+        tier, data = rollups.series(span, now)
+        ts = data["timestamp"]
+        keep = downsample(ts, [data[f"{ch}_mean"] for ch in CHANNELS], MAX_POINTS)
+        df = pd.DataFrame(
+            {ch: data[f"{ch}_mean"][keep] for ch in CHANNELS},
+            index=pd.to_datetime(ts[keep], unit="s"),
+        )
+        build = time.perf_counter() - t
+        print(f"{label:>9} | {len(window):>8} {arrow_bytes(window) / 1024:>8.1f} | "
+              f"{tier:>6} {len(df):>5} {arrow_bytes(df) / 1024:>6.1f} {build * 1e3:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
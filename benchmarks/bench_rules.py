@@ -0,0 +1,75 @@
+"""
+Rule evaluation for a fleet tick: interpreted rules vs. the compiled table.
+
+    python -m benchmarks.bench_rules
+
+Each tick classifies the latest frame of every worker. "interpreted"
+walks the Rule objects and branches on their direction per frame (what a
+straightforward table lookup would do); "compiled" calls the generated
+RuleSet.classify once per frame; "columns" runs classify_columns over the
+whole fleet as arrays. All three are checked for identical levels first.
+"""
+import random
+import time
+
+import numpy as np
+
+from safety_core.rules import CRITICAL, NORMAL, RULES, WARNING
+
+from .common import sample_frame
+
+FLEET_SIZES = (100, 1000, 10000)
+TICKS = 20
+
+
+def interpreted(rules, frame):
+    levels = {}
+    for rule in rules.rules:
+        v = frame.get(rule.field)
+        if rule.direction == "flag":
+            level = CRITICAL if v and v == v else NORMAL
+        elif v is None:
+            level = NORMAL
+        elif rule.direction == "above":
+            level = CRITICAL if v > rule.critical else WARNING if v > rule.warning else NORMAL
+        else:
+            level = CRITICAL if v < rule.critical else WARNING if v < rule.warning else NORMAL
+        levels[rule.field] = level
+    return levels
+
+
+def as_columns(frames):
+    return {
+        field: np.array([np.nan if (v := f.get(field)) is None else v for f in frames])
+        for field in RULES.fields
+    }
+
+
+def per_tick(fn):
+    t = time.perf_counter()
+    for _ in range(TICKS):
+        fn()
+    return (time.perf_counter() - t) / TICKS
+
+
+def main():
+    rng = random.Random(5)
+    print(f"{'workers':>8} | {'interpreted ms':>14} | {'compiled ms':>11} | {'columns ms':>10}")
+    for n in FLEET_SIZES:
+        frames = [sample_frame(rng) for _ in range(n)]
+        columns = as_columns(frames)
+
+        by_frame = [RULES.classify(f) for f in frames]
+        assert by_frame == [interpreted(RULES, f) for f in frames]
+        vector = RULES.classify_columns(columns)
+        for field in RULES.fields:
+            assert [levels[field] for levels in by_frame] == vector[field].tolist()
+
+        slow = per_tick(lambda: [interpreted(RULES, f) for f in frames])
+        fast = per_tick(lambda: [RULES.classify(f) for f in frames])
+        cols = per_tick(lambda: RULES.classify_columns(columns))
+        print(f"{n:>8} | {slow * 1e3:>14.3f} | {fast * 1e3:>11.3f} | {cols * 1e3:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Statistics summary: rescanning the buffer vs. streaming accumulators.
+
+    python -m benchmarks.bench_running_stats
+
+The legacy summary ran mean()/max() over the whole buffer for four
+channels on every rerun. The streaming accumulators pay a fixed cost per
+frame at ingest and reading the summary is O(1) regardless of length.
+"""
+import json
+import time
+
+import pandas as pd
+
+from safety_core.stats import ShiftStats
+
+from .common import sample_payloads
+
+HISTORY_LENGTHS = (300, 3000, 21600, 100000)
+CHANNELS = ("body_temp", "heart_rate", "radiation_uSvh", "gas_ppm")
+READS = 200
+
+
+def main():
+    frames = [json.loads(p) for p in sample_payloads(max(HISTORY_LENGTHS))]
+    print(f"{'rows':>7} | {'rescan ms/read':>14} | {'stream us/frame':>15} {'stream us/read':>14}")
+    for n in HISTORY_LENGTHS:
+        df = pd.DataFrame(frames[:n])
+        t = time.perf_counter()
+        for _ in range(READS):
+            for ch in CHANNELS:
+                df[ch].mean()
+                df[ch].max()
+        rescan = (time.perf_counter() - t) / READS
+
+        stats = ShiftStats()
+        t0 = time.time()
+        t = time.perf_counter()
+        for i, frame in enumerate(frames[:n]):
+            stats.update(frame, t0 + 2 * i)
+        ingest = (time.perf_counter() - t) / n
+
+        t = time.perf_counter()
+        for _ in range(READS):
+            for label in (None, "5 min", "1 hour"):
+                view = stats.view(label)
+                for ch in CHANNELS:
+                    view[ch].mean
+                    view[ch].max
+        read = (time.perf_counter() - t) / READS
+        print(f"{n:>7} | {rescan * 1e3:>14.3f} | {ingest * 1e6:>15.2f} {read * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Per-session cost of MQTT ingestion: one client per session vs. shared hub.
+
+    python -m benchmarks.bench_shared_ingest
+
+The legacy layout builds one paho client and decodes every frame once per
+session. The shared hub decodes once and only pays a queue put per
+session, so per-session CPU and memory should stay flat as sessions grow.
+"""
+import json
+import tracemalloc
+from queue import Queue
+
+import paho.mqtt.client as mqtt
+
+from safety_core.mqtt_service import DATA_TOPIC, TelemetryHub
+
+from .common import sample_payloads, timed
+
+FRAMES = 2000
+SESSION_COUNTS = (1, 10, 40, 100)
+
+
+def legacy_ingest(payloads, queues):
+    for payload in payloads:
+        for q in queues:
+            q.put(json.loads(payload.decode()))
+    for q in queues:
+        while not q.empty():
+            q.get_nowait()
+
+
+def hub_ingest(payloads, hub, feeds):
+    for payload in payloads:
+        hub.dispatch(DATA_TOPIC, json.loads(payload.decode()))
+    for feed in feeds:
+        feed.data_queue.drain()
+
+
+def legacy_session_memory(n):
+    tracemalloc.start()
+    clients = [(mqtt.Client(), Queue(), Queue()) for _ in range(n)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del clients
+    return size / n
+
+
+def hub_session_memory(n):
+    hub = TelemetryHub()
+    tracemalloc.start()
+    feeds = [hub.subscribe() for _ in range(n)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del feeds
+    return size / n
+
+
+def main():
+    payloads = sample_payloads(FRAMES)
+    # Size the session queues so no frame is dropped and the comparison
+    # with the unbounded legacy queues stays like for like.
+    options = {"data_maxsize": FRAMES}
+    print(f"{FRAMES} frames per run; CPU is best of 3\n")
+    print(f"{'sessions':>8} | {'legacy us/frame/sess':>20} {'KiB/sess':>9} "
+          f"| {'hub us/frame/sess':>17} {'KiB/sess':>9}")
+    for n in SESSION_COUNTS:
+        queues = [Queue() for _ in range(n)]
+        _, legacy_cpu = timed(legacy_ingest, payloads, queues)
+
+        hub = TelemetryHub()
+        feeds = [hub.subscribe(**options) for _ in range(n)]
+        _, hub_cpu = timed(hub_ingest, payloads, hub, feeds)
+
+        per = 1e6 / (FRAMES * n)
+        print(f"{n:>8} | {legacy_cpu * per:>20.2f} {legacy_session_memory(n) / 1024:>9.1f} "
+              f"| {hub_cpu * per:>17.2f} {hub_session_memory(n) / 1024:>9.1f}")
+    print("\nLegacy sessions additionally hold one broker socket and one "
+          "network thread each; the hub holds one in total.")
+
+
+if __name__ == "__main__":
+    main()
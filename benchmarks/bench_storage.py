@@ -0,0 +1,128 @@
+"""
+On-disk telemetry store: write throughput and time-range query latency.
+
+    python -m benchmarks.bench_storage
+
+Writes frames from 100 workers through TelemetryStore.append (the path
+on_message takes), then loads a month of 1 Hz history for one worker and
+times one-hour queries against it. The "full scan" column reads every
+row of that worker and filters in memory, which is what a store without
+a time index would have to do. Data goes to a temporary directory.
+
+First checks that a store reopens after a crash: a segment cut off
+mid-record, one cut off before its header was complete, an empty one,
+and a torn last line in the alert log.
+"""
+import json
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from safety_core.storage import TelemetryStore
+
+from .common import sample_payloads
+
+WRITE_FRAMES = 200_000
+WRITE_WORKERS = 100
+MONTH_SECONDS = 30 * 24 * 3600
+QUERIES = 50
+
+
+def month_of_rows(dtype, start, rng):
+    rows = np.zeros(MONTH_SECONDS, dtype=dtype)
+    rows["timestamp"] = start + np.arange(MONTH_SECONDS, dtype=np.float64)
+    rows["body_temp"] = rng.uniform(36.2, 39.0, MONTH_SECONDS)
+    rows["heart_rate"] = rng.integers(60, 130, MONTH_SECONDS)
+    rows["gas_ppm"] = rng.uniform(50, 700, MONTH_SECONDS)
+    return rows
+
+
+def check_recovery(frames):
+    with tempfile.TemporaryDirectory() as root:
+        store = TelemetryStore(root, segment_rows=100)
+        for i in range(250):
+            store.append("W-001", frames[i], 1_700_000_000.0 + i)
+        store.append_alert({"worker_id": "W-001", "type": "HEAT"}, 1_700_000_000.0)
+        store.close()
+
+        log_dir = store._logs["W-001"].directory
+        last = sorted(n for n in os.listdir(log_dir) if n.endswith(".seg"))[-1]
+        path = os.path.join(log_dir, last)
+        os.truncate(path, os.path.getsize(path) - store.dtype.itemsize // 2)
+        open(os.path.join(log_dir, "00000003-1700000250000000.seg"), "wb").close()
+        with open(os.path.join(log_dir, "00000004-1700000251000000.seg"), "wb") as f:
+            f.write(b"WSSEG\x02")
+        with open(os.path.join(root, "alerts.jsonl"), "a") as f:
+            f.write('{"t": 1700000001.0, "worker_')
+
+        store = TelemetryStore(root, segment_rows=100)
+        rows = store.query("W-001")
+        assert len(rows) == 249 and rows["timestamp"][-1] == 1_700_000_000.0 + 248, len(rows)
+        assert len(store.query_alerts()) == 1
+        store.append("W-001", frames[0], 1_700_000_000.0 + 300)
+        store.append_alert({"worker_id": "W-001", "type": "GAS"}, 1_700_000_002.0)
+        assert len(store.query("W-001")) == 250
+        assert [a["type"] for a in store.query_alerts()] == ["HEAT", "GAS"]
+        store.close()
+        assert len(TelemetryStore(root).query("W-001")) == 250
+
+
+def main():
+    frames = [json.loads(p) for p in sample_payloads(5000)]
+    check_recovery(frames)
+    print("recovery: truncated, headerless and empty segments and a torn alert line reopen cleanly")
+    with tempfile.TemporaryDirectory() as root:
+        store = TelemetryStore(root)
+        t0 = time.time()
+        t = time.perf_counter()
+        for i in range(WRITE_FRAMES):
+            store.append(f"W-{i % WRITE_WORKERS:03d}", frames[i % len(frames)], t0 + i * 0.01)
+        store.flush()
+        elapsed = time.perf_counter() - t
+        print(f"append+flush: {WRITE_FRAMES / elapsed:,.0f} frames/s "
+              f"({elapsed / WRITE_FRAMES * 1e6:.2f} us/frame, {WRITE_WORKERS} workers)")
+        store.close()
+
+    with tempfile.TemporaryDirectory() as root:
+        store = TelemetryStore(root)
+        rng = np.random.default_rng(1)
+        start = 1_700_000_000.0
+        rows = month_of_rows(store.dtype, start, rng)
+        t = time.perf_counter()
+        store.extend("W-001", rows)
+        elapsed = time.perf_counter() - t
+        print(f"bulk extend: {len(rows):,} rows in {elapsed:.2f} s "
+              f"({rows.nbytes / elapsed / 2**20:.0f} MiB/s)")
+        store.close()
+
+        t = time.perf_counter()
+        store = TelemetryStore(root)
+        print(f"reopen and rebuild the time index: {(time.perf_counter() - t) * 1e3:.1f} ms "
+              f"({len(store._logs['W-001'].segments)} segments)")
+
+        picks = [start + random.Random(i).uniform(0, MONTH_SECONDS - 3600) for i in range(QUERIES)]
+        latencies = []
+        for a in picks:
+            t = time.perf_counter()
+            hour = store.query("W-001", a, a + 3600)
+            latencies.append(time.perf_counter() - t)
+            assert len(hour) == 3600 or len(hour) == 3601
+        latencies.sort()
+
+        t = time.perf_counter()
+        everything = store.query("W-001")
+        ts = everything["timestamp"]
+        everything[(ts >= picks[0]) & (ts <= picks[0] + 3600)]
+        scan = time.perf_counter() - t
+
+        print(f"one worker, one hour out of a month ({QUERIES} queries): "
+              f"p50 {latencies[len(latencies) // 2] * 1e3:.2f} ms, p95 {latencies[int(0.95 * len(latencies))] * 1e3:.2f} ms; "
+              f"full scan {scan * 1e3:.0f} ms")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
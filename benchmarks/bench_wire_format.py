@@ -0,0 +1,70 @@
+"""
+Wire formats: JSON frames vs. the fixed-layout binary frame.
+
+    python -m benchmarks.bench_wire_format
+
+Encodes the same frames both ways and reports the payload size, the
+broker bandwidth of a 10,000-device fleet publishing every 2 s, and the
+cost of FrameDecoder.decode_frame for each format (JSON with the stdlib
+parser and, when installed, orjson). Every binary frame is checked
+against its source frame.
+"""
+import json
+import random
+import time
+
+from safety_core import frames
+from safety_core.frames import FrameDecoder, encode_binary
+
+from .common import sample_frame
+
+FRAMES = 100_000
+FLEET = 10_000
+CADENCE = 2.0
+
+
+def decode_rate(payloads):
+    best = float("inf")
+    for _ in range(3):
+        decoder = FrameDecoder()
+        t = time.perf_counter()
+        for payload in payloads:
+            decoder.decode_frame(payload)
+        best = min(best, time.perf_counter() - t)
+    assert decoder.decoded == len(payloads)
+    return best / len(payloads)
+
+
+def main():
+    rng = random.Random(23)
+    source = [sample_frame(rng) for _ in range(FRAMES)]
+    as_json = [json.dumps(frame).encode() for frame in source]
+    as_binary = [encode_binary(frame) for frame in source]
+
+    decoder = FrameDecoder()
+    for frame, payload in zip(source, as_binary):
+        assert decoder.decode_frame(payload).as_dict() == frame
+
+    rows = []
+    default_loads = frames.loads
+    parsers = [("json", lambda p: json.loads(p.decode()))]
+    if frames.orjson is not None:
+        parsers.append(("orjson", frames.orjson.loads))
+    json_bytes = sum(map(len, as_json)) / FRAMES
+    for name, loads in parsers:
+        frames.loads = loads
+        try:
+            rows.append((f"JSON ({name})", json_bytes, decode_rate(as_json)))
+        finally:
+            frames.loads = default_loads
+    rows.append(("binary v1", sum(map(len, as_binary)) / FRAMES, decode_rate(as_binary)))
+
+    print(f"{FRAMES:,} frames; fleet of {FLEET:,} devices every {CADENCE:.0f} s\n")
+    print(f"{'format':>14} | {'bytes/frame':>11} {'fleet KiB/s':>11} | {'decode us':>9} {'frames/s':>10}")
+    for label, size, cost in rows:
+        print(f"{label:>14} | {size:>11.1f} {size * FLEET / CADENCE / 1024:>11.0f} | "
+              f"{cost * 1e6:>9.2f} {1 / cost:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
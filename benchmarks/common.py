@@ -0,0 +1,94 @@
+"""Shared helpers for the benchmark scripts."""
+import json
+import random
+import time
+from collections import Counter, defaultdict
+
+
+def sample_frame(rng=random):
+    return {
+        "body_temp": round(rng.uniform(36.2, 39.0), 2),
+        "heart_rate": rng.randint(60, 130),
+        "spo2": rng.randint(88, 100),
+        "gas_ppm": round(rng.uniform(50, 700), 1),
+        "radiation_uSvh": round(rng.uniform(0.05, 1.4), 3),
+        "radiation_cpm": rng.randint(5, 200),
+        "accel_x": round(rng.uniform(-1, 1), 3),
+        "accel_y": round(rng.uniform(-1, 1), 3),
+        "accel_z": round(rng.uniform(0, 2), 3),
+        "fall_detected": rng.random() < 0.01,
+    }
+
+
+def sample_payloads(n, seed=7):
+    rng = random.Random(seed)
+    return [json.dumps(sample_frame(rng)).encode() for _ in range(n)]
+
+
+class FakeMessage:
+    """Minimal stand-in for paho's MQTTMessage."""
+
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = payload
+
+
+def timed(fn, *args, repeat=3):
+    """Best-of-N wall and CPU time of fn(*args), in seconds."""
+    best_wall = best_cpu = float("inf")
+    for _ in range(repeat):
+        w0, c0 = time.perf_counter(), time.process_time()
+        fn(*args)
+        best_wall = min(best_wall, time.perf_counter() - w0)
+        best_cpu = min(best_cpu, time.process_time() - c0)
+    return best_wall, best_cpu
+
+
+def fleet_ticks(workers, seconds, hazard_rate=0.0, seed=5, interval=2.0, start=1.7e9):
+    """Virtual workers (``tools.synth``) as ticks of ``[(worker_id, t, frame)]``.
+
+    Also returns ``{(worker_id, field): [t, ...]}``, the times the
+    firmware would raise a threshold alert for each field.
+    """
+    from safety_core.rules import RULES
+    from tools.synth import ALERT_KINDS, VirtualWorker
+
+    rng = random.Random(seed)
+    fleet = [(rng.uniform(0, interval), VirtualWorker(f"W-{i:05d}", random.Random(rng.random()), hazard_rate))
+             for i in range(workers)]
+    ticks = []
+    alerts = defaultdict(list)
+    for k in range(int(seconds / interval)):
+        tick = []
+        for phase, worker in fleet:
+            t = start + k * interval + phase
+            frame, _ = worker.step(interval)
+            tick.append((worker.worker_id, t, frame))
+            for field in ALERT_KINDS:
+                rule = RULES[field]
+                if (frame[field] > rule.critical) if rule.direction == "above" else (frame[field] < rule.critical):
+                    alerts[(worker.worker_id, field)].append(t)
+        ticks.append(tick)
+    return ticks, alerts
+
+
+def warning_leads(alerts, warnings, fields, gap=600, lookback=900):
+    """How long before each incident's first threshold alert a warning came.
+
+    An incident starts with a threshold alert more than ``gap`` s after
+    the previous one. ``warnings`` maps ``(worker_id, field)`` to warning
+    times; one up to ``lookback`` s before the alert counts. Returns per
+    field a list of lead times in seconds and a ``Counter`` of misses.
+    """
+    found, missed = defaultdict(list), Counter()
+    for key, times in alerts.items():
+        if key[1] not in fields:
+            continue
+        onsets = [t for i, t in enumerate(times) if i == 0 or t - times[i - 1] > gap]
+        for onset in onsets:
+            early = [t for t in warnings.get(key, ()) if onset - lookback <= t <= onset + 60]
+            if early:
+                found[key[1]].append(onset - min(early))
+            else:
+                missed[key[1]] += 1
+    return found, missed
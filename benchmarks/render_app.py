@@ -0,0 +1,51 @@
+"""
+Dashboard entry point with a synthetic feed, used by bench_render_bytes.
+
+    streamlit run benchmarks/render_app.py
+
+Instead of connecting to the broker the hub dispatches a sample frame
+every BENCH_FRAME_INTERVAL seconds (0 disables data) and an alert every
+tenth frame.
+"""
+import os
+import random
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from safety_core import mqtt_service  # noqa: E402
+
+from benchmarks.common import sample_frame  # noqa: E402
+
+FRAME_INTERVAL = float(os.environ.get("BENCH_FRAME_INTERVAL", "2"))
+
+
+def synthetic_start(hub):
+    if getattr(hub, "_synthetic", False):
+        return
+    hub._synthetic = True
+    hub.connected = True
+    if FRAME_INTERVAL <= 0:
+        return
+
+    def publish():
+        rng = random.Random(1)
+        n = 0
+        while True:
+            time.sleep(FRAME_INTERVAL)
+            hub.dispatch(mqtt_service.DATA_TOPIC, sample_frame(rng))
+            n += 1
+            if n % 10 == 0:
+                hub.dispatch(mqtt_service.ALERT_TOPIC, {"gas_alert": "HIGH", "gas_ppm": 610})
+
+    threading.Thread(target=publish, daemon=True).start()
+
+
+mqtt_service.TelemetryHub.start = synthetic_start
+
+APP = os.path.join(ROOT, "wearable_suit_app.py")
+with open(APP) as f:
+    exec(compile(f.read(), APP, "exec"), {"__name__": "__main__", "__file__": APP})
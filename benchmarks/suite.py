@@ -0,0 +1,357 @@
+"""
+End-to-end benchmark suite with regression thresholds.
+
+    python -m benchmarks.suite                    # run and compare with baseline.json
+    python -m benchmarks.suite --update-baseline  # run and store the results as the baseline
+    python -m benchmarks.suite --tolerance 2      # allow 2x the baseline for every gated metric
+    python -m benchmarks.suite --repeat 5         # best of 5 runs instead of 3
+
+Drives the real code paths under controlled load, with traffic from the
+virtual workers of ``tools.synth``:
+
+* ingest: ``TelemetryHub.on_message`` per message (decode, fleet ingest,
+  risk, alert indexing and the fan-out to every session queue) for fleets
+  of 10 to 1,000 workers and 1 or 25 attached sessions.
+* broker: publish-to-session-queue latency through the local MQTT broker
+  stand-in (``tools.broker``) and a real paho connection, at 10x speed.
+* rerun: the data side of one dashboard fragment run (queue drains, the
+  history DataFrame, vectorised risk scores of the trend tail, statistics
+  summary, rollup series and an alert page) for history buffers of 300 to
+  21,600 frames.
+* memory: traced bytes per attached session, with sessions that keep up
+  and with sessions that have stalled and filled their queues.
+
+Streamlit's own element cost is covered by bench_render_bytes and
+bench_first_paint; nothing here needs a browser or a display.
+
+Every latency is reported as p50, p99 and max. The whole suite runs
+``REPEAT`` times and each metric keeps its best run, for the baseline as
+for the check: a scheduler hiccup or a busy neighbour on a shared host
+seldom hits the same metric in every run, while a real regression does.
+p50, p99 and the memory figures are compared with the stored baseline:
+the check fails (exit code 1) when one is above ``tolerance`` times its
+baseline and also above it by more than the noise floor of its unit.
+max is reported but not gated, since a single scheduler hiccup sets it.
+Baselines are machine-specific; regenerate them on the box that runs the
+check.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+from safety_core.fleet import FleetStore
+from safety_core.mqtt_service import TelemetryHub, parse_topic
+from safety_core.risk import RISK_FIELDS, score_columns
+from tools.broker import LocalBroker
+from tools.replay import BrokerSink, play
+from tools.synth import synthesize
+
+from .common import FakeMessage
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+INGEST_FLEETS = (10, 100, 1000)
+INGEST_SESSIONS = (1, 25)
+INGEST_MESSAGES = 20000
+BROKER_WORKERS = 100
+BROKER_SECONDS = 40  # of synthetic time, played at 10x
+RERUN_CASES = ((10, 300), (10, 3000), (10, 21600), (1000, 300))  # (fleet, buffer)
+RERUN_SESSIONS = 5
+RERUNS = 100
+MEMORY_SESSIONS = 50
+# Runs per invocation; every metric keeps its best
+REPEAT = 3
+
+# Gated statistic -> allowed ratio to the baseline
+TOLERANCE = {"p50": 1.5, "p99": 2.0, "kib": 1.25}
+# Differences below these never fail, whatever the ratio
+NOISE_FLOOR = {"us": 20.0, "ms": 0.5, "kib": 4.0}
+
+
+def percentiles(values):
+    values = sorted(values)
+    n = len(values)
+    return values[n // 2], values[min(n - 1, int(0.99 * n))], values[-1]
+
+
+def traffic(workers, messages, seed=0):
+    """At least ``messages`` synthetic messages from ``workers`` devices."""
+    ticks = -(-messages // workers)
+    return [(topic, payload) for _, topic, payload in
+            synthesize(workers, ticks * 2.0, 2.0, start=time.time(), seed=seed, hazard_rate=20.0)]
+
+
+# --------------------------------------------------
+# INGEST
+# --------------------------------------------------
+def ingest_case(workers, sessions):
+    messages = traffic(workers, INGEST_MESSAGES)
+    hub = TelemetryHub()
+    feeds = [hub.subscribe() for _ in range(sessions)]
+    on_message = hub.on_message
+    clock = time.perf_counter_ns
+    samples = []
+    for i, (topic, payload) in enumerate(messages):
+        msg = FakeMessage(topic, payload)
+        t0 = clock()
+        on_message(None, None, msg)
+        samples.append(clock() - t0)
+        # Sessions rerun roughly once per fleet tick
+        if i % workers == workers - 1:
+            for feed in feeds:
+                feed.data_queue.drain()
+                feed.alert_queue.drain()
+    return [ns / 1e3 for ns in samples]
+
+
+# --------------------------------------------------
+# BROKER ROUND TRIP
+# --------------------------------------------------
+def start_broker():
+    broker = LocalBroker(port=0)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(broker.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    return broker, loop, thread
+
+
+def stop_broker(broker, loop, thread):
+    loop.call_soon_threadsafe(broker.close)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    # Let the connection handlers see their sockets close before the loop goes
+    pending = asyncio.all_tasks(loop)
+    if pending:
+        loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+    loop.close()
+
+
+def broker_case():
+    broker, loop, thread = start_broker()
+    hub = TelemetryHub("127.0.0.1", broker.port)
+    feed = hub.subscribe()
+    arrivals = []
+    deliver = hub.on_message
+
+    def on_message(client, userdata, msg):
+        deliver(client, userdata, msg)
+        arrivals.append(time.perf_counter())
+
+    hub.on_message = on_message
+    hub.start()
+    sink = BrokerSink("127.0.0.1", broker.port)
+    sent = []
+
+    def timed_sink(topic, payload, t):
+        sent.append(time.perf_counter())
+        sink(topic, payload, t)
+
+    messages = list(synthesize(BROKER_WORKERS, BROKER_SECONDS, 2.0, start=time.time(), hazard_rate=20.0))
+    try:
+        time.sleep(0.5)  # let both clients finish CONNECT/SUBSCRIBE
+        play(messages, timed_sink, speed=10.0)
+        deadline = time.monotonic() + 5
+        while len(arrivals) < len(sent) and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        sink.close()
+        hub.stop()
+        stop_broker(broker, loop, thread)
+    feed.data_queue.drain()
+    if len(arrivals) != len(sent):
+        raise RuntimeError(f"broker delivered {len(arrivals)} of {len(sent)} messages")
+    # QoS 0 over one connection each way keeps publish order
+    return [(a - s) * 1e3 for s, a in zip(sent, arrivals)]
+
+
+# --------------------------------------------------
+# DASHBOARD RERUN (DATA SIDE)
+# --------------------------------------------------
+def session_rerun(hub, feed, worker_id):
+    """What live_updates computes before it draws anything."""
+    feed.data_queue.drain()
+    feed.alert_queue.drain()
+    hub.fleet.worker_ids()
+    hub.episodes.sweep(time.time())
+    worker = hub.fleet.get(worker_id)
+    history_df = worker.history.frame()
+    tail = history_df.tail(80)
+    score_columns({name: tail[name].to_numpy() for name, _ in RISK_FIELDS})
+    worker.stats.view(None)
+    worker.rollups.series(60 * 60, time.time())
+    hub.alerts.search(limit=6)
+    hub.queue_stats()
+
+
+def rerun_case(workers, buffer):
+    hub = TelemetryHub(fleet=FleetStore(history_size=buffer))
+    # Fill the watched worker's history so the rerun sees a full buffer;
+    # the rest of the fleet only adds live traffic
+    start = time.time() - buffer * 2.0
+    for t, topic, payload in synthesize(1, buffer * 2.0, 2.0, start=start, seed=1):
+        worker_id, kind = parse_topic(topic)
+        if kind == "data":
+            hub.fleet.ingest(worker_id, json.loads(payload), t)
+    feeds = [hub.subscribe() for _ in range(RERUN_SESSIONS)]
+    watched = hub.fleet.worker_ids()[0]  # W-000, also first in the live traffic
+    ticks = iter(traffic(workers, workers * RERUNS, seed=2))
+    samples = []
+    for _ in range(RERUNS):
+        for _ in range(workers):
+            topic, payload = next(ticks)
+            hub.on_message(None, None, FakeMessage(topic, payload))
+        for feed in feeds:
+            t0 = time.perf_counter()
+            session_rerun(hub, feed, watched)
+            samples.append((time.perf_counter() - t0) * 1e3)
+    return samples
+
+
+# --------------------------------------------------
+# MEMORY PER SESSION
+# --------------------------------------------------
+def memory_case(stalled):
+    messages = traffic(BROKER_WORKERS, 5000, seed=3)
+    hub = TelemetryHub()
+    for topic, payload in messages[:1000]:
+        hub.on_message(None, None, FakeMessage(topic, payload))
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    feeds = [hub.subscribe() for _ in range(MEMORY_SESSIONS)]
+    for i, (topic, payload) in enumerate(messages[1000:]):
+        hub.on_message(None, None, FakeMessage(topic, payload))
+        if not stalled and i % BROKER_WORKERS == 0:
+            for feed in feeds:
+                feed.data_queue.drain()
+                feed.alert_queue.drain()
+    # Without sessions the same traffic still grows the fleet and indexes
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    shared = memory_without_sessions(messages)
+    return (after - before - shared) / MEMORY_SESSIONS / 1024
+
+
+def memory_without_sessions(messages):
+    hub = TelemetryHub()
+    for topic, payload in messages[:1000]:
+        hub.on_message(None, None, FakeMessage(topic, payload))
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for topic, payload in messages[1000:]:
+        hub.on_message(None, None, FakeMessage(topic, payload))
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return after - before
+
+
+# --------------------------------------------------
+# RUN, REPORT, COMPARE
+# --------------------------------------------------
+def run():
+    """Every metric, keyed ``section.case.stat_unit``; lower is better."""
+    results = {}
+
+    def record(name, samples, unit):
+        p50, p99, peak = percentiles(samples)
+        results[f"{name}.p50_{unit}"] = p50
+        results[f"{name}.p99_{unit}"] = p99
+        results[f"{name}.max_{unit}"] = peak
+        print(f"  {name:<32} p50 {p50:>9.2f}  p99 {p99:>9.2f}  max {peak:>9.2f} {unit}")
+
+    print("ingest latency per message (on_message)")
+    for workers in INGEST_FLEETS:
+        for sessions in INGEST_SESSIONS:
+            record(f"ingest.fleet{workers}.sessions{sessions}", ingest_case(workers, sessions), "us")
+
+    print("publish to session queue through the local broker")
+    record(f"broker.fleet{BROKER_WORKERS}", broker_case(), "ms")
+
+    print(f"rerun duration, data side ({RERUN_SESSIONS} sessions)")
+    for workers, buffer in RERUN_CASES:
+        record(f"rerun.fleet{workers}.buffer{buffer}", rerun_case(workers, buffer), "ms")
+
+    print(f"memory per session ({MEMORY_SESSIONS} sessions)")
+    for label, stalled in (("drained", False), ("stalled", True)):
+        kib = memory_case(stalled)
+        results[f"memory.{label}.session_kib"] = kib
+        print(f"  {'memory.' + label:<32} {kib:>9.1f} KiB")
+    return results
+
+
+def gate(name):
+    """``(ratio, floor)`` for a gated metric, ``None`` for report-only."""
+    stat_unit = name.rsplit(".", 1)[1]
+    stat, unit = stat_unit.split("_")
+    if stat == "max":
+        return None
+    if unit == "kib":
+        return TOLERANCE["kib"], NOISE_FLOOR["kib"]
+    return TOLERANCE[stat], NOISE_FLOOR[unit]
+
+
+def compare(results, baseline, tolerance=None):
+    """Print the comparison; return the names of regressed metrics."""
+    regressed = []
+    print(f"\n{'metric':<48} {'baseline':>10} {'now':>10} {'ratio':>6}")
+    for name, value in results.items():
+        base = baseline.get(name)
+        limits = gate(name)
+        if base is None or limits is None:
+            continue
+        ratio, floor = limits
+        ratio = tolerance or ratio
+        bad = value > base * ratio and value - base > floor
+        if bad:
+            regressed.append(name)
+        print(f"{name:<48} {base:>10.2f} {value:>10.2f} {value / base if base else 0:>6.2f}"
+              f"{'  REGRESSED' if bad else ''}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark suite with regression thresholds.")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--tolerance", type=float, help="allowed ratio to the baseline for every gated metric")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="runs to take the best of")
+    args = parser.parse_args()
+
+    runs = []
+    for i in range(args.repeat):
+        print(f"run {i + 1} of {args.repeat}")
+        runs.append(run())
+    results = {name: min(r[name] for r in runs) for name in runs[0]}
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "recorded": datetime.now().isoformat(timespec="seconds"),
+                "machine": f"{platform.machine()} {platform.processor() or ''}".strip(),
+                "python": platform.python_version(),
+                "repeat": args.repeat,
+                "metrics": {name: round(value, 3) for name, value in results.items()},
+            }, f, indent=2)
+            f.write("\n")
+        print(f"\nbaseline written to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"\nno baseline at {args.baseline}; run with --update-baseline first")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)["metrics"]
+    regressed = compare(results, baseline, args.tolerance)
+    if regressed:
+        print(f"\n{len(regressed)} metric(s) regressed against the baseline")
+        sys.exit(1)
+    print("\nno regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""
+Backend pieces of the Industrial Worker Safety dashboard.
+
+Everything in here is independent of Streamlit so it can be shared across
+sessions, driven from benchmarks, or reused by other front-ends.
+"""
@@ -0,0 +1,239 @@
+"""
+Searchable index over every alert the hub has seen.
+
+Each alert gets a sequential ID. Its facets (receive time, worker, alert
+type and severity) are stored in growable NumPy columns, and the words
+of its keys and values go into posting lists (token -> IDs).
+
+A search runs in four steps:
+1. Intersect the posting lists of every query term.
+2. Select the time range with a binary search.
+3. Narrow the candidates with facet masks.
+4. Return one page, newest first.
+Keyword matching never scans the alerts. A term matches every token it
+is a prefix of ("ga" finds "gas"), found by binary search in the sorted
+vocabulary.
+"""
+import re
+import threading
+from array import array
+from bisect import bisect_left, insort
+
+import numpy as np
+
+from .rules import LEVEL_NAMES, RULES, WARNING, worst
+
+TOKEN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+
+
+def tokenize(text):
+    return TOKEN.findall(str(text).lower())
+
+
+def alert_type(alert):
+    """"gas" for ``{"gas_alert": ...}``; "other" when no ``*_alert`` key."""
+    for key in alert:
+        if key.endswith("_alert"):
+            return key[:-len("_alert")]
+    return "other"
+
+
+def alert_severity(alert):
+    """An explicit ``severity`` field, else the worst rule level of the
+    alert's readings. Anything raised as an alert is at least WARNING."""
+    severity = str(alert.get("severity", "")).upper()
+    if severity in LEVEL_NAMES:
+        return LEVEL_NAMES.index(severity)
+    return max(WARNING, worst(RULES.classify(alert)))
+
+
+class _Column:
+    """Append-only NumPy column; readers slice a consistent prefix."""
+
+    __slots__ = ("data", "size")
+
+    def __init__(self, dtype, capacity=1024):
+        self.data = np.empty(capacity, dtype=dtype)
+        self.size = 0
+
+    def append(self, value):
+        if self.size == len(self.data):
+            grown = np.empty(2 * len(self.data), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size] = value
+        self.size += 1
+
+
+class _Codes:
+    """Interns facet values as small integers."""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class AlertIndex:
+    """Inverted index plus facet columns over alert dicts."""
+
+    def __init__(self):
+        self._alerts = []
+        self._t = _Column(np.float64)
+        self._worker = _Column(np.int32)
+        self._type = _Column(np.int16)
+        self._severity = _Column(np.int8)
+        self._workers = _Codes()
+        self._types = _Codes()
+        self._postings = {}
+        self._vocab = []
+        self._sorted = True
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._alerts)
+
+    def add(self, alert, timestamp):
+        """Index one alert dict received at ``timestamp`` (epoch seconds)."""
+        tokens = set()
+        for key, value in alert.items():
+            if key in ("t", "ts", "time"):
+                continue
+            tokens.update(tokenize(key))
+            tokens.update(tokenize(value))
+        worker = alert.get("worker_id", "")
+        kind = alert_type(alert)
+        severity = alert_severity(alert)
+        with self._lock:
+            alert_id = len(self._alerts)
+            if self._t.size and timestamp < self._t.data[self._t.size - 1]:
+                self._sorted = False
+            self._alerts.append(alert)
+            self._t.append(timestamp)
+            self._worker.append(self._workers.code(worker))
+            self._type.append(self._types.code(kind))
+            self._severity.append(severity)
+            for token in tokens:
+                posting = self._postings.get(token)
+                if posting is None:
+                    posting = self._postings[token] = array("I")
+                    insort(self._vocab, token)
+                posting.append(alert_id)
+        return alert_id
+
+    # --------------------------------------------------
+    # QUERIES
+    # --------------------------------------------------
+    def facets(self):
+        """Known workers, alert types and severities."""
+        with self._lock:
+            return list(self._workers.values), list(self._types.values), list(LEVEL_NAMES[WARNING:])
+
+    def _postings_for(self, term, n):
+        # Posting lists of every token starting with ``term``, cut to the
+        # first ``n`` alerts. These are views: use them under the lock.
+        vocab = self._vocab
+        lists = []
+        i = bisect_left(vocab, term)
+        while i < len(vocab) and vocab[i].startswith(term):
+            posting = np.frombuffer(self._postings[vocab[i]], dtype=np.uint32)
+            lists.append(posting[:np.searchsorted(posting, n)])
+            i += 1
+        return lists
+
+    def _match(self, terms, n):
+        # IDs matching every term. The term with the fewest postings is
+        # expanded; the others are probed by binary search when the
+        # candidates are few, so a short prefix like "w" never walks its
+        # huge posting lists.
+        per_term = sorted((self._postings_for(term, n) for term in terms),
+                          key=lambda lists: sum(map(len, lists)))
+        first = per_term[0]
+        if not first:
+            return np.empty(0, dtype=np.int64)
+        if len(first) == 1:
+            ids = first[0].astype(np.int64)
+        else:
+            hit = np.zeros(n, dtype=bool)
+            for posting in first:
+                hit[posting] = True
+            ids = np.flatnonzero(hit)
+        for lists in per_term[1:]:
+            if 16 * len(ids) > sum(map(len, lists)):
+                # Comparable sizes: one bitmap pass beats binary searches
+                hit = np.zeros(n, dtype=bool)
+                for posting in lists:
+                    hit[posting] = True
+                ids = ids[hit[ids]]
+                continue
+            found = np.zeros(len(ids), dtype=bool)
+            for posting in lists:
+                at = np.searchsorted(posting, ids).clip(max=len(posting) - 1)
+                found |= posting[at] == ids
+            ids = ids[found]
+        return ids
+
+    def search(self, text="", worker=None, kind=None, severity=None,
+               start=None, end=None, offset=0, limit=20):
+        """Matching alerts, newest first.
+
+        ``worker``, ``kind`` and ``severity`` (a level name) are exact
+        facets; ``start``/``end`` bound the receive time. Every word of
+        ``text`` must match. Returns ``(total, page)`` where ``page`` holds
+        at most ``limit`` alerts starting ``offset`` results in.
+        """
+        terms = tokenize(text)
+        with self._lock:
+            n = len(self._alerts)
+            t = self._t.data[:n]
+            workers = self._worker.data[:n]
+            types = self._type.data[:n]
+            severities = self._severity.data[:n]
+            worker_code = self._workers.codes.get(worker) if worker is not None else None
+            type_code = self._types.codes.get(kind) if kind is not None else None
+            matched = self._match(terms, n) if terms else None
+            is_sorted = self._sorted
+            alerts = self._alerts
+
+        if (worker is not None and worker_code is None) or (kind is not None and type_code is None):
+            return 0, []
+
+        # Time bounds and facets become one mask over the alerts in [lo, hi)
+        conditions = []
+        if is_sorted:
+            lo = 0 if start is None else int(np.searchsorted(t, start, "left"))
+            hi = n if end is None else int(np.searchsorted(t, end, "right"))
+        else:
+            lo, hi = 0, n
+            if start is not None:
+                conditions.append(t >= start)
+            if end is not None:
+                conditions.append(t <= end)
+        if worker_code is not None:
+            conditions.append(workers[lo:hi] == worker_code)
+        if type_code is not None:
+            conditions.append(types[lo:hi] == type_code)
+        if severity is not None:
+            conditions.append(severities[lo:hi] == LEVEL_NAMES.index(severity))
+        keep = None
+        for condition in conditions:
+            keep = condition if keep is None else keep & condition
+
+        if matched is not None:
+            ids = matched[(matched >= lo) & (matched < hi)]
+            if keep is not None:
+                ids = ids[keep[ids - lo]]
+        elif keep is not None:
+            ids = lo + np.flatnonzero(keep)
+        else:
+            ids = np.arange(lo, hi)
+
+        total = len(ids)
+        page = ids[::-1][offset:offset + limit]
+        return total, [alerts[i] for i in page]
@@ -0,0 +1,124 @@
+"""
+Streaming anomaly detection on vitals and environment channels.
+
+Fixed thresholds only fire once a reading crosses the line, so gradual
+heat stress or a slow gas drift goes unnoticed until it is already
+serious. ``AnomalyDetector`` keeps, for every worker and each channel in
+``CHANNELS``:
+
+* an EWMA baseline (mean and variance, time constant ``TAU`` s) and the
+  z-score of each new sample against it. ``|z| > Z_LIMIT`` is a jump;
+* a two-sided CUSUM of those z-scores with slack ``CUSUM_K``, which
+  crosses ``CUSUM_H`` when the readings keep leaning the same way. That
+  is a drift far below ``Z_LIMIT`` per sample.
+
+Only the hazardous side of each channel raises an event, as given by
+the channel's rule (``above``: rising, ``below``: falling). An event is
+raised when a channel turns anomalous. The channel stays anomalous, and
+silent, until the z-score and both sums have fallen back. Samples
+beyond ``Z_LIMIT`` enter the baseline clipped, so a hazard does not
+become the new normal within a few frames. Nothing fires during the
+first ``WARMUP`` samples of a channel, while the baseline forms.
+
+All state lives in (workers x channels) NumPy arrays, about 200 bytes
+per worker, and is updated for the whole fleet at once (see
+``safety_core.fleet_arrays``).
+"""
+import numpy as np
+
+from .fleet_arrays import FleetArrays
+from .rules import RULES
+
+CHANNELS = ("body_temp", "heart_rate", "spo2", "gas_ppm", "radiation_uSvh")
+# Floor for the baseline's standard deviation. A steady channel (or an
+# integer one such as SpO2) would otherwise turn noise into huge z-scores;
+# for body temperature and heart rate it is about the swing between rest
+# and work, so ordinary exertion does not read as an anomaly.
+MIN_STD = {"body_temp": 0.2, "heart_rate": 12.0, "spo2": 1.0, "gas_ppm": 10.0, "radiation_uSvh": 0.05}
+TAU = 900.0
+WARMUP = 30
+Z_LIMIT = 4.0
+Z_CLEAR = 1.0
+CUSUM_K = 1.5
+CUSUM_H = 10.0
+# How long a single gap may stretch the baseline's memory, in seconds
+MAX_GAP = 3600.0
+LABELS = {"body_temp": "Body temperature", "heart_rate": "Heart rate", "spo2": "Blood oxygen",
+          "gas_ppm": "Gas level", "radiation_uSvh": "Radiation"}
+
+
+class AnomalyDetector(FleetArrays):
+    """EWMA and CUSUM detectors for every channel of every worker.
+
+    ``step`` returns events as ``(worker_id, t, channel, value, baseline,
+    z, detector)`` tuples, with ``detector`` either "ewma" (a jump) or
+    "cusum" (a drift). ``samples`` and ``events`` count work done.
+    """
+
+    ARRAYS = (("mean", np.float64, 0.0), ("var", np.float64, 0.0), ("high", np.float64, 0.0),
+              ("low", np.float64, 0.0), ("count", np.int32, 0), ("active", np.bool_, False))
+
+    def __init__(self, channels=CHANNELS, capacity=64):
+        super().__init__(channels, capacity)
+        self.min_var = np.array([MIN_STD[ch] for ch in self.channels]) ** 2
+        self.rising = np.array([RULES[ch].direction == "above" for ch in self.channels])
+        self.falling = ~self.rising
+        self.events = 0
+
+    def step(self):
+        """Run every queued sample through the detectors; returns the events."""
+        events = super().step()
+        self.events += len(events)
+        return events
+
+    def _update(self, rows, t, x):
+        valid = ~np.isnan(x)
+        mean, var, count = self.mean[rows], self.var[rows], self.count[rows]
+        std = np.sqrt(np.maximum(var, self.min_var))
+        z = np.where(valid, (x - mean) / std, 0.0)
+        warmed = count >= WARMUP
+        warm = valid & warmed
+
+        # CUSUM of the clipped z-score; a lone spike adds at most Z_LIMIT.
+        # A channel missing from a frame keeps its sums and state; they
+        # are only held at zero during warm-up.
+        zc = np.clip(z, -Z_LIMIT, Z_LIMIT)
+        high, low = np.where(warmed, self.high[rows], 0.0), np.where(warmed, self.low[rows], 0.0)
+        high = np.where(warm, np.minimum(np.maximum(0.0, high + zc - CUSUM_K), 2 * CUSUM_H), high)
+        low = np.where(warm, np.minimum(np.maximum(0.0, low - zc - CUSUM_K), 2 * CUSUM_H), low)
+        jump = warm & (((z > Z_LIMIT) & self.rising) | ((z < -Z_LIMIT) & self.falling))
+        drift = warm & (((high > CUSUM_H) & self.rising) | ((low > CUSUM_H) & self.falling))
+        fire = jump | drift
+        was_active = self.active[rows]
+        settled = (np.abs(z) < Z_CLEAR) & (high < CUSUM_H / 2) & (low < CUSUM_H / 2)
+        self.active[rows] = np.where(valid, fire | (was_active & ~settled), was_active)
+        self.high[rows], self.low[rows] = high, low
+
+        # Baseline: the first sample seeds it, warm-up averages evenly,
+        # then an EWMA with a time-based weight
+        dt = np.clip(t - self.last_t[rows], 0.0, MAX_GAP)[:, None]
+        alpha = np.where(np.isnan(dt), 1.0, -np.expm1(-dt / TAU))
+        alpha = np.maximum(alpha, 1.0 / (count + 1))
+        target = np.where(count >= WARMUP, np.clip(x, mean - Z_LIMIT * std, mean + Z_LIMIT * std), x)
+        diff = target - mean
+        self.mean[rows] = np.where(valid, mean + alpha * diff, mean)
+        self.var[rows] = np.where(valid, (1 - alpha) * (var + alpha * diff * diff), var)
+        self.count[rows] = count + valid
+        self.last_t[rows] = t
+
+        new = fire & ~was_active
+        if not new.any():
+            return []
+        events = []
+        for i, c in zip(*np.nonzero(new)):
+            events.append((self.worker_ids[rows[i]], float(t[i]), self.channels[c], float(x[i, c]),
+                           float(mean[i, c]), float(z[i, c]), "ewma" if jump[i, c] else "cusum"))
+        return events
+
+    def baseline(self, worker_id):
+        """``{channel: (mean, std, samples)}`` for one worker, or ``{}``."""
+        row = self.rows.get(worker_id)
+        if row is None:
+            return {}
+        return {ch: (float(self.mean[row, c]), float(np.sqrt(self.var[row, c])), int(self.count[row, c]))
+                for c, ch in enumerate(self.channels)}
@@ -0,0 +1,132 @@
+"""
+Alert episodes: repeated alerts folded into one record per incident.
+
+A sustained hazard makes a device publish the same alert again and
+again. The hub feeds every alert through an ``EpisodeTracker`` instead of
+keeping each message for display. Each (worker, alert type) pair has at
+most one open episode. It records start and end time, the number of
+alerts, the peak reading and the worst severity. Updating it costs one
+dict lookup and a few field writes.
+
+Flapping is debounced with a time hysteresis. The first alert opens an
+episode at once, but the episode only closes after ``clear_after``
+seconds without a repeat, so a reading that hovers around its threshold
+stays one episode. Closed episodes move to a bounded history. The raw
+alerts are still persisted and indexed, so nothing is lost.
+"""
+import threading
+from collections import deque
+
+from .alert_index import alert_severity, alert_type
+from .rules import CRITICAL, RULES
+
+CLEAR_AFTER = 30.0
+HISTORY_SIZE = 1000
+
+
+def _number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def alert_reading(alert):
+    """``(field, value)`` of the reading an alert carries, or ``(None, None)``.
+
+    Rule fields win over a generic ``value`` key.
+    """
+    for key, value in alert.items():
+        if key in RULES and RULES[key].direction != "flag" and _number(value):
+            return key, value
+    value = alert.get("value")
+    if _number(value):
+        return "value", value
+    return None, None
+
+
+class Episode:
+    """One incident: consecutive alerts of one type from one worker."""
+
+    __slots__ = ("worker_id", "kind", "start", "end", "count", "severity", "field", "peak", "last", "open")
+
+    def __init__(self, worker_id, kind, alert, t):
+        self.worker_id = worker_id
+        self.kind = kind
+        self.start = self.end = t
+        self.count = 0
+        self.severity = 0
+        self.field = self.peak = None
+        self.last = alert
+        self.open = True
+        self.add(alert, t)
+
+    def add(self, alert, t):
+        self.end = max(self.end, t)
+        self.count += 1
+        self.last = alert
+        if self.severity < CRITICAL:
+            self.severity = max(self.severity, alert_severity(alert))
+        field, value = alert_reading(alert)
+        if field is None:
+            return
+        if self.peak is None or field != self.field:
+            self.field, self.peak = field, value
+        elif field in RULES and RULES[field].direction == "below":
+            self.peak = min(self.peak, value)
+        else:
+            self.peak = max(self.peak, value)
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+
+class EpisodeTracker:
+    """Open episodes keyed by ``(worker_id, kind)`` plus recent closed ones.
+
+    ``version`` increases whenever an episode opens or closes, so readers
+    can tell when a summary has to be redrawn; repeats inside an open
+    episode only touch its counters.
+    """
+
+    def __init__(self, clear_after=CLEAR_AFTER, history_size=HISTORY_SIZE):
+        self.clear_after = clear_after
+        self.open = {}
+        self.closed = deque(maxlen=history_size)
+        self.total = 0
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def observe(self, alert, t):
+        """Fold one alert received at ``t`` into its episode and return it."""
+        key = (alert.get("worker_id", ""), alert_type(alert))
+        with self._lock:
+            episode = self.open.get(key)
+            if episode is not None and t - episode.end > self.clear_after:
+                self._close(key, episode)
+                episode = None
+            if episode is None:
+                episode = self.open[key] = Episode(key[0], key[1], alert, t)
+                self.total += 1
+                self.version += 1
+            else:
+                episode.add(alert, t)
+            return episode
+
+    def sweep(self, now):
+        """Close episodes that have been quiet for ``clear_after`` seconds."""
+        with self._lock:
+            stale = [(key, ep) for key, ep in self.open.items() if now - ep.end > self.clear_after]
+            for key, episode in stale:
+                self._close(key, episode)
+        return len(stale)
+
+    def _close(self, key, episode):
+        del self.open[key]
+        episode.open = False
+        self.closed.append(episode)
+        self.version += 1
+
+    def snapshot(self):
+        """Open episodes (newest first) followed by closed ones (newest first)."""
+        with self._lock:
+            active = sorted(self.open.values(), key=lambda ep: ep.start, reverse=True)
+            return active + list(reversed(self.closed))
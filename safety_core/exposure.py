@@ -0,0 +1,157 @@
+"""
+Cumulative exposure: shift radiation dose and 8-hour gas TWA.
+
+Regulatory limits are cumulative, not instantaneous. Each worker has an
+``ExposureAccount`` that integrates the channels in ``LIMITS`` over the
+actual interval between consecutive readings (trapezoid rule):
+
+* ``radiation_uSvh``: µSv/h over hours is the dose in µSv, held against
+  a per-shift dose budget.
+* ``gas_ppm``: ppm-hours divided by 8 h is the 8-hour time-weighted
+  average, as occupational limits define it: the shift's exposure over
+  an 8-hour reference period, whatever the shift's actual length.
+
+The account is fed from ``WorkerState.record``, in event-time order.
+Each frame costs O(1) and a few floats per channel, and history is
+never read back. An interval longer than ``MAX_GAP`` (device offline or
+out of range) is not integrated but counted as unmeasured time, so the
+figure can say how much of the shift it covers. A break longer than
+``SHIFT_BREAK`` starts a new shift; the dose to date runs on across
+shifts.
+
+Projections use the rate smoothed over ``RATE_TAU`` s: how long until
+the budget is spent at that rate, and where the shift ends up after
+``SHIFT_HOURS``.
+
+``state()`` and ``restore()`` turn an account into plain lists for the
+hub's checkpoint (see ``TelemetryHub.checkpoint``).
+"""
+import math
+from collections import namedtuple
+
+# label, unit, limit, averaging hours (None: a plain running total)
+Limit = namedtuple("Limit", "label unit limit hours")
+LIMITS = {
+    # Site dose constraint: 1 mSv a year spread over 250 shifts
+    "radiation_uSvh": Limit("Shift dose", "µSv", 4.0, None),
+    "gas_ppm": Limit("8-h TWA", "ppm", 200.0, 8.0),
+}
+SHIFT_HOURS = 8.0
+# Longest interval still integrated, in seconds
+MAX_GAP = 60.0
+# A pause this long, in seconds, ends the shift
+SHIFT_BREAK = 4 * 3600.0
+RATE_TAU = 300.0
+
+# value: dose or TWA so far, used: share of the budget, rate: smoothed
+# reading, left: seconds until the budget is spent at that rate (None
+# when the rate is zero), projected: value at the end of the shift
+Budget = namedtuple("Budget", "value limit used rate left projected")
+
+
+class ChannelExposure:
+    """Running integral of one channel, in reading x hours."""
+
+    __slots__ = ("integral", "total", "unmeasured", "last_t", "last", "rate")
+
+    def __init__(self):
+        self.integral = 0.0
+        self.total = 0.0
+        self.unmeasured = 0.0
+        self.last_t = None
+        self.last = None
+        self.rate = None
+
+    def update(self, t, x):
+        if self.last_t is not None:
+            dt = t - self.last_t
+            if dt > MAX_GAP:
+                self.unmeasured += dt
+            elif dt > 0:
+                area = 0.5 * (self.last + x) * dt / 3600
+                self.integral += area
+                self.total += area
+            alpha = -math.expm1(-max(dt, 0.0) / RATE_TAU)
+            self.rate += alpha * (x - self.rate)
+        else:
+            self.rate = x
+        self.last_t = t
+        self.last = x
+
+    def new_shift(self):
+        self.integral = 0.0
+        self.unmeasured = 0.0
+        self.last_t = None
+
+
+class ExposureAccount:
+    """Shift exposure of one worker for every channel in ``LIMITS``.
+
+    ``shift_start`` is the event time of the shift's first frame and
+    ``last_t`` that of the latest one.
+    """
+
+    __slots__ = ("channels", "shift_start", "last_t", "shifts")
+
+    def __init__(self):
+        self.channels = {field: ChannelExposure() for field in LIMITS}
+        self.shift_start = None
+        self.last_t = None
+        self.shifts = 0
+
+    def update(self, frame, t):
+        if self.last_t is None or t - self.last_t > SHIFT_BREAK:
+            for channel in self.channels.values():
+                channel.new_shift()
+            self.shift_start = t
+            self.shifts += 1
+        for field, channel in self.channels.items():
+            x = frame.get(field)
+            if x is None or x != x:
+                continue
+            channel.update(t, x)
+        self.last_t = t
+
+    @property
+    def elapsed(self):
+        """Seconds since the start of the shift, up to the latest frame."""
+        return 0.0 if self.shift_start is None else self.last_t - self.shift_start
+
+    def unmeasured(self, field):
+        return self.channels[field].unmeasured
+
+    def total(self, field):
+        """Reading x hours to date, across shifts (e.g. µSv of dose)."""
+        return self.channels[field].total
+
+    def budget(self, field):
+        """``Budget`` of one channel for the current shift."""
+        limit = LIMITS[field]
+        channel = self.channels[field]
+        hours = limit.hours or 1.0
+        value = channel.integral / hours
+        rate = channel.rate or 0.0
+        remaining = limit.limit * hours - channel.integral
+        if remaining <= 0:
+            left = 0.0
+        else:
+            left = remaining / rate * 3600 if rate > 0 else None
+        shift_left = max(0.0, SHIFT_HOURS - self.elapsed / 3600)
+        projected = value + rate * shift_left / hours
+        return Budget(value, limit.limit, value / limit.limit, rate, left, projected)
+
+    # --------------------------------------------------
+    # CHECKPOINTS
+    # --------------------------------------------------
+    def state(self):
+        return [self.shift_start, self.last_t, self.shifts,
+                {field: [c.integral, c.total, c.unmeasured, c.last_t, c.last, c.rate]
+                 for field, c in self.channels.items()}]
+
+    def restore(self, state):
+        self.shift_start, self.last_t, self.shifts, channels = state
+        for field, values in channels.items():
+            channel = self.channels.get(field)
+            if channel is not None:
+                (channel.integral, channel.total, channel.unmeasured,
+                 channel.last_t, channel.last, channel.rate) = values
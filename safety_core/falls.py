@@ -0,0 +1,148 @@
+"""
+Server-side fall detection on batched accelerometer samples.
+
+Wearables can stream their MPU6050 at 50-100 Hz on
+``worker/<id>/safety/imu``, many samples per message (``ImuBatch``, see
+``safety_core.frames``). Each worker gets a ``MotionStream`` that keeps a
+short tail of earlier samples and scans every new batch for the
+three phases of a fall:
+
+1. free fall: the magnitude of the acceleration stays under
+   ``FREE_FALL_G`` for at least ``FREE_FALL_MIN`` s of the
+   ``FREE_FALL_WINDOW`` s before
+2. an impact sample above ``IMPACT_G``, followed by
+3. a change of orientation: once the body has settled for ``SETTLE`` s,
+   the mean gravity direction over ``POST_WINDOW`` s differs by at least
+   ``TILT_DEG`` from that over the ``PRE_WINDOW`` s before the free fall.
+
+A batch costs a fixed number of NumPy operations whatever its length.
+Window sums come from cumulative sums over tail plus batch, so only
+impact candidates are looked at individually and only confirmed falls
+reach Python code. An impact is judged once the samples after it have
+arrived, so a fall is reported ``SETTLE + POST_WINDOW`` seconds after
+the impact. Impacts within ``REFRACTORY`` s of a reported fall belong to
+that fall.
+
+Batches are placed in time like frames (see ``reorder.event_time``).
+A batch that does not continue where the previous one ended (a gap, a
+rate change, a device restart) starts the stream afresh. One that
+overlaps it arrived late and is dropped.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+FREE_FALL_G = 0.5
+FREE_FALL_MIN = 0.08
+FREE_FALL_WINDOW = 1.0
+IMPACT_G = 2.5
+PRE_WINDOW = 0.5
+SETTLE = 0.5
+POST_WINDOW = 1.0
+TILT_DEG = 45.0
+REFRACTORY = 2.0
+# How far a batch may start from where the previous one ended, in seconds
+GAP_TOLERANCE = 0.1
+
+# t: impact time (epoch s), impact_g: peak magnitude, free_fall: seconds
+# under FREE_FALL_G before it, tilt: orientation change in degrees
+Fall = namedtuple("Fall", "t impact_g free_fall tilt")
+
+_EMPTY = np.empty((0, 3))
+_ZERO = np.zeros((1, 3))
+
+
+def windows(hz):
+    """``(free-fall window, minimum free fall, pre, settle, post)`` in samples at ``hz``."""
+    return (round(FREE_FALL_WINDOW * hz), max(1, round(FREE_FALL_MIN * hz)),
+            round(PRE_WINDOW * hz), round(SETTLE * hz), max(1, round(POST_WINDOW * hz)))
+
+
+class MotionStream:
+    """Sliding-window fall detector for one device.
+
+    ``push`` takes each batch in turn and returns the falls it
+    confirmed. ``peak`` is the largest magnitude in the last batch.
+    ``gaps`` and ``late`` count batches that restarted the stream or were
+    dropped.
+    """
+
+    __slots__ = ("hz", "windows", "tail", "start", "checked", "last_fall", "peak",
+                 "batches", "falls", "gaps", "late")
+
+    def __init__(self):
+        self.hz = None
+        self.windows = None
+        self.tail = _EMPTY
+        self.start = 0.0
+        self.checked = 0
+        self.last_fall = None
+        self.peak = 0.0
+        self.batches = 0
+        self.falls = 0
+        self.gaps = 0
+        self.late = 0
+
+    def _restart(self, hz, t0):
+        self.hz = hz
+        self.windows = windows(hz)
+        self.tail = _EMPTY
+        self.start = t0
+        self.checked = 0
+
+    def push(self, samples, hz, t0):
+        """Add ``samples`` ((n, 3) in g) taken at ``hz`` from ``t0`` on."""
+        if hz == self.hz and len(self.tail):
+            expected = self.start + len(self.tail) / hz
+            if t0 < expected - GAP_TOLERANCE:
+                self.late += 1
+                return []
+            if t0 > expected + GAP_TOLERANCE:
+                self.gaps += 1
+                self._restart(hz, t0)
+        else:
+            self._restart(hz, t0)
+        self.batches += 1
+        buf = np.concatenate((self.tail, samples)) if len(self.tail) else samples
+        ff_window, ff_min, pre, settle, post = self.windows
+        lead = ff_window + pre
+        size = len(buf)
+        mag = np.sqrt(np.einsum("ij,ij->i", buf, buf))
+        self.peak = float(mag[-len(samples):].max())
+
+        # Impacts whose windows on both sides are complete
+        lo = max(self.checked, lead)
+        hi = size - settle - post
+        falls = []
+        if hi > lo:
+            hits = np.flatnonzero(mag[lo:hi] > IMPACT_G) + lo
+            if len(hits):
+                free = np.concatenate(([0], np.cumsum(mag < FREE_FALL_G)))
+                free_time = free[hits] - free[hits - ff_window]
+                keep = free_time >= ff_min
+                hits, free_time = hits[keep], free_time[keep]
+            if len(hits):
+                sums = np.concatenate((_ZERO, np.cumsum(buf, axis=0)))
+                before = sums[hits - ff_window] - sums[hits - ff_window - pre]
+                after = sums[hits + settle + post] - sums[hits + settle]
+                norms = np.linalg.norm(before, axis=1) * np.linalg.norm(after, axis=1)
+                cos = np.einsum("ij,ij->i", before, after) / np.maximum(norms, 1e-12)
+                tilt = np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+                keep = tilt >= TILT_DEG
+                for i, free_samples, angle in zip(hits[keep].tolist(), free_time[keep].tolist(),
+                                                  tilt[keep].tolist()):
+                    t = self.start + i / self.hz
+                    if self.last_fall is not None and t - self.last_fall.t < REFRACTORY:
+                        continue
+                    fall = Fall(t, float(mag[i:i + settle + 1].max()), free_samples / self.hz, angle)
+                    self.last_fall = fall
+                    falls.append(fall)
+            self.checked = hi
+        self.falls += len(falls)
+
+        # Keep what the next impacts will look back on
+        drop = max(0, self.checked - lead)
+        self.tail = buf[drop:]
+        self.start += drop / self.hz
+        self.checked -= drop
+        return falls
@@ -0,0 +1,244 @@
+"""
+Per-worker telemetry state for a whole fleet of wearables.
+
+Frames are routed by device ID with a single dict lookup, so the cost of
+ingesting a frame does not depend on how many workers are on site.
+
+``FleetStore.receive`` updates a worker's live view (latest frame, risk,
+rule levels) as soon as a frame arrives, and feeds history, statistics
+and rollups through the worker's ``ReorderBuffer`` so they see frames in
+event-time order. Released frames are also queued for the fleet-wide
+``AnomalyDetector`` and ``TrendForecaster``. ``FleetStore.receive_motion`` runs accelerometer
+batches through the worker's ``MotionStream`` fall detector.
+
+Each worker's ``ExposureAccount`` integrates radiation dose and gas
+exposure as frames are recorded. ``exposure_state`` and
+``restore_exposure`` carry the accounts across restarts; a restored
+account waits until its worker reports again.
+"""
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from .anomaly import AnomalyDetector
+from .exposure import ExposureAccount
+from .falls import MotionStream
+from .forecast import TrendForecaster
+from .reorder import ReorderBuffer, event_time
+from .ring_buffer import ColumnRing
+from .risk import compute_risk_scores, score_frames
+from .rollup import Rollups
+from .rules import RULES
+from .stats import ShiftStats
+
+DEFAULT_WORKER_ID = "Worker-01"
+HISTORY_SIZE = 300
+
+
+class WorkerState:
+    """Latest frame, risk scores, shift statistics and bounded history of one device.
+
+    ``levels`` holds the rule level of every channel of the latest frame,
+    computed once at ingest. ``rollups`` aggregates the summary channels
+    into time buckets for long-range charts. ``exposure`` integrates
+    shift dose and gas TWA. ``latest_time`` is the event
+    time of ``latest``; an older frame that arrives later does not
+    replace it. ``motion`` is the fall detector, created with the
+    device's first accelerometer batch.
+    """
+
+    __slots__ = ("worker_id", "latest", "latest_time", "history", "risk", "levels", "stats", "rollups",
+                 "exposure", "reorder", "motion", "last_seen", "frame_count")
+
+    def __init__(self, worker_id, history_size=HISTORY_SIZE):
+        self.worker_id = worker_id
+        self.latest = {}
+        self.latest_time = float("-inf")
+        self.history = ColumnRing(history_size)
+        self.risk = (0, 0, 0)
+        self.levels = {}
+        self.stats = ShiftStats()
+        self.rollups = Rollups()
+        self.exposure = ExposureAccount()
+        self.reorder = ReorderBuffer()
+        self.motion = None
+        self.last_seen = None
+        self.frame_count = 0
+
+    def ingest(self, frame, received=None):
+        """Apply a frame that is known to be in order, bypassing the reorder buffer."""
+        received = time.time() if received is None else received
+        self.observe(frame, received, received)
+        self.record(frame, received, int(received * 1e9))
+
+    def observe(self, frame, t, received):
+        """Live view: latest frame, risk and rule levels."""
+        if t >= self.latest_time:
+            self.latest = frame
+            self.latest_time = t
+            self.risk = compute_risk_scores(frame)
+            self.levels = RULES.classify(frame)
+        self.last_seen = datetime.fromtimestamp(received)
+        self.frame_count += 1
+
+    def record(self, frame, t, received_ns):
+        """History, statistics, rollups and exposure, in event-time order."""
+        self.history.append(frame, t, received_ns)
+        self.stats.update(frame, t)
+        self.rollups.update(frame, t)
+        self.exposure.update(frame, t)
+
+
+class FleetStore:
+    """Worker states keyed by device ID.
+
+    Only the hub's ingest path writes (the MQTT network thread, and the
+    hub's release timer under the same lock); dashboard sessions read.
+    The lock guards the key set so sessions can list workers while new
+    devices appear. ``device_clock`` counts frames whose device time was
+    used as event time, ``clock_skew`` those whose device time was too
+    far from the receive time to trust. ``anomalies`` holds the EWMA and
+    CUSUM detectors of every worker and ``forecasts`` their trend
+    forecasts; frames are queued on both in event-time order and their
+    owner runs ``step()``.
+    """
+
+    def __init__(self, history_size=HISTORY_SIZE):
+        self.history_size = history_size
+        self.anomalies = AnomalyDetector()
+        self.forecasts = TrendForecaster()
+        self.device_clock = 0
+        self.clock_skew = 0
+        self._workers = {}
+        # Restored exposure accounts of workers not seen since
+        self._restored = {}
+        self._lock = threading.Lock()
+
+    def _state(self, worker_id):
+        state = self._workers.get(worker_id)
+        if state is None:
+            with self._lock:
+                state = self._workers.get(worker_id)
+                if state is None:
+                    state = self._workers[worker_id] = WorkerState(worker_id, self.history_size)
+                    account = self._restored.pop(worker_id, None)
+                    if account is not None:
+                        state.exposure = account
+        return state
+
+    def ingest(self, worker_id, frame, received=None):
+        received = time.time() if received is None else received
+        state = self._state(worker_id)
+        state.ingest(frame, received)
+        self._queue(worker_id, received, frame)
+        return state
+
+    def receive(self, worker_id, frame, device_time, received_ns):
+        """Route a frame as it arrives; returns the frames released in order.
+
+        The live view is updated straight away. Released frames are
+        ``(event time, receive ns, frame)`` and have already gone into the
+        worker's history, statistics and rollups.
+        """
+        state = self._state(worker_id)
+        received = received_ns / 1e9
+        t, trusted = event_time(device_time, received)
+        if trusted:
+            self.device_clock += 1
+        elif device_time is not None:
+            self.clock_skew += 1
+        state.observe(frame, t, received)
+        released = state.reorder.push(t, received_ns, frame, hold=trusted)
+        for t, ns, held in released:
+            state.record(held, t, ns)
+            self._queue(worker_id, t, held)
+        return released
+
+    def release_due(self, now):
+        """Release held frames of every worker; ``{worker_id: released}``."""
+        out = {}
+        for state in self.states():
+            if len(state.reorder):
+                released = state.reorder.due(now)
+                for t, ns, held in released:
+                    state.record(held, t, ns)
+                    self._queue(state.worker_id, t, held)
+                if released:
+                    out[state.worker_id] = released
+        return out
+
+    def _queue(self, worker_id, t, frame):
+        self.anomalies.add(worker_id, t, frame)
+        self.forecasts.add(worker_id, t, frame)
+
+    def receive_motion(self, worker_id, batch, received):
+        """Run an ``ImuBatch`` through the worker's fall detector; returns new ``Fall``s."""
+        state = self._state(worker_id)
+        if state.motion is None:
+            state.motion = MotionStream()
+        t0, trusted = event_time(batch.device_time, received)
+        if not trusted:
+            # The batch ended about when it arrived
+            t0 = received - len(batch) / batch.hz
+        state.last_seen = datetime.fromtimestamp(received)
+        return state.motion.push(batch.samples, batch.hz, t0)
+
+    def exposure_state(self):
+        """``{worker_id: account state}`` for every account with exposure recorded."""
+        with self._lock:
+            accounts = {**self._restored, **{s.worker_id: s.exposure for s in self._workers.values()}}
+        return {worker_id: a.state() for worker_id, a in accounts.items() if a.last_t is not None}
+
+    def restore_exposure(self, states):
+        """Load accounts saved by ``exposure_state``; returns them by worker ID."""
+        accounts = {}
+        for worker_id, state in states.items():
+            account = accounts[worker_id] = ExposureAccount()
+            account.restore(state)
+            with self._lock:
+                worker = self._workers.get(worker_id)
+                if worker is not None:
+                    worker.exposure = account
+                else:
+                    self._restored[worker_id] = account
+        return accounts
+
+    def motion_counts(self):
+        """``(batches, falls, gaps, late)`` of every fall detector in the fleet."""
+        streams = [s.motion for s in self.states() if s.motion is not None]
+        return tuple(sum(getattr(m, name) for m in streams) for name in ("batches", "falls", "gaps", "late"))
+
+    def reorder_counts(self):
+        """``(reordered, late)`` frames over the whole fleet."""
+        states = self.states()
+        return sum(s.reorder.reordered for s in states), sum(s.reorder.late for s in states)
+
+    def get(self, worker_id):
+        return self._workers.get(worker_id)
+
+    def worker_ids(self):
+        with self._lock:
+            return sorted(self._workers)
+
+    def states(self):
+        with self._lock:
+            return list(self._workers.values())
+
+    def risk_ranking(self):
+        """Worker IDs and ``(phys, env, overall)`` arrays, riskiest first.
+
+        Scores every worker's latest frame in one vectorised pass; ties
+        keep alphabetical order.
+        """
+        states = sorted(self.states(), key=lambda state: state.worker_id)
+        phys, env, overall = score_frames([state.latest for state in states])
+        order = np.argsort(-overall, kind="stable")
+        return [states[i].worker_id for i in order], phys[order], env[order], overall[order]
+
+    def __len__(self):
+        return len(self._workers)
+
+    def __contains__(self, worker_id):
+        return worker_id in self._workers
@@ -0,0 +1,112 @@
+"""
+Early warning: per-worker trend forecasts of time to a critical reading.
+
+Risk scores and rule levels only describe the latest frame. The
+``TrendForecaster`` keeps a damped Holt linear trend for every worker
+and each channel in ``CHANNELS``: a smoothed level, and a trend in units
+per second whose influence fades with the channel's time constant in
+``DAMPING``. Bodies and gas plumes approach a new level rather than
+climbing for ever, and the damped trend models exactly that. A worker
+walking from rest to work projects a higher heart rate, not one rising
+without bound.
+
+Updates use the real time between samples. Over ``dt`` seconds the
+projected level moves by ``trend * D * (1 - exp(-dt / D))`` and the
+trend decays by ``exp(-dt / D)``. A sample then pulls the level and
+trend toward it with weights set by ``LEVEL_TAU`` and ``TREND_TAU``.
+
+From there, ``time_to_critical`` solves for when the projection crosses
+the rule's critical threshold, for the whole fleet in one pass. A
+crossing further out than ``HORIZON``, or on a channel still warming up,
+gives NaN.
+
+State lives in (workers x channels) arrays and is updated for the whole
+fleet at once (see ``safety_core.fleet_arrays``), so forecasting costs a
+few array operations per batch of frames.
+"""
+import numpy as np
+
+from .fleet_arrays import FleetArrays
+from .rules import RULES
+
+CHANNELS = ("body_temp", "heart_rate", "gas_ppm")
+# Seconds over which a trend fades: about how fast each channel settles
+DAMPING = {"body_temp": 300.0, "heart_rate": 60.0, "gas_ppm": 120.0}
+LEVEL_TAU = 10.0
+TREND_TAU = 20.0
+WARMUP = 15
+HORIZON = 30 * 60.0
+# A longer silence, in seconds, restarts the channel
+MAX_GAP = 300.0
+
+
+class TrendForecaster(FleetArrays):
+    """Damped Holt trends for every channel of every worker.
+
+    ``step`` returns nothing; read forecasts with ``time_to_critical``
+    or ``forecast``.
+    """
+
+    ARRAYS = (("level", np.float64, 0.0), ("trend", np.float64, 0.0), ("count", np.int32, 0))
+
+    def __init__(self, channels=CHANNELS, capacity=64):
+        super().__init__(channels, capacity)
+        self.damping = np.array([DAMPING[ch] for ch in self.channels])
+        self.critical = np.array([RULES[ch].critical for ch in self.channels], dtype=np.float64)
+        self.sign = np.array([1.0 if RULES[ch].direction == "above" else -1.0 for ch in self.channels])
+
+    def _update(self, rows, t, x):
+        valid = ~np.isnan(x)
+        level, trend, count = self.level[rows], self.trend[rows], self.count[rows]
+        dt = (t - self.last_t[rows])[:, None]
+        fresh = np.isnan(dt) | (dt > MAX_GAP) | (count == 0)
+        dt = np.where(fresh, 0.0, np.maximum(dt, 0.0))
+
+        decay = np.exp(-dt / self.damping)
+        predicted = level + trend * self.damping * (1 - decay)
+        trend = trend * decay
+        a = -np.expm1(-dt / LEVEL_TAU)
+        g = -np.expm1(-dt / TREND_TAU)
+        corrected = predicted + a * (x - predicted)
+        slope = np.divide(corrected - level, dt, out=np.zeros_like(dt * level), where=dt > 0)
+        corrected_trend = trend + g * (slope - trend)
+
+        seed = valid & fresh
+        update = valid & ~fresh
+        self.level[rows] = np.where(seed, x, np.where(update, corrected, predicted))
+        self.trend[rows] = np.where(seed, 0.0, np.where(update, corrected_trend, trend))
+        self.count[rows] = np.where(seed, 1, np.where(fresh, 0, count + valid))
+        self.last_t[rows] = t
+        return []
+
+    def time_to_critical(self, rows=None):
+        """Seconds from each worker's last sample until its projection
+        turns critical, as (workers x channels) in ``worker_ids`` order;
+        0 if already there, NaN if not within ``HORIZON`` or not warmed up."""
+        rows = slice(0, len(self.worker_ids)) if rows is None else rows
+        level, trend = self.level[rows], self.trend[rows]
+        gap = self.sign * (self.critical - level)
+        reach = self.sign * trend * self.damping
+        with np.errstate(divide="ignore", invalid="ignore"):
+            h = -self.damping * np.log1p(-gap / reach)
+        h = np.where((reach > gap) & (gap > 0), h, np.nan)
+        h = np.where(gap <= 0, 0.0, h)
+        return np.where((self.count[rows] >= WARMUP) & (h <= HORIZON), h, np.nan)
+
+    def last_sample(self, worker_id):
+        """Time of the worker's last forecast update, or ``None``."""
+        row = self.rows.get(worker_id)
+        if row is None or np.isnan(self.last_t[row]):
+            return None
+        return float(self.last_t[row])
+
+    def forecast(self, worker_id):
+        """``{channel: (seconds to critical or None, level, trend per minute)}``
+        at the worker's last sample (see ``last_sample``), or ``{}``."""
+        row = self.rows.get(worker_id)
+        if row is None:
+            return {}
+        h = self.time_to_critical(slice(row, row + 1))[0]
+        return {ch: (None if np.isnan(h[c]) else float(h[c]), float(self.level[row, c]),
+                     float(self.trend[row, c] * 60))
+                for c, ch in enumerate(self.channels)}
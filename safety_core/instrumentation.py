@@ -0,0 +1,211 @@
+"""
+Lightweight hot-path instrumentation: timing spans, counters and gauges.
+
+    instruments = Instruments()
+    with instruments.span("ingest.decode"):
+        ...
+    instruments.counter("frames_decoded", lambda: decoder.decoded, "Frames decoded.")
+
+A span costs a couple of perf_counter calls and one short lock; each
+stage keeps its count, total and max plus the last ``SPAN_WINDOW``
+durations for percentiles. Counters and gauges are callbacks read at
+export time, so components keep their own plain integer counters and
+nothing extra runs per frame.
+
+``prometheus()`` renders everything in the Prometheus text exposition
+format; ``serve`` exposes it over HTTP on a local port and
+``write_textfile`` writes it atomically for node_exporter's textfile
+collector.
+"""
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SPAN_WINDOW = 512
+RATE_WINDOW = 10.0
+PREFIX = "safety_"
+
+
+class Stage:
+    """Durations of one instrumented stage, in seconds."""
+
+    __slots__ = ("count", "total", "max", "recent")
+
+    def __init__(self, window=SPAN_WINDOW):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.recent.append(seconds)
+
+    def percentile(self, q):
+        """Percentile over the last ``SPAN_WINDOW`` durations."""
+        recent = sorted(self.recent)
+        if not recent:
+            return 0.0
+        return recent[min(len(recent) - 1, int(q * len(recent)))]
+
+
+class _Span:
+    __slots__ = ("instruments", "name", "started")
+
+    def __init__(self, instruments, name):
+        self.instruments = instruments
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.instruments.record(self.name, time.perf_counter() - self.started)
+
+
+class Instruments:
+    """Registry of stages, counters and gauges for one process."""
+
+    def __init__(self, window=SPAN_WINDOW):
+        self.window = window
+        self.stages = {}
+        # name -> (kind, help, label, callback); callbacks return a number
+        # or, with a label, a dict of label value -> number
+        self.metrics = {}
+        self._rates = {}
+        self._lock = threading.Lock()
+
+    # --------------------------------------------------
+    # SPANS
+    # --------------------------------------------------
+    def span(self, name):
+        """Context manager timing one run of stage ``name``."""
+        return _Span(self, name)
+
+    def record(self, name, seconds):
+        with self._lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = Stage(self.window)
+            stage.record(seconds)
+
+    def stage_rows(self):
+        """``(name, count, p50, p99, max, total)`` per stage, in seconds."""
+        with self._lock:
+            stages = sorted(self.stages.items())
+            return [
+                (name, s.count, s.percentile(0.5), s.percentile(0.99), s.max, s.total)
+                for name, s in stages
+            ]
+
+    # --------------------------------------------------
+    # COUNTERS AND GAUGES
+    # --------------------------------------------------
+    def counter(self, name, read, help="", label=None):
+        """Register a monotonically increasing value read from ``read()``."""
+        self.metrics[name] = ("counter", help, label, read)
+
+    def gauge(self, name, read, help="", label=None):
+        """Register a value that can go up and down, read from ``read()``."""
+        self.metrics[name] = ("gauge", help, label, read)
+
+    def read(self, name):
+        return self.metrics[name][3]()
+
+    def rate(self, name, now=None, window=RATE_WINDOW):
+        """Per-second increase of counter ``name`` over about ``window`` s.
+
+        Every call adds a sample, so the rate is only as fresh as the
+        callers are frequent; the dashboard reads it on each redraw.
+        """
+        now = time.monotonic() if now is None else now
+        value = self.read(name)
+        with self._lock:
+            samples = self._rates.setdefault(name, deque())
+            samples.append((now, value))
+            while len(samples) > 2 and now - samples[1][0] >= window:
+                samples.popleft()
+            t0, v0 = samples[0]
+        return (value - v0) / (now - t0) if now > t0 else 0.0
+
+    # --------------------------------------------------
+    # EXPORT
+    # --------------------------------------------------
+    def prometheus(self):
+        """Everything in the Prometheus text exposition format."""
+        lines = []
+        rows = self.stage_rows()
+        if rows:
+            name = f"{PREFIX}stage_seconds"
+            lines += [f"# HELP {name} Duration of instrumented stages over the last {self.window} runs.",
+                      f"# TYPE {name} summary"]
+            for stage, count, p50, p99, _, total in rows:
+                lines += [f'{name}{{stage="{stage}",quantile="0.5"}} {p50:.9f}',
+                          f'{name}{{stage="{stage}",quantile="0.99"}} {p99:.9f}',
+                          f'{name}_sum{{stage="{stage}"}} {total:.9f}',
+                          f'{name}_count{{stage="{stage}"}} {count}']
+            name = f"{PREFIX}stage_max_seconds"
+            lines += [f"# HELP {name} Longest run of each instrumented stage.",
+                      f"# TYPE {name} gauge"]
+            lines += [f'{name}{{stage="{stage}"}} {peak:.9f}' for stage, _, _, _, peak, _ in rows]
+        for metric, (kind, help, label, read) in sorted(self.metrics.items()):
+            name = f"{PREFIX}{metric}{'_total' if kind == 'counter' else ''}"
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            value = read()
+            if label is None:
+                lines.append(f"{name} {value}")
+            else:
+                lines += [f'{name}{{{label}="{key}"}} {v}' for key, v in sorted(value.items())]
+        return "\n".join(lines) + "\n"
+
+
+def write_textfile(instruments, path):
+    """Write the exposition to ``path`` atomically."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(instruments.prometheus())
+    os.replace(tmp, path)
+
+
+def export_periodically(instruments, path, interval=15.0):
+    """Rewrite ``path`` every ``interval`` s from a daemon thread."""
+    def loop():
+        while True:
+            try:
+                write_textfile(instruments, path)
+            except OSError as e:
+                print(f"❌ Metrics export to {path} failed: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="metrics-export", daemon=True)
+    thread.start()
+    return thread
+
+
+def serve(instruments, port, host="127.0.0.1"):
+    """Serve ``GET /metrics`` on ``host:port`` from a daemon thread."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = instruments.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,506 @@
+"""
+Process-wide MQTT ingestion service.
+
+One paho client per server process owns the broker connection and the
+subscriptions. Each incoming frame is decoded exactly once on the network
+thread, routed into the shared fleet store by device ID, and then fanned
+out to the queues of every dashboard session that is currently attached.
+Payloads are validated into typed ``Frame`` records by a ``FrameDecoder``;
+malformed ones are counted and quarantined rather than routed.
+When a ``TelemetryStore`` is given, frames and alerts are also persisted.
+Every alert is added to a searchable ``AlertIndex`` and folded into an
+``EpisodeTracker``; both are seeded from the store's alert history at
+startup. Each ingest stage is timed into the hub's ``Instruments``, which
+also exposes the decoder, queue and fleet counters.
+
+Every message is stamped with its receive time in integer nanoseconds as
+soon as it arrives. Frames carry the device's own timestamp when it sends
+one; the fleet orders history by that event time through per-worker
+reorder buffers, and a release timer flushes frames held longer than
+``MAX_HOLD``. Alerts keep their receive time as ``t`` (epoch seconds);
+nothing is formatted for display here.
+
+Frames released in order also feed the fleet's EWMA and CUSUM anomaly
+detectors (``safety_core.anomaly``) and trend forecasts
+(``safety_core.forecast``), run on the release timer or once
+``ANOMALY_BATCH`` frames are queued. They run under a lock of their own,
+so the network thread keeps routing frames while the timer is stepping
+them. A channel that turns anomalous raises a ``<channel>_anomaly_alert``
+into the alert stream.
+
+Radiation dose and gas exposure are integrated per worker as frames are
+recorded (``safety_core.exposure``). With a store the accounts are
+checkpointed every ``CHECKPOINT_INTERVAL`` s and on stop; at startup the
+checkpoint is loaded and only the frames stored after it are replayed.
+
+Accelerometer batches on ``worker/<id>/safety/imu`` go through the
+worker's fall detector (``safety_core.falls``). A fall it confirms is
+raised as a ``fall_alert`` of its own, timed at the impact, and takes
+the same path as an alert from the device.
+
+Devices publish on ``worker/<id>/safety/data``,
+``worker/<id>/safety/alert`` and ``worker/<id>/safety/imu``. The original
+single-wearer topics ``worker/safety/data`` and ``worker/safety/alert``
+(and ``worker/safety/imu``) are still accepted and map to
+``DEFAULT_WORKER_ID``.
+"""
+import threading
+import time
+import weakref
+
+import paho.mqtt.client as mqtt
+
+from .alert_index import AlertIndex
+from .anomaly import LABELS
+from .episodes import EpisodeTracker
+from .fleet import DEFAULT_WORKER_ID, FleetStore
+from .frames import Frame, FrameDecoder
+from .instrumentation import Instruments
+from .queues import DROP_OLDEST, KEEP, FeedQueue, QueueStats
+
+BROKER_HOST = "broker.emqx.io"
+BROKER_PORT = 1883
+DATA_TOPIC = "worker/safety/data"
+ALERT_TOPIC = "worker/safety/alert"
+IMU_TOPIC = "worker/safety/imu"
+FLEET_DATA_TOPIC = "worker/+/safety/data"
+FLEET_ALERT_TOPIC = "worker/+/safety/alert"
+FLEET_IMU_TOPIC = "worker/+/safety/imu"
+SUBSCRIPTIONS = (DATA_TOPIC, ALERT_TOPIC, IMU_TOPIC, FLEET_DATA_TOPIC, FLEET_ALERT_TOPIC, FLEET_IMU_TOPIC)
+TOPIC_KINDS = ("data", "alert", "imu")
+# Per-session queue limits. Frames beyond the limit push out the oldest;
+# alerts are never dropped and only count as over capacity.
+DATA_QUEUE_SIZE = 1000
+ALERT_QUEUE_SIZE = 200
+# How often the release timer flushes frames held in reorder buffers
+RELEASE_INTERVAL = 0.25
+# Queued frames that make the network thread run the anomaly detectors
+# and forecasts itself, for replays and bursts between timer runs
+ANOMALY_BATCH = 512
+# Seconds between exposure checkpoints, and the checkpoint's name in the store
+CHECKPOINT_INTERVAL = 30.0
+EXPOSURE_STATE = "exposure"
+
+
+def data_topic(worker_id):
+    return f"worker/{worker_id}/safety/data"
+
+
+def alert_topic(worker_id):
+    return f"worker/{worker_id}/safety/alert"
+
+
+def imu_topic(worker_id):
+    return f"worker/{worker_id}/safety/imu"
+
+
+def fall_alert(worker_id, fall):
+    """Alert item for a fall confirmed by the server-side detector."""
+    return {
+        "worker_id": worker_id,
+        "fall_alert": "Fall detected from accelerometer stream",
+        "severity": "CRITICAL",
+        "source": "server",
+        "impact_g": round(fall.impact_g, 2),
+        "free_fall_s": round(fall.free_fall, 2),
+        "tilt_deg": round(fall.tilt),
+        "t": fall.t,
+    }
+
+
+def anomaly_alert(event):
+    """Alert item for an ``AnomalyDetector`` event."""
+    worker_id, t, channel, value, baseline, z, detector = event
+    change = "jumped" if detector == "ewma" else "drifting"
+    side = "above" if value > baseline else "below"
+    return {
+        "worker_id": worker_id,
+        f"{channel}_anomaly_alert": f"{LABELS[channel]} {change} {side} baseline",
+        "severity": "WARNING",
+        "detector": detector,
+        channel: round(value, 3),
+        "baseline": round(baseline, 3),
+        "z": round(z, 1),
+        "t": t,
+    }
+
+
+def parse_topic(topic):
+    """Split a topic into ``(worker_id, kind)``; kind is "data", "alert" or "imu".
+
+    Returns ``(None, None)`` for topics that are not ours.
+    """
+    parts = topic.split("/")
+    if parts[0] != "worker":
+        return None, None
+    if len(parts) == 3 and parts[1] == "safety":
+        worker_id, kind = DEFAULT_WORKER_ID, parts[2]
+    elif len(parts) == 4 and parts[2] == "safety":
+        worker_id, kind = parts[1], parts[3]
+    else:
+        return None, None
+    if kind not in TOPIC_KINDS:
+        return None, None
+    return worker_id, kind
+
+
+class SessionFeed:
+    """Per-session mailbox filled by the shared hub.
+
+    ``data_queue`` receives ``(worker_id, frame)`` tuples, ``alert_queue``
+    receives alert dicts tagged with ``worker_id`` and ``t`` in epoch
+    seconds: the receive time for a device's alert, the event time for
+    the anomalies and falls the server raises. Both are bounded
+    ``FeedQueue``s; see ``safety_core.queues`` for the overflow policies.
+    ``updated`` is set after every put so a waiting session wakes without
+    polling.
+    """
+
+    def __init__(self, data_maxsize=DATA_QUEUE_SIZE, alert_maxsize=ALERT_QUEUE_SIZE,
+                 data_policy=DROP_OLDEST, alert_policy=KEEP):
+        self.data_queue = FeedQueue(data_maxsize, data_policy)
+        self.alert_queue = FeedQueue(alert_maxsize, alert_policy)
+        self.updated = threading.Event()
+
+    def has_data(self):
+        return not self.data_queue.empty()
+
+    def has_alerts(self):
+        return not self.alert_queue.empty()
+
+    def wait(self, timeout):
+        """Sleep until the hub puts something or ``timeout`` elapses."""
+        self.updated.wait(timeout)
+        self.updated.clear()
+
+
+class TelemetryHub:
+    """Single broker connection fanning decoded frames out to sessions.
+
+    Sessions are held weakly: when Streamlit drops a session's state the
+    feed is garbage collected and silently leaves the fan-out set.
+    """
+
+    def __init__(self, host=BROKER_HOST, port=BROKER_PORT, fleet=None, store=None, instruments=None):
+        self.host = host
+        self.port = port
+        self.fleet = fleet if fleet is not None else FleetStore()
+        self.store = store
+        self.decoder = FrameDecoder()
+        self.alerts = AlertIndex()
+        self.episodes = EpisodeTracker()
+        self.instruments = instruments if instruments is not None else Instruments()
+        if store is not None:
+            for alert in store.query_alerts():
+                t = alert["t"]
+                alert.pop("time", None)  # display string written by older versions
+                self.alerts.add(alert, t)
+                self.episodes.observe(alert, t)
+            self.episodes.sweep(time.time())
+            self._restore_exposure()
+        self.connected = False
+        self.error = None
+        self._client = None
+        self._feeds = weakref.WeakSet()
+        # Counters of feeds that are gone, so totals survive closed tabs.
+        # Finalizers may run inside any allocation, hence a separate RLock.
+        self._retired = {"data": QueueStats(), "alert": QueueStats()}
+        self._retired_lock = threading.RLock()
+        self._lock = threading.Lock()
+        # Serialises fleet writes between the network thread and the release timer
+        self._ingest_lock = threading.Lock()
+        # Serialises detector and forecast steps, which only touch their own arrays
+        self._step_lock = threading.Lock()
+        self._release_stop = threading.Event()
+        self._release_thread = None
+        # Messages that raised while being ingested, by exception type
+        self.ingest_errors = {}
+        self._register_metrics()
+
+    def _restore_exposure(self):
+        accounts = self.fleet.restore_exposure(self.store.read_state(EXPOSURE_STATE) or {})
+        for worker_id, account in accounts.items():
+            # Frames stored after the checkpoint was taken
+            rows = self.store.query(worker_id, start=account.last_t)
+            rows = rows[rows["timestamp"] > account.last_t]
+            for row in rows:
+                frame = dict(zip(rows.dtype.names, row.tolist()))
+                account.update(frame, frame["timestamp"])
+
+    def checkpoint(self):
+        """Save every worker's exposure account to the store, if there is one."""
+        if self.store is None:
+            return
+        with self._ingest_lock:
+            state = self.fleet.exposure_state()
+        self.store.write_state(EXPOSURE_STATE, state)
+
+    def _register_metrics(self):
+        ins, decoder = self.instruments, self.decoder
+        ins.counter("frames_decoded", lambda: decoder.decoded, "Telemetry frames decoded.")
+        ins.counter("frames_binary", lambda: decoder.binary, "Frames received in the binary wire format.")
+        ins.counter("frames_partial", lambda: decoder.partial, "Frames missing one or more fields.")
+        ins.counter("alerts_received", lambda: decoder.alerts, "Alert messages decoded.")
+        ins.counter("payloads_rejected", lambda: dict(decoder.rejected), "Payloads rejected by the decoder.", label="reason")
+        ins.counter("ingest_errors", lambda: dict(self.ingest_errors), "Messages that raised while being ingested.", label="error")
+        ins.counter("queue_enqueued", lambda: self._queue_field("enqueued"), "Items put on session queues.", label="queue")
+        ins.counter("queue_dropped", lambda: self._queue_field("dropped"), "Items dropped from full session queues.", label="queue")
+        ins.gauge("queue_high_water", lambda: self._queue_field("high_water"), "Deepest any session queue has been.", label="queue")
+        ins.gauge("queue_depth", self.queue_depths, "Current depth of the deepest session queue.", label="queue")
+        ins.gauge("sessions", lambda: self.session_count, "Attached dashboard sessions.")
+        ins.gauge("workers", lambda: len(self.fleet), "Devices seen since startup.")
+        ins.gauge("alert_episodes_open", lambda: len(self.episodes.open), "Alert episodes still open.")
+        ins.gauge("mqtt_connected", lambda: int(self.connected), "1 while the broker connection is up.")
+        ins.counter("frames_reordered", lambda: self.fleet.reorder_counts()[0], "Frames put back into event-time order.")
+        ins.counter("frames_late", lambda: self.fleet.reorder_counts()[1], "Frames dropped for arriving after newer ones were released.")
+        ins.counter("frames_device_clock", lambda: self.fleet.device_clock, "Frames ordered by the device's own timestamp.")
+        ins.counter("frames_clock_skew", lambda: self.fleet.clock_skew, "Frames whose device timestamp was too far off to use.")
+        ins.counter("anomaly_samples", lambda: self.fleet.anomalies.samples, "Frames run through the anomaly detectors.")
+        ins.counter("forecast_samples", lambda: self.fleet.forecasts.samples, "Frames run through the trend forecasts.")
+        ins.counter("anomaly_events", lambda: self.fleet.anomalies.events, "Channels that turned anomalous.")
+        ins.counter("imu_samples", lambda: decoder.imu_samples, "Accelerometer samples decoded.")
+        ins.counter("imu_batches", lambda: self.fleet.motion_counts()[0], "Accelerometer batches scanned for falls.")
+        ins.counter("falls_detected", lambda: self.fleet.motion_counts()[1], "Falls confirmed by the server-side detector.")
+        ins.counter("imu_gaps", lambda: self.fleet.motion_counts()[2], "Accelerometer batches that restarted a stream after a gap.")
+        ins.counter("imu_late", lambda: self.fleet.motion_counts()[3], "Accelerometer batches dropped for overlapping earlier ones.")
+
+    # --------------------------------------------------
+    # CONNECTION
+    # --------------------------------------------------
+    def start(self):
+        """Connect and start the network thread. Safe to call every rerun."""
+        with self._lock:
+            if self._client is not None:
+                return
+            if self.store is not None:
+                self.store.start()
+            client = mqtt.Client()
+            client.on_connect = self.on_connect
+            client.on_disconnect = self.on_disconnect
+            client.on_message = self.on_message
+            try:
+                client.connect(self.host, self.port, 60)
+                client.loop_start()
+            except Exception as e:
+                self.error = e
+                self.connected = False
+                return
+            self._client = client
+            self.error = None
+            self.connected = True
+            self._release_stop.clear()
+            self._release_thread = threading.Thread(target=self._release_loop, name="reorder-release", daemon=True)
+            self._release_thread.start()
+            print("🔄 MQTT Loop started")
+
+    def stop(self):
+        with self._lock:
+            client, self._client = self._client, None
+            thread, self._release_thread = self._release_thread, None
+        if client is not None:
+            client.loop_stop()
+            client.disconnect()
+        if thread is not None:
+            self._release_stop.set()
+            thread.join()
+        # Nothing stays held back once the feed has stopped
+        self.release_due(float("inf"))
+        self.checkpoint()
+        if self.store is not None:
+            self.store.close()
+        self.connected = False
+
+    def _release_loop(self):
+        next_checkpoint = time.monotonic() + CHECKPOINT_INTERVAL
+        while not self._release_stop.wait(RELEASE_INTERVAL):
+            self.release_due()
+            if time.monotonic() >= next_checkpoint:
+                self.checkpoint()
+                next_checkpoint = time.monotonic() + CHECKPOINT_INTERVAL
+
+    def release_due(self, now=None):
+        """Flush frames held past ``MAX_HOLD`` and run the anomaly
+        detectors and forecasts; returns how many frames were released.
+
+        Runs on the release timer; ``now=float("inf")`` flushes everything.
+        """
+        now = time.time() if now is None else now
+        with self._ingest_lock:
+            released = self.fleet.release_due(now)
+            if self.store is not None:
+                for worker_id, rows in released.items():
+                    for t, received_ns, frame in rows:
+                        self.store.append(worker_id, frame, t, received_ns)
+        if released:
+            # History moved without a new message; let sessions redraw it
+            with self._lock:
+                feeds = list(self._feeds)
+            for feed in feeds:
+                feed.updated.set()
+        self.detect_anomalies()
+        self.update_forecasts()
+        return sum(len(rows) for rows in released.values())
+
+    def detect_anomalies(self):
+        """Run the queued frames through the anomaly detectors and raise their alerts."""
+        with self.instruments.span("ingest.anomaly"), self._step_lock:
+            events = self.fleet.anomalies.step()
+        for event in events:
+            self._alert(anomaly_alert(event))
+        return len(events)
+
+    def update_forecasts(self):
+        """Run the queued frames through the trend forecasts."""
+        with self.instruments.span("ingest.forecast"), self._step_lock:
+            self.fleet.forecasts.step()
+
+    # --------------------------------------------------
+    # SESSION FAN-OUT
+    # --------------------------------------------------
+    def subscribe(self, **options):
+        """New session feed; ``options`` go to ``SessionFeed``."""
+        feed = SessionFeed(**options)
+        with self._lock:
+            self._feeds.add(feed)
+        weakref.finalize(feed, self._retire, feed.data_queue.stats, feed.alert_queue.stats)
+        return feed
+
+    def unsubscribe(self, feed):
+        with self._lock:
+            self._feeds.discard(feed)
+
+    def _retire(self, data_stats, alert_stats):
+        with self._retired_lock:
+            self._retired["data"].merge(data_stats)
+            self._retired["alert"].merge(alert_stats)
+
+    def queue_stats(self):
+        """Totals of every session queue since startup, per queue kind.
+
+        ``high_water`` is the deepest any single session queue has been.
+        """
+        with self._lock:
+            feeds = list(self._feeds)
+        with self._retired_lock:
+            totals = {kind: QueueStats(**stats.as_dict()) for kind, stats in self._retired.items()}
+        for feed in feeds:
+            totals["data"].merge(feed.data_queue.stats)
+            totals["alert"].merge(feed.alert_queue.stats)
+        return totals
+
+    def _queue_field(self, field):
+        return {kind: getattr(stats, field) for kind, stats in self.queue_stats().items()}
+
+    def queue_depths(self):
+        """Current depth of the deepest live session queue, per queue kind."""
+        with self._lock:
+            feeds = list(self._feeds)
+        return {
+            "data": max((len(feed.data_queue) for feed in feeds), default=0),
+            "alert": max((len(feed.alert_queue) for feed in feeds), default=0),
+        }
+
+    @property
+    def session_count(self):
+        return len(self._feeds)
+
+    def dispatch(self, topic, data, received_ns=None):
+        """Route one decoded frame, alert or accelerometer batch into the
+        fleet and to every session.
+
+        ``received_ns`` is the arrival time (now if omitted). Frames must
+        be treated as read-only by sessions, since the same object is
+        shared between all of them.
+        """
+        worker_id, kind = parse_topic(topic)
+        received_ns = time.time_ns() if received_ns is None else received_ns
+        received = received_ns / 1e9
+        span = self.instruments.span
+        if kind == "data":
+            device_time = data.device_time if type(data) is Frame else data.get("ts")
+            # Live view now; history, statistics and rollups once in order
+            with span("ingest.fleet"), self._ingest_lock:
+                released = self.fleet.receive(worker_id, data, device_time, received_ns)
+                if self.store is not None and released:
+                    with span("ingest.store"):
+                        for t, ns, frame in released:
+                            self.store.append(worker_id, frame, t, ns)
+            self._fan_out(kind, (worker_id, data))
+            # Unless the release timer is already stepping them
+            if self.fleet.anomalies.pending >= ANOMALY_BATCH and not self._step_lock.locked():
+                self.detect_anomalies()
+                self.update_forecasts()
+        elif kind == "alert":
+            self._alert({'worker_id': worker_id, **data, 't': received})
+        elif kind == "imu":
+            with span("ingest.motion"), self._ingest_lock:
+                falls = self.fleet.receive_motion(worker_id, data, received)
+            for fall in falls:
+                self._alert(fall_alert(worker_id, fall))
+
+    def _alert(self, item):
+        t = item["t"]
+        span = self.instruments.span
+        with span("ingest.alerts"):
+            self.alerts.add(item, t)
+            self.episodes.observe(item, t)
+        if self.store is not None:
+            with span("ingest.store"):
+                self.store.append_alert(item, t)
+        self._fan_out("alert", item)
+
+    def _fan_out(self, kind, item):
+        with self.instruments.span("ingest.fanout"):
+            with self._lock:
+                feeds = list(self._feeds)
+            for feed in feeds:
+                if kind == "data":
+                    feed.data_queue.put(item)
+                else:
+                    feed.alert_queue.put(item)
+                feed.updated.set()
+
+    # --------------------------------------------------
+    # PAHO CALLBACKS
+    # --------------------------------------------------
+    def on_connect(self, client, userdata, flags, rc):
+        if rc == 0:
+            self.connected = True
+            client.subscribe([(topic, 0) for topic in SUBSCRIPTIONS])
+            print(f"✅ MQTT Connected to {self.host}")
+        else:
+            self.connected = False
+            print(f"❌ MQTT Connection failed: {rc}")
+
+    def on_disconnect(self, client, userdata, rc):
+        self.connected = False
+
+    def on_message(self, client, userdata, msg):
+        self.receive(msg.topic, msg.payload, time.time_ns())
+
+    def receive(self, topic, payload, received_ns):
+        """Decode and dispatch one message that arrived at ``received_ns``.
+
+        ``on_message`` stamps the wall clock; replays pass the recorded time.
+        """
+        # Runs on the network thread: nothing may escape to paho, which
+        # would re-raise it and stop ingest for every session
+        try:
+            _, kind = parse_topic(topic)
+            with self.instruments.span("ingest.decode"):
+                if kind == "data":
+                    data = self.decoder.decode_frame(payload, topic)
+                elif kind == "alert":
+                    data = self.decoder.decode_alert(payload, topic)
+                elif kind == "imu":
+                    data = self.decoder.decode_imu(payload, topic)
+                else:
+                    return
+            if data is None:
+                return
+            if kind != "alert":
+                data.received_ns = received_ns
+            self.dispatch(topic, data, received_ns)
+        except Exception as e:
+            name = type(e).__name__
+            self.ingest_errors[name] = self.ingest_errors.get(name, 0) + 1
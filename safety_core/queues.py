@@ -0,0 +1,88 @@
+"""
+Bounded per-session mailboxes with an overflow policy and counters.
+
+A session that stops draining (a stalled browser tab, a slow rerun) must
+not make its queue grow without limit, and one rerun should not pay a
+lock round-trip per queued item. ``FeedQueue`` is a deque behind one
+lock:
+
+* ``put`` appends in O(1) and applies the overflow policy when the queue
+  is full: ``DROP_OLDEST`` discards the oldest item (fine for telemetry,
+  where the newest frame supersedes older ones); ``KEEP`` never drops,
+  and the limit only marks the queue as over capacity in the counters
+  (for alerts, which must all arrive).
+* ``drain`` swaps the whole backlog out in one lock acquisition.
+
+Every queue counts items enqueued, dropped and drained, plus its
+high-water mark, so queue sizes can be set from observed load.
+"""
+import threading
+from collections import deque
+
+DROP_OLDEST = "drop_oldest"
+KEEP = "keep"
+POLICIES = (DROP_OLDEST, KEEP)
+
+
+class QueueStats:
+    """Counters of one queue, or totals over several."""
+
+    __slots__ = ("enqueued", "dropped", "drained", "high_water")
+
+    def __init__(self, enqueued=0, dropped=0, drained=0, high_water=0):
+        self.enqueued = enqueued
+        self.dropped = dropped
+        self.drained = drained
+        self.high_water = high_water
+
+    def merge(self, other):
+        """Add ``other``'s counters; the high-water mark is the larger one."""
+        self.enqueued += other.enqueued
+        self.dropped += other.dropped
+        self.drained += other.drained
+        self.high_water = max(self.high_water, other.high_water)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class FeedQueue:
+    """Bounded FIFO with an overflow policy, bulk drain and counters."""
+
+    def __init__(self, maxsize, policy=DROP_OLDEST):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown overflow policy {policy!r}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.stats = QueueStats()
+        self._items = deque()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def empty(self):
+        return not self._items
+
+    def put(self, item):
+        """Enqueue ``item``; returns False if the policy dropped an item."""
+        with self._lock:
+            items = self._items
+            dropped = len(items) >= self.maxsize and self.policy == DROP_OLDEST
+            if dropped:
+                items.popleft()
+                self.stats.dropped += 1
+            items.append(item)
+            self.stats.enqueued += 1
+            if len(items) > self.stats.high_water:
+                self.stats.high_water = len(items)
+        return not dropped
+
+    def drain(self):
+        """Remove and return every queued item, oldest first."""
+        with self._lock:
+            items, self._items = self._items, deque()
+            self.stats.drained += len(items)
+        return items
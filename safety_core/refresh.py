@@ -0,0 +1,63 @@
+"""
+Push-driven rerun scheduling for dashboard sessions.
+
+Instead of sleeping a fixed two seconds and rerunning, a session blocks on
+its feed until the hub hands it something new. Alerts wake it at once;
+data frames are coalesced for an adaptive minimum interval so a burst of
+frames costs one rerun rather than many. An idle session only reruns every
+``idle_timeout`` seconds to keep the clocks on the page current.
+"""
+import time
+
+ALERT = "alert"
+DATA = "data"
+IDLE = "idle"
+
+
+class RefreshScheduler:
+    """Decides when one dashboard session should rerun.
+
+    The minimum interval between data-driven reruns tracks the cost of the
+    last render, so that rendering never takes more than ``render_share``
+    of wall time, bounded by ``min_interval`` and ``max_interval``.
+    """
+
+    def __init__(self, min_interval=0.25, max_interval=2.0, idle_timeout=30.0,
+                 poll_interval=0.2, render_share=0.5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.idle_timeout = idle_timeout
+        self.poll_interval = poll_interval
+        self.render_share = render_share
+        self.interval = min_interval
+        self.last_render = 0.0
+
+    def record_render(self, duration):
+        self.last_render = duration
+        self.interval = min(self.max_interval, max(self.min_interval, duration / self.render_share))
+
+    def wait(self, feed, run_started, yield_point=None):
+        """Block until ``feed`` has something to show; return why.
+
+        ``run_started`` is the ``time.monotonic()`` value taken when the
+        current rerun began. ``yield_point`` is called between short waits
+        so the host framework can interrupt the wait, e.g. when the user
+        interacts with a widget.
+        """
+        deadline = run_started + self.idle_timeout
+        while True:
+            if feed.has_alerts():
+                return ALERT
+            now = time.monotonic()
+            if feed.has_data():
+                hold = run_started + self.interval - now
+                if hold <= 0:
+                    return DATA
+                # Let the rest of the burst arrive before rerunning.
+                time.sleep(min(hold, self.poll_interval))
+            elif now >= deadline:
+                return IDLE
+            else:
+                feed.wait(min(deadline - now, self.poll_interval))
+            if yield_point is not None:
+                yield_point()
@@ -0,0 +1,88 @@
+"""
+Event-time ordering of frames from one device.
+
+MQTT over a flaky site network delivers frames with jitter and now and
+then out of order. Live tiles only need the newest reading, but history,
+statistics, rollups and the store want frames in the order they were
+measured. Each worker therefore has a ``ReorderBuffer`` that holds frames
+briefly and releases them sorted by event time:
+
+* a frame is released once a frame at least ``window`` seconds newer (in
+  event time) has arrived, or once it has been held ``max_hold`` seconds
+  by the receive clock, whichever comes first;
+* a frame older than the last one released is late. It cannot be put
+  back in order any more, so it is counted and dropped.
+
+The event time is the device's timestamp when it has one and it is within
+``MAX_CLOCK_SKEW`` of the receive time. Otherwise it is the receive time,
+so a device without NTP cannot push its frames into the past or the
+future. Frames timed by the receive clock arrive in order by definition
+and pass straight through unless earlier frames are still held.
+"""
+import heapq
+
+REORDER_WINDOW = 1.0
+MAX_HOLD = 1.0
+MAX_CLOCK_SKEW = 300.0
+
+
+def event_time(device_time, received, max_skew=MAX_CLOCK_SKEW):
+    """``(event time, whether the device time was used)`` in epoch seconds."""
+    if device_time is not None and abs(device_time - received) <= max_skew:
+        return device_time, True
+    return received, False
+
+
+class ReorderBuffer:
+    """Hold-back queue that releases one device's frames in event-time order.
+
+    ``push`` and ``due`` return the released frames as
+    ``(event time, receive ns, frame)``, oldest first. ``reordered``
+    counts frames that arrived after a newer one but were still put in
+    place; ``late`` counts frames dropped for arriving too late.
+    """
+
+    __slots__ = ("window", "max_hold", "newest", "released_until", "reordered", "late", "_heap", "_seq")
+
+    def __init__(self, window=REORDER_WINDOW, max_hold=MAX_HOLD):
+        self.window = window
+        self.max_hold = max_hold
+        self.newest = float("-inf")
+        self.released_until = float("-inf")
+        self.reordered = 0
+        self.late = 0
+        self._heap = []
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, t, received_ns, frame, hold=True):
+        """Add a frame; ``hold=False`` for frames timed by the receive clock."""
+        if t < self.released_until:
+            self.late += 1
+            return []
+        if not hold and not self._heap:
+            self.newest = self.released_until = t
+            return [(t, received_ns, frame)]
+        if t < self.newest:
+            self.reordered += 1
+        else:
+            self.newest = t
+        # The sequence number breaks ties without comparing frames
+        heapq.heappush(self._heap, (t, self._seq, received_ns, frame))
+        self._seq += 1
+        return self.due(received_ns / 1e9)
+
+    def due(self, now):
+        """Release every frame that is ready at receive-clock time ``now``."""
+        heap = self._heap
+        released = []
+        horizon = self.newest - self.window
+        hold_ns = (now - self.max_hold) * 1e9
+        while heap and (heap[0][0] <= horizon or heap[0][2] <= hold_ns):
+            t, _, received_ns, frame = heapq.heappop(heap)
+            released.append((t, received_ns, frame))
+        if released:
+            self.released_until = released[-1][0]
+        return released
@@ -0,0 +1,191 @@
+"""
+Fixed-capacity columnar ring buffer for sensor history.
+
+Each telemetry field is a typed column of one preallocated NumPy record
+array, so a frame is written with a single row assignment. The array is
+twice the configured capacity and rows are written linearly; when the
+write cursor reaches the end, the newest ``capacity`` rows are moved back
+to the front in one block. That keeps appends amortised O(1)
+and guarantees the last ``n`` rows are always contiguous, so ``tail()``
+can hand out views instead of copies.
+
+``frame()`` keeps one DataFrame of the whole window per buffer and only
+converts the rows appended since it was last asked for, so every session
+and every tab can slice the same object on each rerun. The converted
+columns use the same twice-capacity layout, so the DataFrame wraps a
+contiguous slice of them without copying. Times stay numeric there too
+(local wall-clock datetimes); formatting them is left to whatever
+displays them.
+"""
+import threading
+from datetime import datetime
+
+import numpy as np
+
+LOCAL_TZ = datetime.now().astimezone().tzinfo
+
+# (field, dtype, fill value for frames that omit the field)
+COLUMNS = (
+    ("timestamp", np.float64, np.nan),
+    ("received_ns", np.int64, 0),
+    ("body_temp", np.float64, np.nan),
+    ("heart_rate", np.float64, np.nan),
+    ("spo2", np.float64, np.nan),
+    ("gas_ppm", np.float64, np.nan),
+    ("radiation_uSvh", np.float64, np.nan),
+    ("radiation_cpm", np.float64, np.nan),
+    ("accel_x", np.float64, np.nan),
+    ("accel_y", np.float64, np.nan),
+    ("accel_z", np.float64, np.nan),
+    ("fall_detected", np.bool_, False),
+)
+FIELDS = tuple(name for name, _, _ in COLUMNS)
+
+
+def local_datetimes(seconds):
+    """Epoch seconds -> naive local ``datetime64[ns]``.
+
+    One NumPy add when the whole span shares a UTC offset, which is
+    every span that does not cross a DST change; pandas otherwise.
+    """
+    seconds = np.asarray(seconds, dtype=np.float64)
+    if len(seconds) == 0 or not np.isfinite(seconds[[0, -1]]).all():
+        import pandas as pd
+        return pd.to_datetime(seconds, unit="s", utc=True).tz_convert(LOCAL_TZ).tz_localize(None).to_numpy()
+    first, last = (datetime.fromtimestamp(t, LOCAL_TZ).utcoffset() for t in (seconds[0], seconds[-1]))
+    if first != last:
+        import pandas as pd
+        return pd.to_datetime(seconds, unit="s", utc=True).tz_convert(LOCAL_TZ).tz_localize(None).to_numpy()
+    return ((seconds + first.total_seconds()) * 1e9).astype("datetime64[ns]")
+
+
+class ColumnRing:
+    """Append-only window over the last ``capacity`` frames.
+
+    ``timestamp`` holds the event time as epoch seconds and
+    ``received_ns`` the receive time in nanoseconds; everything else is
+    copied from the decoded frame. Views returned by ``tail()`` and
+    ``column()`` are only valid until the next append; use ``to_frame()``
+    for a stable copy when another thread may be writing.
+    """
+
+    def __init__(self, capacity=300, columns=COLUMNS):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.total = 0
+        self.lock = threading.Lock()
+        self._names = [name for name, _, _ in columns]
+        self._timed = "received_ns" in self._names
+        # DataFrame columns: receive times become datetimes called "received"
+        self._frame_names = ["received" if name == "received_ns" else name for name in self._names]
+        self._defaults = [(name, fill) for name, _, fill in columns if name not in ("timestamp", "received_ns")]
+        self._rows = np.zeros(2 * capacity, dtype=[(name, dtype) for name, dtype, _ in columns])
+        self._end = 0
+        self._view_lock = threading.Lock()
+        self._frame = None
+        self._frame_total = 0
+        # DataFrame-ready copies of the columns, 2 x capacity rows like _rows
+        self._converted = None
+        self._converted_end = 0
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def append(self, frame, timestamp, received_ns=0):
+        with self.lock:
+            if self._end == 2 * self.capacity:
+                keep = self.capacity - 1
+                self._rows[:keep] = self._rows[self._end - keep:self._end]
+                self._end = keep
+            get = frame.get
+            self._rows[self._end] = ((timestamp, received_ns) if self._timed else (timestamp,)) + tuple([
+                fill if (value := get(name)) is None else value
+                for name, fill in self._defaults
+            ])
+            self._end += 1
+            self.total += 1
+
+    def _bounds(self, n):
+        size = len(self)
+        n = size if n is None else max(0, min(n, size))
+        return self._end - n, self._end
+
+    def column(self, name, n=None):
+        start, end = self._bounds(n)
+        return self._rows[name][start:end]
+
+    def tail(self, n=None):
+        """Zero-copy views of the newest ``n`` rows (all rows by default)."""
+        start, end = self._bounds(n)
+        rows = self._rows[start:end]
+        return {name: rows[name] for name in self._names}
+
+    def _convert(self, data):
+        data["timestamp"] = local_datetimes(data["timestamp"])
+        if self._timed:
+            data["received"] = local_datetimes(data.pop("received_ns") / 1e9)
+        return data
+
+    def _build_frame(self, data, total):
+        import pandas as pd
+
+        n = len(data["timestamp"])
+        return pd.DataFrame(self._convert(data), columns=self._frame_names, index=pd.RangeIndex(total - n, total))
+
+    def to_frame(self, n=None):
+        """Copy the newest ``n`` rows into a DataFrame with datetime columns.
+
+        The index is the absolute frame number, so it keeps increasing as
+        old rows fall out of the window.
+        """
+        with self.lock:
+            data = {name: view.copy() for name, view in self.tail(n).items()}
+            total = self.total
+        return self._build_frame(data, total)
+
+    def frame(self):
+        """Shared DataFrame of the whole window, extended incrementally.
+
+        Only the rows appended since the last call are converted; the
+        result wraps a slice of the converted columns without copying, so
+        a rerun costs O(new rows). Rows handed out are never written again
+        (compaction moves them into fresh arrays), but the returned object
+        is cached and handed to every caller, so it must not be modified
+        in place.
+        """
+        import pandas as pd
+
+        with self._view_lock:
+            with self.lock:
+                new = self.total - self._frame_total
+                if self._frame is not None and new == 0:
+                    return self._frame
+                new = min(new, self.capacity)
+                data = {name: view.copy() for name, view in self.tail(new).items()}
+                total = self.total
+            part = self._convert(data)
+            size = min(total, self.capacity)
+            end = self._converted_end
+            if self._converted is None or end + new > 2 * self.capacity:
+                # Fresh arrays, so frames already handed out keep their rows
+                keep = size - new
+                old = self._converted
+                self._converted = {name: np.empty(2 * self.capacity, dtype=column.dtype)
+                                   for name, column in part.items()}
+                if keep:
+                    for name, column in self._converted.items():
+                        column[:keep] = old[name][end - keep:end]
+                end = keep
+            for name, column in self._converted.items():
+                column[end:end + new] = part[name]
+            end += new
+            self._converted_end = end
+            self._frame = pd.DataFrame({name: self._converted[name][end - size:end] for name in self._frame_names},
+                                       index=pd.RangeIndex(total - size, total), copy=False)
+            self._frame_total = total
+            return self._frame
+
+    @property
+    def nbytes(self):
+        return self._rows.nbytes
@@ -0,0 +1,128 @@
+"""
+Risk scoring derived from the existing telemetry fields.
+
+``compute_risk_scores`` scores one frame. ``score_columns`` applies the
+same formula to whole columns at once (a worker's history, or the latest
+frames of a fleet) and returns identical values element by element.
+
+The point where each channel starts to add risk is the ``risk_onset`` of
+its rule in the shared rule table.
+"""
+import numpy as np
+
+from .rules import RULES
+
+TEMP_ONSET = RULES["body_temp"].risk_onset
+HR_ONSET = RULES["heart_rate"].risk_onset
+SPO2_ONSET = RULES["spo2"].risk_onset
+GAS_ONSET = RULES["gas_ppm"].risk_onset
+RAD_ONSET = RULES["radiation_uSvh"].risk_onset
+
+# Field and the value compute_risk_scores assumes when it is missing.
+RISK_FIELDS = (
+    ("body_temp", 0),
+    ("heart_rate", 0),
+    ("spo2", 100),
+    ("radiation_uSvh", 0),
+    ("gas_ppm", 0),
+    ("fall_detected", False),
+)
+
+
+def compute_risk_scores(latest_data):
+    if not latest_data:
+        return 0, 0, 0
+
+    temp = latest_data.get('body_temp', 0)
+    hr = latest_data.get('heart_rate', 0)
+    spo2 = latest_data.get('spo2', 100)
+    rad = latest_data.get('radiation_uSvh', 0)
+    gas = latest_data.get('gas_ppm', 0)
+    fall = latest_data.get('fall_detected', False)
+
+    # Physiological risk (0–100)
+    phys_risk = 0
+    # Temp contribution
+    if temp > TEMP_ONSET:
+        phys_risk += min((temp - TEMP_ONSET) * 25, 40)
+    # HR contribution
+    if hr > HR_ONSET:
+        phys_risk += min((hr - HR_ONSET) * 0.6, 35)
+    # SpO2 contribution
+    if spo2 < SPO2_ONSET:
+        phys_risk += min((SPO2_ONSET - spo2) * 3, 25)
+    phys_risk = max(0, min(100, phys_risk))
+
+    # Environmental risk
+    env_risk = 0
+    if gas > GAS_ONSET:
+        env_risk += min((gas - GAS_ONSET) / 3, 45)
+    if rad > RAD_ONSET:
+        env_risk += min((rad - RAD_ONSET) * 60, 35)
+    if fall:
+        env_risk += 30
+    env_risk = max(0, min(100, env_risk))
+
+    # Overall score (higher = more risky)
+    overall = int(min(100, (phys_risk * 0.55 + env_risk * 0.45)))
+    return int(phys_risk), int(env_risk), overall
+
+
+def _term(active, value):
+    # Inactive rows contribute exactly 0.0, like a skipped ``+=``.
+    return np.where(active, value, 0.0)
+
+
+def score_columns(columns):
+    """Vectorised ``compute_risk_scores`` over equal-length columns.
+
+    ``columns`` maps field names to arrays, e.g. ``ColumnRing.tail()``.
+    Missing fields take the scalar defaults and NaN never crosses a
+    threshold, which is how the scalar version treats absent values.
+    Returns ``(phys_risk, env_risk, overall)`` as int64 arrays.
+    """
+    n = len(next(iter(columns.values()))) if columns else 0
+    col = {
+        name: np.asarray(columns[name]) if name in columns else np.full(n, default)
+        for name, default in RISK_FIELDS
+    }
+    temp = col["body_temp"].astype(np.float64, copy=False)
+    hr = col["heart_rate"].astype(np.float64, copy=False)
+    spo2 = col["spo2"].astype(np.float64, copy=False)
+    rad = col["radiation_uSvh"].astype(np.float64, copy=False)
+    gas = col["gas_ppm"].astype(np.float64, copy=False)
+    fall = col["fall_detected"].astype(bool, copy=False)
+
+    with np.errstate(invalid="ignore"):
+        phys = _term(temp > TEMP_ONSET, np.minimum((temp - TEMP_ONSET) * 25, 40))
+        phys = phys + _term(hr > HR_ONSET, np.minimum((hr - HR_ONSET) * 0.6, 35))
+        phys = phys + _term(spo2 < SPO2_ONSET, np.minimum((SPO2_ONSET - spo2) * 3, 25))
+        phys = np.clip(phys, 0, 100)
+
+        env = _term(gas > GAS_ONSET, np.minimum((gas - GAS_ONSET) / 3, 45))
+        env = env + _term(rad > RAD_ONSET, np.minimum((rad - RAD_ONSET) * 60, 35))
+        env = env + _term(fall, 30.0)
+        env = np.clip(env, 0, 100)
+
+    overall = np.minimum(100, phys * 0.55 + env * 0.45)
+    return phys.astype(np.int64), env.astype(np.int64), overall.astype(np.int64)
+
+
+def score_frames(frames):
+    """Score a sequence of frame dicts in one pass (e.g. a fleet's latest frames).
+
+    Empty frames score 0, like ``compute_risk_scores``; ``None`` values
+    count as missing.
+    """
+    columns = {}
+    for name, default in RISK_FIELDS:
+        if name == "fall_detected":
+            columns[name] = np.fromiter(
+                (bool(frame.get(name, False)) for frame in frames), bool, len(frames)
+            )
+        else:
+            columns[name] = np.fromiter(
+                (v if (v := frame.get(name, default)) is not None else np.nan for frame in frames),
+                np.float64, len(frames),
+            )
+    return score_columns(columns)
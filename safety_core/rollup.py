@@ -0,0 +1,216 @@
+"""
+Multi-resolution rollups and visual downsampling for long trend charts.
+
+Each worker keeps four tiers of fixed-width time buckets (1 s, 10 s,
+1 min and 15 min), each with the count, mean, min and max of every
+summary channel. Only the 1 s tier sees individual frames. When a bucket
+closes it is folded into the next coarser tier, so ingest costs one
+bucket update per frame plus an occasional cascade. Closed buckets live
+in ``ColumnRing`` buffers, which keeps memory per worker fixed.
+
+``lttb`` (Largest-Triangle-Three-Buckets) then picks the points that
+preserve a series' visual shape, so a chart of any span sends a bounded
+number of points to the browser.
+"""
+import math
+import threading
+
+import numpy as np
+
+from .ring_buffer import ColumnRing
+from .stats import SUMMARY_CHANNELS
+
+# (label, bucket width in seconds, buckets kept)
+TIERS = (
+    ("1 s", 1, 15 * 60),
+    ("10 s", 10, 6 * 360),
+    ("1 min", 60, 24 * 60),
+    ("15 min", 15 * 60, 7 * 96),
+)
+STATS = ("mean", "min", "max")
+
+
+class RollupTier:
+    """Fixed-width buckets of one resolution.
+
+    ``merge`` folds partial aggregates into the open bucket. Closing a
+    bucket appends it to the ring and passes it on to ``coarser``.
+    """
+
+    def __init__(self, seconds, capacity, channels=SUMMARY_CHANNELS, coarser=None):
+        self.seconds = seconds
+        self.channels = channels
+        self.coarser = coarser
+        columns = [("timestamp", np.float64, np.nan), ("frames", np.int32, 0)]
+        columns += [(f"{ch}_{stat}", np.float32, np.nan) for ch in channels for stat in STATS]
+        self.buckets = ColumnRing(capacity, columns)
+        self._names = [tuple(f"{ch}_{stat}" for stat in STATS) for ch in channels]
+        self._bucket = None
+        self._frames = 0
+        self._acc = None
+
+    @property
+    def span(self):
+        """Seconds of history the closed buckets can hold."""
+        return self.seconds * self.buckets.capacity
+
+    def merge(self, t, frames, acc):
+        """Add ``frames`` samples summarised by ``acc`` (per channel
+        ``[count, sum, min, max]``) at time ``t``."""
+        bucket = math.floor(t / self.seconds)
+        if self._bucket is None:
+            self._open(bucket)
+        elif bucket > self._bucket:
+            self._close()
+            self._open(bucket)
+        # A sample older than the open bucket (clock step back) is kept in it.
+        self._frames += frames
+        for mine, theirs in zip(self._acc, acc):
+            if theirs[0]:
+                if mine[0]:
+                    mine[0] += theirs[0]
+                    mine[1] += theirs[1]
+                    if theirs[2] < mine[2]:
+                        mine[2] = theirs[2]
+                    if theirs[3] > mine[3]:
+                        mine[3] = theirs[3]
+                else:
+                    mine[:] = theirs
+
+    def _open(self, bucket):
+        self._bucket = bucket
+        self._frames = 0
+        self._acc = [[0, 0.0, 0.0, 0.0] for _ in self.channels]
+
+    def _close(self):
+        start = self._bucket * self.seconds
+        self.buckets.append(self._row(), start)
+        if self.coarser is not None:
+            self.coarser.merge(start, self._frames, self._acc)
+
+    def _row(self):
+        row = {"frames": self._frames}
+        for (mean, low, high), (n, s, lo, hi) in zip(self._names, self._acc):
+            if n:
+                row[mean] = s / n
+                row[low] = lo
+                row[high] = hi
+        return row
+
+    def window(self, start):
+        """Copies of all buckets starting at or after ``start``, including
+        the open one."""
+        with self.buckets.lock:
+            ts = self.buckets.column("timestamp")
+            first = np.searchsorted(ts, start, "left")
+            data = {name: view[first:].copy() for name, view in self.buckets.tail().items()}
+        if self._bucket is not None:
+            row = self._row()
+            data["timestamp"] = np.append(data["timestamp"], self._bucket * self.seconds)
+            for name in data:
+                if name != "timestamp":
+                    data[name] = np.append(data[name], row.get(name, np.nan))
+        return data
+
+
+class Rollups:
+    """All tiers for one worker, fed one frame at a time."""
+
+    def __init__(self, channels=SUMMARY_CHANNELS, tiers=TIERS):
+        self.channels = channels
+        coarser = None
+        built = []
+        for label, seconds, capacity in reversed(tiers):
+            coarser = RollupTier(seconds, capacity, channels, coarser)
+            built.append((label, coarser))
+        self.tiers = dict(reversed(built))
+        self._finest = coarser
+        self._lock = threading.Lock()
+
+    def update(self, frame, t):
+        acc = []
+        for ch in self.channels:
+            x = frame.get(ch)
+            if x is None or x != x:
+                acc.append((0, 0.0, 0.0, 0.0))
+            else:
+                acc.append((1, x, x, x))
+        with self._lock:
+            self._finest.merge(t, 1, acc)
+
+    def pick_tier(self, span, max_buckets=1500):
+        """Finest tier that covers ``span`` seconds in at most ``max_buckets``."""
+        tiers = list(self.tiers.items())
+        for label, tier in tiers:
+            if tier.span >= span and span / tier.seconds <= max_buckets:
+                return label, tier
+        return tiers[-1]
+
+    def series(self, span, now, max_buckets=1500):
+        """Buckets of the chosen tier covering the last ``span`` seconds.
+
+        Returns ``(label, data)`` where ``data`` maps ``timestamp``,
+        ``frames`` and ``<channel>_<stat>`` to arrays.
+        """
+        label, tier = self.pick_tier(span, max_buckets)
+        with self._lock:
+            return label, tier.window(now - span)
+
+
+def lttb(x, y, threshold):
+    """Indices of ``threshold`` points that keep the shape of ``y(x)``.
+
+    Largest-Triangle-Three-Buckets: the first and last points are always
+    kept, and from every bucket in between the point forming the largest
+    triangle with the previously chosen point and the next bucket's
+    average. NaNs are treated as 0 for selection.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    every = (n - 2) / (threshold - 2)
+    # Bucket k covers [edges[k], edges[k + 1]); the last "bucket" is the final point.
+    edges = (np.arange(threshold - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+    bounds = np.append(edges, n)
+    counts = np.diff(bounds)
+    avg_x = np.add.reduceat(x, edges) / counts
+    avg_y = np.add.reduceat(y, edges) / counts
+
+    picked = np.empty(threshold, dtype=np.int64)
+    picked[0] = a = 0
+    small = every < 64
+    if small:
+        # Buckets of a few points: plain floats beat per-bucket array ops.
+        xs, ys, edges, avg_x, avg_y = x.tolist(), y.tolist(), edges.tolist(), avg_x.tolist(), avg_y.tolist()
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        dx = x[a] - avg_x[i + 1]
+        dy = avg_y[i + 1] - y[a]
+        if small:
+            xa, ya = xs[a], ys[a]
+            best = -1.0
+            for j in range(start, end):
+                area = abs(dx * (ys[j] - ya) - (xa - xs[j]) * dy)
+                if area > best:
+                    best, a = area, j
+        else:
+            area = np.abs(dx * (y[start:end] - y[a]) - (x[a] - x[start:end]) * dy)
+            a = start + int(np.argmax(area))
+        picked[i + 1] = a
+    picked[-1] = n - 1
+    return picked
+
+
+def downsample(x, columns, max_points):
+    """Union of the LTTB picks of every series in ``columns``.
+
+    All series share ``x``, so the result can index one wide table; it
+    holds at most ``len(columns) * max_points`` rows.
+    """
+    if len(x) <= max_points:
+        return np.arange(len(x))
+    picks = [lttb(x, y, max_points) for y in columns]
+    return np.unique(np.concatenate(picks))
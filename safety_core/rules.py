@@ -0,0 +1,136 @@
+"""
+Threshold rules shared by ingest, the status pills and risk scoring.
+
+The rule table lives in ``rules.json`` next to this module; set
+``SAFETY_RULES_FILE`` to load a site-specific table instead. Each rule
+maps one telemetry field to NORMAL / WARNING / CRITICAL:
+
+* ``above``: WARNING when the value exceeds ``warning``, CRITICAL when it
+  exceeds ``critical``.
+* ``below``: the same with the comparisons reversed (e.g. SpO2).
+* ``flag``: CRITICAL whenever the field is truthy (e.g. fall detection).
+
+``risk_onset`` is the value at which ``compute_risk_scores`` starts adding
+to the risk score; it defaults to the warning threshold.
+
+A ``RuleSet`` compiles its table into one generated function, so
+classifying a frame is a single call with the thresholds inlined instead
+of a loop over rule objects.
+"""
+import json
+import os
+
+import numpy as np
+
+NORMAL, WARNING, CRITICAL = 0, 1, 2
+LEVEL_NAMES = ("NORMAL", "WARNING", "CRITICAL")
+DIRECTIONS = ("above", "below", "flag")
+RULES_FILE = os.path.join(os.path.dirname(__file__), "rules.json")
+
+
+class Rule:
+    """Thresholds for one telemetry field."""
+
+    __slots__ = ("field", "direction", "warning", "critical", "risk_onset")
+
+    def __init__(self, field, direction, warning=None, critical=None, risk_onset=None):
+        if direction not in DIRECTIONS:
+            raise ValueError(f"{field}: unknown direction {direction!r}")
+        if direction != "flag":
+            if warning is None or critical is None:
+                raise ValueError(f"{field}: 'warning' and 'critical' are required")
+            if (critical < warning) if direction == "above" else (critical > warning):
+                raise ValueError(f"{field}: critical threshold is inside the warning band")
+        self.field = field
+        self.direction = direction
+        self.warning = warning
+        self.critical = critical
+        self.risk_onset = warning if risk_onset is None else risk_onset
+
+    def source(self):
+        """Python expression for this rule's level, given the value ``v``."""
+        if self.direction == "flag":
+            return "CRITICAL if v and v == v else NORMAL"
+        op = ">" if self.direction == "above" else "<"
+        return (
+            f"NORMAL if v is None else CRITICAL if v {op} {self.critical!r} "
+            f"else WARNING if v {op} {self.warning!r} else NORMAL"
+        )
+
+
+class RuleSet:
+    """A compiled rule table.
+
+    ``classify(frame)`` returns ``{field: level}`` for every rule; missing,
+    ``None`` and NaN values are NORMAL. ``classify_columns`` does the same
+    for whole arrays.
+    """
+
+    def __init__(self, rules):
+        self.rules = tuple(rules)
+        self.fields = tuple(rule.field for rule in self.rules)
+        if len(set(self.fields)) != len(self.fields):
+            raise ValueError("each field may only have one rule")
+        self._by_field = {rule.field: rule for rule in self.rules}
+        self.classify = self._compile()
+
+    def _compile(self):
+        lines = ["def classify(frame):", "    get = frame.get", "    levels = {}"]
+        for rule in self.rules:
+            lines.append(f"    v = get({rule.field!r})")
+            lines.append(f"    levels[{rule.field!r}] = {rule.source()}")
+        lines.append("    return levels")
+        namespace = {"NORMAL": NORMAL, "WARNING": WARNING, "CRITICAL": CRITICAL}
+        exec(compile("\n".join(lines), "<rules>", "exec"), namespace)
+        return namespace["classify"]
+
+    def __getitem__(self, field):
+        return self._by_field[field]
+
+    def __contains__(self, field):
+        return field in self._by_field
+
+    def classify_columns(self, columns):
+        """Vectorised ``classify`` over a mapping of equal-length arrays.
+
+        Fields absent from ``columns`` are left out of the result.
+        """
+        levels = {}
+        for rule in self.rules:
+            if rule.field not in columns:
+                continue
+            v = np.asarray(columns[rule.field])
+            if rule.direction == "flag":
+                hit = v.astype(bool) if v.dtype == bool else np.nan_to_num(v.astype(np.float64)) != 0
+                levels[rule.field] = np.where(hit, CRITICAL, NORMAL).astype(np.int8)
+                continue
+            v = v.astype(np.float64, copy=False)
+            if rule.direction == "above":
+                crit, warn = v > rule.critical, v > rule.warning
+            else:
+                crit, warn = v < rule.critical, v < rule.warning
+            levels[rule.field] = np.select([crit, warn], [CRITICAL, WARNING], NORMAL).astype(np.int8)
+        return levels
+
+
+def worst(levels, fields=None):
+    """Highest level among ``fields`` (all fields by default)."""
+    if fields is None:
+        return max(levels.values(), default=NORMAL)
+    return max((levels.get(field, NORMAL) for field in fields), default=NORMAL)
+
+
+def load_rules(path=None):
+    """Build a RuleSet from a JSON rule table.
+
+    ``path`` defaults to ``$SAFETY_RULES_FILE`` and then to the bundled
+    ``rules.json``.
+    """
+    path = path or os.environ.get("SAFETY_RULES_FILE") or RULES_FILE
+    with open(path) as f:
+        table = json.load(f)
+    return RuleSet(Rule(**entry) for entry in table["rules"])
+
+
+# Process-wide table, loaded once at import.
+RULES = load_rules()
@@ -0,0 +1,163 @@
+"""
+Streaming statistics for the Safety Statistics Summary.
+
+Every accumulator is updated once per frame in O(1) (amortised for the
+sliding windows), so the summary covers the whole shift without ever
+rescanning history. A gap longer than ``SHIFT_BREAK`` starts a new shift,
+as for exposure, and windows also expire when read, so a worker who
+stops reporting drops out of them.
+"""
+import math
+import threading
+from collections import deque
+
+from .exposure import SHIFT_BREAK
+
+SUMMARY_CHANNELS = ("body_temp", "heart_rate", "spo2", "radiation_uSvh", "gas_ppm")
+WINDOWS = {"5 min": 5 * 60, "1 hour": 60 * 60}
+
+
+class RunningStats:
+    """Count, mean, variance, min and max using Welford's update."""
+
+    __slots__ = ("count", "mean", "_m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class WindowStats:
+    """Statistics over the samples of the last ``seconds``.
+
+    Mean and variance use Welford's update with removal; min and max come
+    from monotonic deques, so each sample is pushed and popped once.
+    """
+
+    __slots__ = ("seconds", "count", "mean", "_m2", "_samples", "_min_q", "_max_q")
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._samples = deque()
+        self._min_q = deque()
+        self._max_q = deque()
+
+    def update(self, t, x):
+        self._expire(t)
+        self._samples.append((t, x))
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        while self._min_q and self._min_q[-1][1] >= x:
+            self._min_q.pop()
+        self._min_q.append((t, x))
+        while self._max_q and self._max_q[-1][1] <= x:
+            self._max_q.pop()
+        self._max_q.append((t, x))
+
+    def _expire(self, now):
+        cutoff = now - self.seconds
+        samples = self._samples
+        while samples and samples[0][0] <= cutoff:
+            _, x = samples.popleft()
+            self.count -= 1
+            if self.count == 0:
+                self.mean = 0.0
+                self._m2 = 0.0
+            else:
+                delta = x - self.mean
+                self.mean -= delta / self.count
+                self._m2 = max(0.0, self._m2 - delta * (x - self.mean))
+        while self._min_q and self._min_q[0][0] <= cutoff:
+            self._min_q.popleft()
+        while self._max_q and self._max_q[0][0] <= cutoff:
+            self._max_q.popleft()
+
+    @property
+    def min(self):
+        return self._min_q[0][1] if self._min_q else math.inf
+
+    @property
+    def max(self):
+        return self._max_q[0][1] if self._max_q else -math.inf
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class ShiftStats:
+    """Full-shift and sliding-window accumulators for each summary channel.
+
+    ``shift_start`` is the event time of the shift's first frame.
+    """
+
+    def __init__(self, channels=SUMMARY_CHANNELS, windows=WINDOWS):
+        self.channels = channels
+        self.shift = {ch: RunningStats() for ch in channels}
+        self.windows = {
+            label: {ch: WindowStats(seconds) for ch in channels}
+            for label, seconds in windows.items()
+        }
+        self.shift_start = None
+        self.last_t = None
+        # Readers expire windows while the ingest thread updates them
+        self._lock = threading.Lock()
+
+    def update(self, frame, t):
+        with self._lock:
+            if self.last_t is None or t - self.last_t > SHIFT_BREAK:
+                self.shift = {ch: RunningStats() for ch in self.channels}
+                self.shift_start = t
+            self.last_t = t
+            for ch in self.channels:
+                x = frame.get(ch)
+                if x is None or x != x:
+                    continue
+                self.shift[ch].update(x)
+                for stats in self.windows.values():
+                    stats[ch].update(t, x)
+
+    def view(self, window=None, now=None):
+        """Per-channel accumulators for the shift (``None``) or a window label.
+
+        With ``now``, window samples older than the window are dropped
+        first, whether or not the worker is still reporting.
+        """
+        if window is None:
+            return self.shift
+        stats = self.windows[window]
+        if now is not None:
+            with self._lock:
+                for channel in stats.values():
+                    channel._expire(now)
+        return stats
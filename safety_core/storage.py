@@ -0,0 +1,367 @@
+"""
+Durable, append-only telemetry store for shift- and month-long retention.
+
+Frames are buffered per worker and written in batches to binary segment
+files: a 16-byte header followed by fixed-size records with the same
+columns as the in-memory ``ColumnRing``. Each worker has its own
+directory and a segment is closed after ``segment_rows`` records, so a
+query for one worker never touches another worker's data.
+
+The time index is the segment list itself. Every segment knows the
+first and last receive time it holds, and timestamps are increasing
+inside a segment (a clock step backwards starts a new one). A range
+query therefore picks the overlapping segments, memory-maps them and
+binary-searches the timestamp column. Only the matching rows are read
+from disk.
+
+A crash can leave a segment without a complete header; such files, and
+files that do not start with the segment magic, are renamed to
+``*.seg.bad`` and skipped when the store opens. A partial last record
+is truncated.
+
+Alerts are appended to ``alerts.jsonl`` in the same directory, through
+one line-buffered handle; a line torn by a crash is dropped. Small
+state checkpoints (``write_state``) are JSON files next to it, replaced
+atomically.
+
+Version 2 segments add the ``received_ns`` column and index on event
+time. Version 1 segments (receive time only) are still read; their rows
+come back with ``received_ns`` derived from the timestamp.
+"""
+import json
+import os
+import struct
+import threading
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+from .ring_buffer import COLUMNS
+
+MAGIC = b"WSSEG"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<5sBH8x")  # magic, version, record size, padding
+SEGMENT_SUFFIX = ".seg"
+QUARANTINE_SUFFIX = ".bad"
+
+
+def segment_dtype(columns=COLUMNS):
+    return np.dtype([(name, dtype) for name, dtype, _ in columns])
+
+
+def legacy_dtype(dtype):
+    """Record layout of version 1 segments: no ``received_ns`` column."""
+    return np.dtype([(name, dtype.fields[name][0]) for name in dtype.names if name != "received_ns"])
+
+
+class Segment:
+    """One segment file: its path, row count, time range and record layout."""
+
+    __slots__ = ("path", "rows", "t_first", "t_last", "dtype")
+
+    def __init__(self, path, rows=0, t_first=None, t_last=None, dtype=None):
+        self.path = path
+        self.rows = rows
+        self.t_first = t_first
+        self.t_last = t_last
+        self.dtype = dtype
+
+    def overlaps(self, start, end):
+        return self.rows > 0 and self.t_first <= end and self.t_last >= start
+
+
+class WorkerLog:
+    """Segments and write buffer of one worker. Callers hold the store lock."""
+
+    def __init__(self, directory, dtype, segment_rows):
+        self.directory = directory
+        self.dtype = dtype
+        self.segment_rows = segment_rows
+        self.segments = []
+        self.pending = []
+        self._file = None
+        # Next segment's sequence number, past any quarantined ones
+        self._sequence = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(SEGMENT_SUFFIX))
+        for name in names:
+            prefix = name.split("-", 1)[0]
+            if prefix.isdigit():
+                self._sequence = max(self._sequence, int(prefix) + 1)
+            path = os.path.join(self.directory, name)
+            with open(path, "rb") as f:
+                header = f.read(HEADER.size)
+            if len(header) < HEADER.size or not header.startswith(MAGIC):
+                # Crashed before the header was written, or not a segment
+                os.replace(path, path + QUARANTINE_SUFFIX)
+                continue
+            magic, version, size = HEADER.unpack(header)
+            dtype = self.dtype if version == FORMAT_VERSION else legacy_dtype(self.dtype) if version == 1 else None
+            if magic != MAGIC or dtype is None or size != dtype.itemsize:
+                raise ValueError(f"{path}: not a version {FORMAT_VERSION} segment for these columns")
+            body = os.path.getsize(path) - HEADER.size
+            rows = body // size
+            if body % size:
+                # A crash mid-write left a partial record; drop it.
+                with open(path, "r+b") as f:
+                    f.truncate(HEADER.size + rows * size)
+            segment = Segment(path, rows, dtype=dtype)
+            if rows:
+                ts = self._map(segment)["timestamp"]
+                segment.t_first, segment.t_last = float(ts[0]), float(ts[-1])
+            self.segments.append(segment)
+
+    def _map(self, segment):
+        return np.memmap(segment.path, segment.dtype, mode="r", offset=HEADER.size, shape=(segment.rows,))
+
+    def read(self, segment, lo, hi):
+        """Rows ``lo:hi`` of a segment as an array of the current layout."""
+        rows = np.array(self._map(segment)[lo:hi])
+        if segment.dtype == self.dtype:
+            return rows
+        out = np.zeros(len(rows), self.dtype)
+        for name in rows.dtype.names:
+            out[name] = rows[name]
+        out["received_ns"] = (rows["timestamp"] * 1e9).astype(np.int64)
+        return out
+
+    def _open_segment(self, t_first):
+        self.close()
+        # Sequence number first, so file names sort in write order.
+        name = f"{self._sequence:08d}-{int(t_first * 1e6):d}{SEGMENT_SUFFIX}"
+        self._sequence += 1
+        path = os.path.join(self.directory, name)
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, FORMAT_VERSION, self.dtype.itemsize))
+        segment = Segment(path, dtype=self.dtype)
+        self.segments.append(segment)
+        return segment
+
+    def write(self, rows):
+        """Append a structured array of rows to the active segment(s)."""
+        ts = rows["timestamp"]
+        start = 0
+        while start < len(rows):
+            segment = self.segments[-1] if self._file is not None else None
+            if (segment is None or segment.rows >= self.segment_rows
+                    or (segment.rows and ts[start] < segment.t_last)):
+                segment = self._open_segment(ts[start])
+            room = self.segment_rows - segment.rows
+            end = min(len(rows), start + room)
+            # Stop early where the clock steps backwards; the next pass opens a new segment.
+            back = np.flatnonzero(np.diff(ts[start:end]) < 0)
+            if len(back):
+                end = start + back[0] + 1
+            chunk = rows[start:end]
+            self._file.write(chunk.tobytes())
+            if segment.rows == 0:
+                segment.t_first = float(chunk["timestamp"][0])
+            segment.t_last = float(chunk["timestamp"][-1])
+            segment.rows += len(chunk)
+            start = end
+        self._file.flush()
+
+    def flush(self):
+        if self.pending:
+            rows = np.array(self.pending, dtype=self.dtype)
+            self.pending = []
+            self.write(rows)
+
+    def snapshot(self, start, end):
+        """Segments overlapping ``[start, end]`` with their current row counts."""
+        return [
+            Segment(s.path, s.rows, s.t_first, s.t_last, s.dtype)
+            for s in self.segments if s.overlaps(start, end)
+        ]
+
+    def close(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+
+class TelemetryStore:
+    """Append-only segment store keyed by worker ID.
+
+    ``append()`` is cheap and only buffers; rows reach disk when a
+    worker's buffer holds ``batch_size`` rows, when ``flush()`` is called,
+    or every ``flush_interval`` seconds once ``start()`` has launched the
+    background flusher.
+    """
+
+    def __init__(self, root, batch_size=256, flush_interval=1.0, segment_rows=1 << 16, columns=COLUMNS):
+        self.root = root
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.segment_rows = segment_rows
+        self.dtype = segment_dtype(columns)
+        self._defaults = [(name, fill) for name, _, fill in columns if name not in ("timestamp", "received_ns")]
+        self._logs = {}
+        self._lock = threading.Lock()
+        self._alert_lock = threading.Lock()
+        self._alert_file = None
+        self._stop = threading.Event()
+        self._thread = None
+        os.makedirs(root, exist_ok=True)
+        for name in sorted(os.listdir(root)):
+            if name.startswith("w-") and os.path.isdir(os.path.join(root, name)):
+                self._log(unquote(name[2:]))
+
+    def _log(self, worker_id):
+        log = self._logs.get(worker_id)
+        if log is None:
+            directory = os.path.join(self.root, "w-" + quote(worker_id, safe=""))
+            log = self._logs[worker_id] = WorkerLog(directory, self.dtype, self.segment_rows)
+        return log
+
+    # --------------------------------------------------
+    # WRITING
+    # --------------------------------------------------
+    def append(self, worker_id, frame, timestamp, received_ns=0):
+        get = frame.get
+        row = (timestamp, received_ns) + tuple([
+            fill if (value := get(name)) is None else value
+            for name, fill in self._defaults
+        ])
+        with self._lock:
+            log = self._log(worker_id)
+            log.pending.append(row)
+            if len(log.pending) >= self.batch_size:
+                log.flush()
+
+    def extend(self, worker_id, rows):
+        """Write a structured array of rows (``self.dtype``) straight to disk."""
+        rows = np.asarray(rows, dtype=self.dtype)
+        with self._lock:
+            log = self._log(worker_id)
+            log.flush()
+            log.write(rows)
+
+    def _open_alerts(self):
+        path = os.path.join(self.root, "alerts.jsonl")
+        with open(path, "a+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size:
+                # Drop a line torn by a crash so the next alert starts clean
+                f.seek(max(0, size - 4096))
+                tail = f.read()
+                if not tail.endswith(b"\n"):
+                    f.truncate(size - len(tail) + tail.rfind(b"\n") + 1)
+        return open(path, "a", buffering=1)
+
+    def append_alert(self, alert, timestamp):
+        line = json.dumps({"t": timestamp, **alert}, default=str)
+        with self._alert_lock:
+            if self._alert_file is None:
+                self._alert_file = self._open_alerts()
+            self._alert_file.write(line + "\n")
+
+    def flush(self):
+        with self._lock:
+            for log in self._logs.values():
+                log.flush()
+
+    def write_state(self, name, state):
+        """Replace the checkpoint ``name`` with ``state`` (anything JSON can hold)."""
+        path = os.path.join(self.root, f"{name}.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+    def read_state(self, name):
+        """The checkpoint ``name``, or ``None`` if none was written."""
+        path = os.path.join(self.root, f"{name}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def start(self):
+        """Start the background flusher. Safe to call more than once."""
+        if self._thread is not None or not self.flush_interval:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._flush_loop, name="telemetry-store", daemon=True)
+        self._thread.start()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            for log in self._logs.values():
+                log.flush()
+                log.close()
+        with self._alert_lock:
+            if self._alert_file is not None:
+                self._alert_file.close()
+                self._alert_file = None
+
+    # --------------------------------------------------
+    # QUERIES
+    # --------------------------------------------------
+    def worker_ids(self):
+        with self._lock:
+            return sorted(self._logs)
+
+    def query(self, worker_id, start=None, end=None):
+        """Rows of one worker with event times in ``[start, end]`` (epoch seconds).
+
+        Returns a structured array in segment order, including rows that
+        are still buffered.
+        """
+        start = -np.inf if start is None else start
+        end = np.inf if end is None else end
+        with self._lock:
+            log = self._logs.get(worker_id)
+            if log is None:
+                return np.empty(0, dtype=self.dtype)
+            segments = log.snapshot(start, end)
+            pending = np.array(log.pending, dtype=self.dtype)
+        parts = []
+        for segment in segments:
+            ts = log._map(segment)["timestamp"]
+            lo = np.searchsorted(ts, start, "left")
+            hi = np.searchsorted(ts, end, "right")
+            if hi > lo:
+                parts.append(log.read(segment, lo, hi))
+        if len(pending):
+            ts = pending["timestamp"]
+            parts.append(pending[(ts >= start) & (ts <= end)])
+        if not parts:
+            return np.empty(0, dtype=self.dtype)
+        return np.concatenate(parts)
+
+    def query_alerts(self, start=None, end=None, worker_id=None):
+        """Stored alerts in ``[start, end]``, oldest first."""
+        path = os.path.join(self.root, "alerts.jsonl")
+        if not os.path.exists(path):
+            return []
+        start = -np.inf if start is None else start
+        end = np.inf if end is None else end
+        with self._alert_lock, open(path) as f:
+            lines = [line for line in f if line.strip()]
+        alerts = []
+        for i, line in enumerate(lines):
+            try:
+                alerts.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Only the last line can be torn (by a crash mid-write)
+                if i < len(lines) - 1:
+                    raise
+        return [
+            a for a in alerts
+            if start <= a["t"] <= end and (worker_id is None or a.get("worker_id") == worker_id)
+        ]
@@ -0,0 +1,5 @@
+"""
+Developer tools for exercising the dashboard without real devices:
+recording and replaying MQTT traffic, synthesising virtual workers, and
+a minimal local MQTT broker.
+"""
@@ -0,0 +1,169 @@
+"""
+Minimal local MQTT broker for development and load tests.
+
+    python -m tools.broker --port 1883
+
+Speaks the subset of MQTT 3.1.1 that the dashboard and the replay tool
+use: CONNECT, SUBSCRIBE/UNSUBSCRIBE with ``+`` and ``#`` wildcards,
+PUBLISH at QoS 0 and 1 (delivered onward at QoS 0), PINGREQ and
+DISCONNECT. There are no retained messages, sessions or authentication.
+It is a stand-in for ``broker.emqx.io`` on a laptop or in CI, not a
+production broker.
+
+A subscriber whose socket buffer passes ``max_buffer`` bytes is skipped
+for that message, and the skip is counted, so one stalled client cannot
+grow the broker's memory.
+"""
+import argparse
+import asyncio
+import struct
+
+CONNECT, CONNACK, PUBLISH, PUBACK = 1, 2, 3, 4
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK = 8, 9, 10, 11
+PINGREQ, PINGRESP, DISCONNECT = 12, 13, 14
+MAX_BUFFER = 8 << 20
+
+
+def topic_matches(pattern, topic):
+    """MQTT filter matching with ``+`` (one level) and ``#`` (the rest)."""
+    pattern_parts = pattern.split("/")
+    topic_parts = topic.split("/")
+    for i, part in enumerate(pattern_parts):
+        if part == "#":
+            return True
+        if i >= len(topic_parts) or (part != "+" and part != topic_parts[i]):
+            return False
+    return len(pattern_parts) == len(topic_parts)
+
+
+def encode_length(n):
+    out = bytearray()
+    while True:
+        n, digit = divmod(n, 128)
+        out.append(digit | (0x80 if n else 0))
+        if not n:
+            return bytes(out)
+
+
+def packet(kind, flags, body):
+    return bytes([kind << 4 | flags]) + encode_length(len(body)) + body
+
+
+def _string(data, offset):
+    (n,) = struct.unpack_from("!H", data, offset)
+    return data[offset + 2:offset + 2 + n].decode(), offset + 2 + n
+
+
+class LocalBroker:
+    """In-process MQTT broker on asyncio streams."""
+
+    def __init__(self, host="127.0.0.1", port=1883, max_buffer=MAX_BUFFER):
+        self.host = host
+        self.port = port
+        self.max_buffer = max_buffer
+        self.published = 0
+        self.delivered = 0
+        self.skipped = 0
+        self._subscriptions = {}  # writer -> set of filters
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        """Stop accepting clients and drop the connected ones."""
+        if self._server is not None:
+            self._server.close()
+        for writer in list(self._subscriptions):
+            writer.close()
+
+    async def _read_packet(self, reader):
+        head = await reader.readexactly(1)
+        length = shift = 0
+        while True:
+            (byte,) = await reader.readexactly(1)
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        body = await reader.readexactly(length) if length else b""
+        return head[0] >> 4, head[0] & 0x0F, body
+
+    async def _serve(self, reader, writer):
+        filters = self._subscriptions[writer] = set()
+        try:
+            while True:
+                kind, flags, body = await self._read_packet(reader)
+                if kind == CONNECT:
+                    writer.write(packet(CONNACK, 0, b"\x00\x00"))
+                elif kind == PUBLISH:
+                    topic, offset = _string(body, 0)
+                    qos = flags >> 1 & 3
+                    if qos:
+                        writer.write(packet(PUBACK, 0, body[offset:offset + 2]))
+                        offset += 2
+                    self.publish(topic, body[offset:])
+                elif kind == SUBSCRIBE:
+                    packet_id, offset = body[:2], 2
+                    granted = bytearray()
+                    while offset < len(body):
+                        pattern, offset = _string(body, offset)
+                        offset += 1  # requested QoS; everything is QoS 0
+                        filters.add(pattern)
+                        granted.append(0)
+                    writer.write(packet(SUBACK, 0, packet_id + bytes(granted)))
+                elif kind == UNSUBSCRIBE:
+                    packet_id, offset = body[:2], 2
+                    while offset < len(body):
+                        pattern, offset = _string(body, offset)
+                        filters.discard(pattern)
+                    writer.write(packet(UNSUBACK, 0, packet_id))
+                elif kind == PINGREQ:
+                    writer.write(packet(PINGRESP, 0, b""))
+                elif kind == DISCONNECT:
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            del self._subscriptions[writer]
+            writer.close()
+
+    def publish(self, topic, payload):
+        """Deliver ``payload`` to every matching subscriber at QoS 0."""
+        self.published += 1
+        encoded = topic.encode()
+        message = None
+        for writer, filters in self._subscriptions.items():
+            if not any(topic_matches(pattern, topic) for pattern in filters):
+                continue
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                self.skipped += 1
+                continue
+            if message is None:
+                message = packet(PUBLISH, 0, struct.pack("!H", len(encoded)) + encoded + payload)
+            writer.write(message)
+            self.delivered += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1883)
+    args = parser.parse_args()
+    broker = LocalBroker(args.host, args.port)
+    print(f"Local MQTT broker on {args.host}:{args.port}")
+    try:
+        asyncio.run(broker.serve_forever())
+    except KeyboardInterrupt:
+        print(f"published {broker.published:,}, delivered {broker.delivered:,}, skipped {broker.skipped:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Recording file format for MQTT traffic.
+
+A recording is an 8-byte header followed by one record per message:
+
+    float64  receive time (epoch seconds)
+    uint16   topic length
+    uint32   payload length
+    bytes    topic (UTF-8), then the payload as received
+
+Payloads are stored verbatim, so JSON and binary frames replay exactly
+as the broker delivered them.
+"""
+import struct
+
+MAGIC = b"WSREC"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<5sB2x")
+RECORD = struct.Struct("<dHI")
+
+
+class RecordingWriter:
+    """Appends ``(t, topic, payload)`` records to a recording file."""
+
+    def __init__(self, path):
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, FORMAT_VERSION))
+        self.count = 0
+
+    def write(self, t, topic, payload):
+        topic = topic.encode()
+        self._file.write(RECORD.pack(t, len(topic), len(payload)) + topic + payload)
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_recording(path):
+    """Yield ``(t, topic, payload)`` from a recording, in file order."""
+    with open(path, "rb") as f:
+        magic, version = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path}: not a version {FORMAT_VERSION} recording")
+        while True:
+            head = f.read(RECORD.size)
+            if len(head) < RECORD.size:
+                return
+            t, topic_len, payload_len = RECORD.unpack(head)
+            body = f.read(topic_len + payload_len)
+            if len(body) < topic_len + payload_len:
+                return  # truncated by an interrupted recorder
+            yield t, body[:topic_len].decode(), body[topic_len:]
+
+
+def write_recording(path, messages):
+    """Write an iterable of ``(t, topic, payload)``; returns the count."""
+    with RecordingWriter(path) as writer:
+        for t, topic, payload in messages:
+            writer.write(t, topic, payload)
+        return writer.count
@@ -0,0 +1,213 @@
+"""
+Record, replay and synthesise dashboard traffic.
+
+    python -m tools.replay record shift.rec --host broker.emqx.io --duration 600
+    python -m tools.replay play shift.rec --speed 10 --target broker --host 127.0.0.1
+    python -m tools.replay play shift.rec --speed max --target hub
+    python -m tools.replay synth fleet.rec --workers 200 --minutes 60 [--binary]
+    python -m tools.replay synth --workers 50 --minutes 10 --speed 1 --target broker
+    python -m tools.replay synth --workers 1000 --minutes 5 --imu-hz 100 --binary --speed max --target hub
+
+``record`` subscribes to the data and alert topics and writes every
+message with its receive time. ``play`` sends a recording at 1x, 10x,
+100x or maximum speed, keeping the original spacing scaled by the speed.
+``synth`` generates virtual workers (see ``tools.synth``) and either
+writes a recording (given a path) or plays them straight away.
+
+Targets:
+
+* ``broker``: publish to an MQTT broker, e.g. ``python -m tools.broker``
+  with the dashboard started as ``SAFETY_MQTT_HOST=127.0.0.1 streamlit
+  run wearable_suit_app.py``.
+* ``hub``: hand each message to ``TelemetryHub.receive`` of an
+  in-process hub with one attached session, i.e. straight into decoding,
+  fleet ingest and the session queues, then print throughput and the
+  hub's counters. Messages are stamped with their recorded time rather
+  than the wall clock, so device timestamps, reorder holds and fall
+  windows line up at any speed.
+"""
+import argparse
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+from safety_core.mqtt_service import BROKER_HOST, BROKER_PORT, SUBSCRIPTIONS, TelemetryHub
+
+from .recording import RecordingWriter, read_recording, write_recording
+from .synth import synthesize
+
+SPEEDS = {"1": 1.0, "10": 10.0, "100": 100.0, "max": 0.0}
+
+
+class BrokerSink:
+    """Publishes messages to an MQTT broker at QoS 0."""
+
+    def __init__(self, host, port):
+        self.client = mqtt.Client()
+        self.client.connect(host, port, 60)
+        self.client.loop_start()
+
+    def __call__(self, topic, payload, t):
+        self.client.publish(topic, payload)
+
+    def close(self):
+        self.client.loop_stop()
+        self.client.disconnect()
+
+
+class HubSink:
+    """Feeds messages straight into ``hub.receive``, on the recorded clock."""
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def __call__(self, topic, payload, t):
+        self.hub.receive(topic, payload, int(t * 1e9))
+
+    def close(self):
+        pass
+
+
+def play(messages, sink, speed=1.0):
+    """Send ``(t, topic, payload)`` messages through ``sink(topic, payload, t)``.
+
+    Message spacing is divided by ``speed``; 0 sends as fast as possible.
+    Returns ``(count, wall seconds, worst lag behind schedule)``.
+    """
+    count = 0
+    lag = 0.0
+    started = time.perf_counter()
+    t0 = None
+    for t, topic, payload in messages:
+        if speed > 0:
+            if t0 is None:
+                t0 = t
+            due = started + (t - t0) / speed
+            ahead = due - time.perf_counter()
+            if ahead > 0:
+                time.sleep(ahead)
+            else:
+                lag = max(lag, -ahead)
+        sink(topic, payload, t)
+        count += 1
+    return count, time.perf_counter() - started, lag
+
+
+def record(path, host, port, duration=None):
+    """Write live traffic to ``path`` until ``duration`` s or Ctrl-C."""
+    writer = RecordingWriter(path)
+    lock = threading.Lock()
+
+    def on_connect(client, userdata, flags, rc):
+        client.subscribe([(topic, 0) for topic in SUBSCRIPTIONS])
+        print(f"Recording from {host}:{port} to {path}")
+
+    def on_message(client, userdata, msg):
+        with lock:
+            writer.write(time.time(), msg.topic, msg.payload)
+
+    client = mqtt.Client()
+    client.on_connect = on_connect
+    client.on_message = on_message
+    client.connect(host, port, 60)
+    client.loop_start()
+    try:
+        if duration:
+            time.sleep(duration)
+        else:
+            threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.loop_stop()
+        client.disconnect()
+        with lock:
+            writer.close()
+    print(f"{writer.count:,} messages recorded")
+
+
+def run_play(messages, args):
+    speed = SPEEDS[args.speed]
+    if args.target == "hub":
+        hub = TelemetryHub()
+        feed = hub.subscribe()
+        sink = HubSink(hub)
+    else:
+        sink = BrokerSink(args.host, args.port)
+    try:
+        count, wall, lag = play(messages, sink, speed)
+    finally:
+        sink.close()
+    if args.target == "hub":
+        hub.release_due(float("inf"))
+    print(f"{count:,} messages in {wall:.2f} s ({count / wall:,.0f}/s), "
+          f"worst lag behind schedule {lag * 1e3:.0f} ms")
+    if args.target == "hub":
+        decoder = hub.decoder
+        queues = hub.queue_stats()
+        print(f"decoded {decoder.decoded:,} frames ({decoder.binary:,} binary), "
+              f"{decoder.alerts:,} alerts, rejected {decoder.rejected_total:,}")
+        print(f"workers {len(hub.fleet):,}, alert episodes {hub.episodes.total:,}, "
+              f"session queue high water {queues['data'].high_water:,}, dropped {queues['data'].dropped:,}")
+        reordered, late = hub.fleet.reorder_counts()
+        print(f"device clock used for {hub.fleet.device_clock:,} frames, skewed {hub.fleet.clock_skew:,}; "
+              f"reordered {reordered:,}, late {late:,}")
+        if decoder.imu_batches:
+            batches, falls, gaps, late = hub.fleet.motion_counts()
+            print(f"accelerometer {decoder.imu_samples:,} samples in {batches:,} batches, "
+                  f"{falls:,} falls detected, {gaps:,} gaps, {late:,} late batches")
+        feed.data_queue.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record, replay and synthesise dashboard traffic.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rec = commands.add_parser("record", help="record live traffic to a file")
+    rec.add_argument("path")
+    rec.add_argument("--duration", type=float, help="seconds to record (default: until Ctrl-C)")
+
+    ply = commands.add_parser("play", help="replay a recording")
+    ply.add_argument("path")
+
+    syn = commands.add_parser("synth", help="generate virtual workers")
+    syn.add_argument("path", nargs="?", help="write a recording instead of playing")
+    syn.add_argument("--workers", type=int, default=10)
+    syn.add_argument("--minutes", type=float, default=10)
+    syn.add_argument("--interval", type=float, default=2.0, help="seconds between frames per worker")
+    syn.add_argument("--hazard-rate", type=float, default=1.0, help="incidents per worker-hour")
+    syn.add_argument("--binary", action="store_true", help="binary frames instead of JSON")
+    syn.add_argument("--jitter", type=float, default=0.0, help="mean random delivery delay in seconds")
+    syn.add_argument("--imu-hz", type=int, default=0, help="also stream accelerometer batches at this rate")
+    syn.add_argument("--seed", type=int, default=0)
+
+    # Recording reads from the public broker by default; playing only ever
+    # publishes to a broker named explicitly or a local one.
+    rec.add_argument("--host", default=BROKER_HOST)
+    for sub in (ply, syn):
+        sub.add_argument("--host", default="127.0.0.1")
+    for sub in (rec, ply, syn):
+        sub.add_argument("--port", type=int, default=BROKER_PORT)
+    for sub in (ply, syn):
+        sub.add_argument("--speed", choices=list(SPEEDS), default="1")
+        sub.add_argument("--target", choices=("broker", "hub"), default="broker")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.path, args.host, args.port, args.duration)
+    elif args.command == "play":
+        run_play(read_recording(args.path), args)
+    else:
+        messages = synthesize(args.workers, args.minutes * 60, args.interval, start=time.time(),
+                              seed=args.seed, hazard_rate=args.hazard_rate, binary=args.binary,
+                              jitter=args.jitter, imu_hz=args.imu_hz)
+        if args.path:
+            count = write_recording(args.path, messages)
+            print(f"{count:,} messages written to {args.path}")
+        else:
+            run_play(messages, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Synthetic fleet traffic: virtual workers with plausible vitals and hazards.
+
+Each ``VirtualWorker`` moves between rest and work, and its heart rate
+and body temperature follow the exertion with some lag. Its gas,
+radiation and SpO2 readings sit at a per-worker baseline. On top of that
+come random incidents: gas leaks that ramp up and decay over minutes,
+heat stress, radiation hot spots, desaturation and falls. The rate of
+incidents is set by ``hazard_rate``.
+
+Like the real firmware, a worker publishes an alert on every frame while
+a reading is past its critical threshold, which is what floods the alert
+topic during a sustained leak. Frames carry the measurement time as
+``ts``; ``jitter`` delays delivery at random so frames can arrive out of
+order, as they do over a congested site network.
+
+With ``imu_hz`` each worker also streams its accelerometer in one batch
+per frame interval: upright with a walking gait and the odd bump while
+working, and on a fall a short free fall, a hard impact and the body
+coming to rest on its side or back until it gets up again.
+"""
+import heapq
+import json
+import math
+import random
+
+import numpy as np
+
+from safety_core.frames import encode_binary, encode_imu_batch
+from safety_core.mqtt_service import alert_topic, data_topic, imu_topic
+from safety_core.rules import RULES
+
+# field -> (alert type, message) for threshold alerts
+ALERT_KINDS = {
+    "body_temp": ("temp", "High body temperature"),
+    "heart_rate": ("heart", "Abnormal heart rate"),
+    "spo2": ("spo2", "Low blood oxygen"),
+    "gas_ppm": ("gas", "Toxic gas level high"),
+    "radiation_uSvh": ("radiation", "Radiation exposure high"),
+}
+# incident -> relative likelihood
+INCIDENTS = {"gas_leak": 5, "heat_stress": 2, "hot_spot": 2, "desaturation": 1, "fall": 1}
+# Gravity in the device frame, upright and lying on the side or back
+UPRIGHT = (0.0, 0.0, 1.0)
+LYING = ((1.0, 0.0, 0.0), (-1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, -1.0, 0.0))
+
+
+def _toward(value, target, rate, dt):
+    # First-order lag toward ``target`` with time constant 1 / rate
+    return target + (value - target) * math.exp(-rate * dt)
+
+
+class VirtualWorker:
+    """One simulated wearable. ``step(dt)`` returns ``(frame, alerts)``."""
+
+    def __init__(self, worker_id, rng, hazard_rate=1.0):
+        self.worker_id = worker_id
+        self.rng = rng
+        # Incidents per worker-hour
+        self.hazard_rate = hazard_rate
+        self.working = rng.random() < 0.6
+        self.body_temp = rng.uniform(36.5, 37.0)
+        self.heart_rate = rng.uniform(65, 80)
+        self.spo2 = rng.uniform(96, 99)
+        self.gas_base = rng.uniform(60, 160)
+        self.rad_base = rng.uniform(0.08, 0.25)
+        # Active incident: [kind, seconds elapsed, seconds total, peak]
+        self.incident = None
+        # Seconds left lying down after a fall; the impact is the first frame
+        self.down = 0.0
+        self.impact = False
+        # Accelerometer stream: posture, samples so far, generator on first use
+        self.posture = UPRIGHT
+        self.imu_clock = 0
+        self.np_rng = None
+
+    def _maybe_start_incident(self, dt):
+        rng = self.rng
+        if self.incident is not None or rng.random() > self.hazard_rate * dt / 3600:
+            return
+        kind = rng.choices(list(INCIDENTS), weights=list(INCIDENTS.values()))[0]
+        if kind == "fall":
+            self.down = rng.uniform(20, 90)
+            self.impact = True
+            return
+        duration, peak = {
+            "gas_leak": (rng.uniform(120, 900), rng.uniform(420, 950)),
+            "heat_stress": (rng.uniform(300, 1200), rng.uniform(38.3, 39.4)),
+            "hot_spot": (rng.uniform(60, 400), rng.uniform(0.7, 1.8)),
+            "desaturation": (rng.uniform(60, 240), rng.uniform(86, 92)),
+        }[kind]
+        self.incident = [kind, 0.0, duration, peak]
+
+    def _incident_level(self, kind):
+        # 0..1 envelope of the active incident: quick rise, slow decay
+        if self.incident is None or self.incident[0] != kind:
+            return 0.0
+        _, elapsed, duration, _ = self.incident
+        rise = min(1.0, elapsed / (0.2 * duration))
+        decay = min(1.0, (duration - elapsed) / (0.5 * duration))
+        return max(0.0, min(rise, decay))
+
+    def step(self, dt):
+        rng = self.rng
+        if rng.random() < dt / 600:
+            self.working = not self.working
+        self._maybe_start_incident(dt)
+
+        exertion = 1.0 if self.working else 0.0
+        heat = self._incident_level("heat_stress")
+        self.heart_rate = _toward(self.heart_rate, 72 + 22 * exertion + 30 * heat, 1 / 60, dt)
+        temp_target = 36.8 + 0.5 * exertion
+        if heat:
+            temp_target += heat * (self.incident[3] - temp_target)
+        self.body_temp = _toward(self.body_temp, temp_target, 1 / 300, dt)
+        spo2_target = 97.5
+        if self._incident_level("desaturation"):
+            spo2_target += self._incident_level("desaturation") * (self.incident[3] - spo2_target)
+        self.spo2 = _toward(self.spo2, spo2_target, 1 / 30, dt)
+
+        gas = self.gas_base + rng.gauss(0, 8)
+        if self._incident_level("gas_leak"):
+            gas += self._incident_level("gas_leak") * (self.incident[3] - self.gas_base)
+        rad = self.rad_base * rng.uniform(0.8, 1.2)
+        if self._incident_level("hot_spot"):
+            rad += self._incident_level("hot_spot") * self.incident[3]
+
+        if self.incident is not None:
+            self.incident[1] += dt
+            if self.incident[1] >= self.incident[2]:
+                self.incident = None
+
+        fall = self.impact
+        if self.impact:
+            # A hard hit in a random direction; the device flags it
+            accel = tuple(rng.choice((-1, 1)) * rng.uniform(1.5, 4.0) for _ in range(3))
+            self.impact = False
+            self.down -= dt
+        elif self.down > 0:
+            # Lying still: gravity along the body's x axis
+            accel = (1 + rng.gauss(0, 0.03), rng.gauss(0, 0.03), rng.gauss(0, 0.03))
+            self.down -= dt
+        else:
+            sway = 0.25 if self.working else 0.05
+            accel = (rng.gauss(0, sway), rng.gauss(0, sway), 1 + rng.gauss(0, sway / 2))
+
+        frame = {
+            "body_temp": round(self.body_temp + rng.gauss(0, 0.05), 2),
+            "heart_rate": max(30, round(self.heart_rate + rng.gauss(0, 3))),
+            "spo2": min(100, round(self.spo2 + rng.gauss(0, 0.5))),
+            "gas_ppm": round(max(0.0, gas), 1),
+            "radiation_uSvh": round(rad, 3),
+            "radiation_cpm": max(0, round(rad * 150 + rng.gauss(0, 3))),
+            "accel_x": round(accel[0], 3),
+            "accel_y": round(accel[1], 3),
+            "accel_z": round(accel[2], 3),
+            "fall_detected": fall,
+        }
+        return frame, self.alerts(frame)
+
+    def motion(self, n, hz, fall):
+        """``n`` accelerometer samples at ``hz``, in g, for the step just taken.
+
+        ``fall`` is the step's ``fall_detected``: the fall happens at a
+        random point of the batch.
+        """
+        if self.np_rng is None:
+            self.np_rng = np.random.default_rng(self.rng.getrandbits(32))
+        rng = self.np_rng
+        if self.down <= 0 and not fall:
+            self.posture = UPRIGHT
+        samples = np.array(self.posture) + rng.normal(0, 0.02, (n, 3))
+        if self.posture == UPRIGHT and self.working:
+            # Heel strikes at about 1.8 steps a second, plus torso sway
+            phase = 2 * np.pi * 1.8 * (self.imu_clock + np.arange(n)) / hz
+            samples[:, 2] += 0.7 * np.maximum(0.0, np.sin(phase)) ** 8
+            samples[:, :2] += rng.normal(0, 0.12, (n, 2))
+            if rng.random() < 0.05:
+                # A knock against equipment: a jolt without free fall
+                samples[rng.integers(n)] += rng.normal(0, 1, 3) * rng.uniform(1.5, 3.5)
+        self.imu_clock += n
+        if fall:
+            drop = round(rng.uniform(0.2, 0.45) * hz)
+            hit = max(2, round(0.03 * hz))
+            k = int(rng.integers(0, max(1, n - drop - hit)))
+            samples[k:k + drop] = rng.normal(0, 0.12, samples[k:k + drop].shape)
+            direction = rng.normal(0, 1, 3)
+            samples[k + drop:k + drop + hit] = direction / np.linalg.norm(direction) * rng.uniform(3.0, 6.0)
+            # Ends on the side or back, never as it started
+            postures = [p for p in LYING if p != self.posture]
+            self.posture = postures[rng.integers(len(postures))]
+            rest = samples[k + drop + hit:]
+            rest[:] = np.array(self.posture) + rng.normal(0, 0.02, rest.shape)
+        return samples
+
+    def alerts(self, frame):
+        """What the firmware would publish for ``frame``."""
+        alerts = []
+        for field, (kind, message) in ALERT_KINDS.items():
+            rule = RULES[field]
+            value = frame[field]
+            if (value > rule.critical) if rule.direction == "above" else (value < rule.critical):
+                alerts.append({f"{kind}_alert": message, field: value})
+        if frame["fall_detected"]:
+            alerts.append({"fall_alert": "Fall detected", "fall_detected": True})
+        return alerts
+
+
+def synthesize(workers=10, duration=600.0, interval=2.0, start=0.0, seed=0,
+               hazard_rate=1.0, binary=False, jitter=0.0, imu_hz=0):
+    """Yield ``(t, topic, payload)`` for a fleet, in delivery order.
+
+    Each worker publishes a frame every ``interval`` seconds at its own
+    phase, plus its alerts, plus with ``imu_hz`` a batch of the
+    accelerometer samples taken since the previous frame. ``binary``
+    encodes frames and batches in their binary wire formats instead of
+    JSON; alerts are always JSON. With ``jitter`` each
+    message is delivered after an exponential delay with that mean (in
+    seconds), while ``ts`` keeps the measurement time.
+    """
+    rng = random.Random(seed)
+    delays = random.Random(seed + 1)
+    in_flight = []
+    seq = 0
+    width = max(3, len(str(workers - 1)))
+    fleet = sorted(
+        ((rng.uniform(0, interval), VirtualWorker(f"W-{i:0{width}d}", random.Random(rng.random()), hazard_rate))
+         for i in range(workers)),
+        key=lambda pair: pair[0],
+    )
+    ticks = int(duration / interval)
+    for tick in range(ticks):
+        base = start + tick * interval
+        for phase, worker in fleet:
+            t = base + phase
+            while in_flight and in_flight[0][0] <= t:
+                delivered, _, topic, payload = heapq.heappop(in_flight)
+                yield delivered, topic, payload
+            frame, alerts = worker.step(interval)
+            if binary:
+                payload = encode_binary(frame, device_time=t)
+            else:
+                payload = json.dumps({**frame, "ts": round(t, 3)}).encode()
+            messages = [(data_topic(worker.worker_id), payload)]
+            messages += [(alert_topic(worker.worker_id), json.dumps(alert).encode()) for alert in alerts]
+            if imu_hz:
+                samples = worker.motion(round(interval * imu_hz), imu_hz, frame["fall_detected"])
+                messages.append((imu_topic(worker.worker_id),
+                                 encode_imu_batch(samples, imu_hz, device_time=t - interval, binary=binary)))
+            for topic, payload in messages:
+                delivered = t + delays.expovariate(1 / jitter) if jitter else t
+                heapq.heappush(in_flight, (delivered, seq, topic, payload))
+                seq += 1
+    while in_flight:
+        delivered, _, topic, payload = heapq.heappop(in_flight)
+        yield delivered, topic, payload
@@ -1,10 +1,23 @@
 import streamlit as st
-import paho.mqtt.client as mqtt
-import json
 import pandas as pd
 from datetime import datetime
+import os
 import time
-from queue import Queue
+from pathlib import Path
+
+from safety_core.frames import PARSER
+from safety_core.instrumentation import export_periodically, serve
+from safety_core.exposure import LIMITS, SHIFT_HOURS
+from safety_core.forecast import MAX_GAP as FORECAST_MAX_GAP
+from safety_core.mqtt_service import ALERT_QUEUE_SIZE, BROKER_HOST, BROKER_PORT, DATA_QUEUE_SIZE, TelemetryHub
+from safety_core.storage import TelemetryStore
+from safety_core.refresh import RefreshScheduler
+from safety_core.risk import RISK_FIELDS, score_columns
+from safety_core.rollup import downsample
+from safety_core.rules import CRITICAL, LEVEL_NAMES, RULES, worst
+from safety_core.stats import WINDOWS
+
+script_started = time.perf_counter()
 
 # --------------------------------------------------
 # PAGE CONFIG
@@ -18,545 +31,154 @@ st.set_page_config(
 # --------------------------------------------------
 # GLOBAL STYLING + ICON LIBRARIES
 # --------------------------------------------------
-st.markdown("""
-<!-- Icon library (Font Awesome) -->
-<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/css/all.min.css">
-
-<style>
-    /* GLOBAL APP BACKGROUND */
-    .stApp {
-        background: radial-gradient(circle at top, #1f2937 0, #020617 45%, #020617 100%);
-        color: #e5e7eb;
-        font-family: system-ui, -apple-system, BlinkMacSystemFont, "SF Pro Text", sans-serif;
-    }
-
-    /* REMOVE DEFAULT PADDING */
-    .block-container {
-        padding-top: 1.5rem;
-        padding-bottom: 2rem;
-        max-width: 1400px;
-    }
-
-    /* TOP NAVBAR */
-    .top-nav {
-        background: rgba(15, 23, 42, 0.9);
-        border-radius: 16px;
-        padding: 0.9rem 1.4rem;
-        border: 1px solid rgba(148, 163, 184, 0.25);
-        display: flex;
-        align-items: center;
-        justify-content: space-between;
-        backdrop-filter: blur(18px);
-        box-shadow: 0 18px 40px rgba(15, 23, 42, 0.7);
-        margin-bottom: 1.5rem;
-    }
-
-    .nav-left {
-        display: flex;
-        align-items: center;
-        gap: 0.85rem;
-    }
-
-    .nav-icon-badge {
-        width: 40px;
-        height: 40px;
-        border-radius: 999px;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        background: radial-gradient(circle at 30% 0, #22d3ee, #0ea5e9, #1d4ed8);
-        color: #e5faff;
-        box-shadow: 0 0 25px rgba(56, 189, 248, 0.35);
-    }
-
-    .nav-title {
-        font-size: 1.15rem;
-        font-weight: 600;
-        color: #f9fafb;
-        letter-spacing: 0.04em;
-        text-transform: uppercase;
-    }
-
-    .nav-subtitle {
-        font-size: 0.8rem;
-        color: #9ca3af;
-    }
-
-    .nav-right {
-        display: flex;
-        align-items: center;
-        gap: 0.75rem;
-        font-size: 0.8rem;
-        color: #9ca3af;
-    }
-
-    .nav-pill {
-        padding: 0.35rem 0.8rem;
-        border-radius: 999px;
-        border: 1px solid rgba(148, 163, 184, 0.4);
-        display: inline-flex;
-        align-items: center;
-        gap: 0.45rem;
-        background: linear-gradient(135deg, rgba(15, 23, 42, 0.9), rgba(15, 23, 42, 0.65));
-    }
-
-    .nav-pill span {
-        font-size: 0.8rem;
-    }
-
-    /* SECTION HEADERS */
-    .section-header {
-        display: flex;
-        align-items: center;
-        gap: 0.6rem;
-        margin: 1.8rem 0 0.9rem 0;
-    }
-
-    .section-title-text {
-        font-size: 0.95rem;
-        font-weight: 600;
-        letter-spacing: 0.15em;
-        text-transform: uppercase;
-        color: #e5e7eb;
-    }
-
-    .section-line {
-        flex: 1;
-        height: 1px;
-        background: linear-gradient(90deg, #4b5563, transparent);
-    }
-
-    .section-tag {
-        font-size: 0.7rem;
-        text-transform: uppercase;
-        letter-spacing: 0.12em;
-        padding: 0.25rem 0.6rem;
-        border-radius: 999px;
-        border: 1px solid rgba(148, 163, 184, 0.4);
-        color: #9ca3af;
-        background: rgba(15, 23, 42, 0.8);
-    }
-
-    /* GLASS CARDS */
-    .glass-card {
-        background: radial-gradient(circle at top left, rgba(56, 189, 248, 0.06) 0, rgba(15, 23, 42, 0.95) 40%, rgba(15, 23, 42, 0.98) 100%);
-        border-radius: 16px;
-        border: 1px solid rgba(148, 163, 184, 0.42);
-        padding: 1.1rem 1.2rem;
-        box-shadow: 0 14px 35px rgba(15, 23, 42, 0.85);
-        position: relative;
-        overflow: hidden;
-    }
-
-    .glass-card::before {
-        content: "";
-        position: absolute;
-        inset: -40%;
-        opacity: 0.2;
-        background: radial-gradient(circle at 0 0, rgba(56, 189, 248, 0.12), transparent 55%);
-        pointer-events: none;
-    }
-
-    .glass-card-inner {
-        position: relative;
-        z-index: 2;
-    }
-
-    /* TOP METRICS GRID */
-    .metric-grid {
-        display: grid;
-        grid-template-columns: repeat(5, minmax(0, 1fr));
-        gap: 0.85rem;
-        margin-bottom: 1.2rem;
-    }
-
-    .metric-card {
-        border-radius: 14px;
-        border: 1px solid rgba(75, 85, 99, 0.8);
-        background: linear-gradient(145deg, rgba(15, 23, 42, 0.95), rgba(15, 23, 42, 0.85));
-        padding: 0.85rem 0.9rem;
-        display: flex;
-        flex-direction: column;
-        gap: 0.35rem;
-    }
-
-    .metric-header {
-        display: flex;
-        justify-content: space-between;
-        align-items: center;
-        font-size: 0.7rem;
-        text-transform: uppercase;
-        letter-spacing: 0.12em;
-        color: #9ca3af;
-    }
-
-    .metric-icon {
-        display: inline-flex;
-        align-items: center;
-        justify-content: center;
-        width: 24px;
-        height: 24px;
-        border-radius: 999px;
-        background: radial-gradient(circle at 30% 0, #22c55e, #16a34a);
-        color: #ecfdf5;
-        font-size: 0.75rem;
-    }
-
-    .metric-value {
-        font-size: 1.45rem;
-        font-weight: 600;
-        color: #f9fafb;
-    }
-
-    .metric-sub {
-        font-size: 0.75rem;
-        color: #9ca3af;
-        display: flex;
-        justify-content: space-between;
-        align-items: center;
-    }
-
-    .metric-pill-ok {
-        font-size: 0.7rem;
-        padding: 0.15rem 0.55rem;
-        border-radius: 999px;
-        border: 1px solid rgba(34, 197, 94, 0.5);
-        color: #bbf7d0;
-        background: rgba(22, 163, 74, 0.15);
-    }
-
-    .metric-pill-warn {
-        font-size: 0.7rem;
-        padding: 0.15rem 0.55rem;
-        border-radius: 999px;
-        border: 1px solid rgba(234, 179, 8, 0.7);
-        color: #fef9c3;
-        background: rgba(234, 179, 8, 0.15);
-    }
-
-    .metric-pill-crit {
-        font-size: 0.7rem;
-        padding: 0.15rem 0.55rem;
-        border-radius: 999px;
-        border: 1px solid rgba(248, 113, 113, 0.8);
-        color: #fee2e2;
-        background: rgba(220, 38, 38, 0.18);
-    }
-
-    .dot-green {
-        width: 8px;
-        height: 8px;
-        border-radius: 999px;
-        background: #22c55e;
-        box-shadow: 0 0 12px rgba(34, 197, 94, 0.9);
-    }
-    .dot-red {
-        width: 8px;
-        height: 8px;
-        border-radius: 999px;
-        background: #ef4444;
-        box-shadow: 0 0 12px rgba(239, 68, 68, 0.9);
-    }
-
-    /* ALERT BANNER */
-    .alert-ribbon {
-        margin-bottom: 0.6rem;
-        border-radius: 999px;
-        display: inline-flex;
-        align-items: center;
-        gap: 0.5rem;
-        padding: 0.35rem 0.8rem;
-        background: linear-gradient(to right, rgba(239, 68, 68, 0.12), rgba(248, 250, 252, 0.02));
-        border: 1px solid rgba(248, 113, 113, 0.5);
-        color: #fecaca;
-        font-size: 0.78rem;
-    }
-
-    .alert-icon-spinner {
-        width: 18px;
-        height: 18px;
-        border-radius: 999px;
-        border: 2px solid rgba(252, 165, 165, 0.35);
-        border-top-color: #fecaca;
-        animation: spin 0.85s linear infinite;
-    }
-
-    @keyframes spin {
-        to { transform: rotate(360deg); }
-    }
-
-    .alert-item {
-        background: linear-gradient(90deg, rgba(30, 64, 175, 0.32), rgba(15, 23, 42, 0.9));
-        border-radius: 10px;
-        padding: 0.6rem 0.75rem;
-        border: 1px solid rgba(59, 130, 246, 0.65);
-        font-size: 0.8rem;
-        margin-bottom: 0.25rem;
-        display: flex;
-        justify-content: space-between;
-        gap: 0.4rem;
-        align-items: center;
-    }
-
-    .alert-badge {
-        font-size: 0.7rem;
-        text-transform: uppercase;
-        letter-spacing: 0.12em;
-        padding: 0.2rem 0.45rem;
-        border-radius: 999px;
-        border: 1px solid rgba(251, 191, 36, 0.7);
-        color: #fef3c7;
-        background: rgba(30, 64, 175, 0.5);
-        white-space: nowrap;
-    }
-
-    /* SENSOR DETAIL GRID */
-    .sensor-grid {
-        display: grid;
-        grid-template-columns: repeat(4, minmax(0, 1fr));
-        gap: 0.85rem;
-        margin-top: 0.75rem;
-    }
-
-    .sensor-card {
-        border-radius: 14px;
-        padding: 1rem 1rem;
-        border: 1px solid rgba(55, 65, 81, 0.85);
-        background: radial-gradient(circle at top left, rgba(56, 189, 248, 0.07) 0, rgba(15, 23, 42, 0.94) 50%, rgba(15, 23, 42, 1) 100%);
-        position: relative;
-        overflow: hidden;
-    }
-
-    .sensor-header {
-        display: flex;
-        justify-content: space-between;
-        align-items: center;
-        font-size: 0.8rem;
-        text-transform: uppercase;
-        letter-spacing: 0.14em;
-        color: #9ca3af;
-        margin-bottom: 0.4rem;
-    }
-
-    .sensor-chip {
-        font-size: 0.68rem;
-        padding: 0.12rem 0.5rem;
-        border-radius: 999px;
-        background: rgba(31, 41, 55, 0.9);
-        border: 1px solid rgba(75, 85, 99, 0.8);
-        color: #9ca3af;
-    }
-
-    .sensor-value-main {
-        font-size: 1.9rem;
-        font-weight: 600;
-        color: #f9fafb;
-        margin-bottom: 0.25rem;
-    }
-
-    .sensor-subvalue {
-        font-size: 0.82rem;
-        color: #9ca3af;
-        margin-bottom: 0.35rem;
-    }
-
-    .sensor-caption {
-        font-size: 0.72rem;
-        color: #6b7280;
-    }
-
-    .status-pill {
-        font-size: 0.7rem;
-        padding: 0.2rem 0.6rem;
-        border-radius: 999px;
-        text-transform: uppercase;
-        letter-spacing: 0.12em;
-        display: inline-flex;
-        align-items: center;
-        gap: 0.35rem;
-    }
-
-    .status-pill-normal {
-        border: 1px solid rgba(34, 197, 94, 0.7);
-        background: rgba(22, 163, 74, 0.15);
-        color: #bbf7d0;
-    }
-    .status-pill-warning {
-        border: 1px solid rgba(234, 179, 8, 0.8);
-        background: rgba(234, 179, 8, 0.18);
-        color: #fef9c3;
-    }
-    .status-pill-critical {
-        border: 1px solid rgba(248, 113, 113, 0.85);
-        background: rgba(220, 38, 38, 0.23);
-        color: #fee2e2;
-    }
-
-    /* MINI PROGRESS BARS */
-    .risk-bar {
-        width: 100%;
-        height: 6px;
-        border-radius: 999px;
-        background: rgba(31, 41, 55, 0.95);
-        overflow: hidden;
-        margin-top: 0.25rem;
-    }
-    .risk-bar-fill {
-        height: 100%;
-        border-radius: 999px;
-        background: linear-gradient(90deg, #22c55e, #eab308, #ef4444);
-    }
-
-    /* FOOTER LINE */
-    .footer-line {
-        border-top: 1px solid rgba(55, 65, 81, 0.9);
-        margin: 1.7rem 0 0.8rem 0;
-    }
-
-    .footer-meta {
-        font-size: 0.75rem;
-        color: #6b7280;
-        display: flex;
-        justify-content: space-between;
-        flex-wrap: wrap;
-        gap: 0.4rem;
-    }
-
-    /* DATAFRAME TUNING */
-    .dataframe {
-        font-size: 0.82rem;
-    }
-
-    /* SIDEBAR STYLE (if opened) */
-    section[data-testid="stSidebar"] {
-        background: #020617;
-        border-right: 1px solid rgba(31, 41, 55, 0.8);
-    }
-</style>
-""", unsafe_allow_html=True)
+# The stylesheet and the Font Awesome subset ship in static/, so icons
+# render without CDN access; the icon fonts are fetched from
+# app/static/fontawesome/ and cached by the browser. The stylesheet is
+# emitted as one unchanging message on full runs only, which Streamlit's
+# message cache replaces with a hash reference after the first load.
+STATIC_DIR = Path(__file__).parent / "static"
+STYLESHEETS = ("fontawesome/icons.css", "dashboard.css")
 
-# --------------------------------------------------
-# SESSION STATE INIT
-# --------------------------------------------------
-if 'global_queues_initialized' not in st.session_state:
-    st.session_state.global_queues_initialized = True
-    st.session_state.data_queue = Queue()
-    st.session_state.alert_queue = Queue()
 
-if 'sensor_data' not in st.session_state:
-    st.session_state.sensor_data = []
-    st.session_state.alerts = []
-    st.session_state.latest = {}
-    st.session_state.mqtt_connected = False
-    st.session_state.last_data_time = None
+@st.cache_resource
+def load_stylesheet():
+    css = "\n".join((STATIC_DIR / name).read_text() for name in STYLESHEETS)
+    return f"<style>\n{css}</style>"
 
-data_queue = st.session_state.data_queue
-alert_queue = st.session_state.alert_queue
+
+st.markdown(load_stylesheet(), unsafe_allow_html=True)
 
 # --------------------------------------------------
-# MQTT HANDLERS
+# SHARED MQTT INGESTION (ONE CLIENT PER SERVER PROCESS)
 # --------------------------------------------------
-def on_connect(client, userdata, flags, rc):
-    if rc == 0:
-        client.subscribe("worker/safety/data")
-        client.subscribe("worker/safety/alert")
-        print("✅ MQTT Connected to broker.emqx.io")
-    else:
-        print(f"❌ MQTT Connection failed: {rc}")
-
-def on_message(client, userdata, msg):
-    try:
-        data = json.loads(msg.payload.decode())
-        print(f"📥 Received: {msg.topic}")
-        if msg.topic == "worker/safety/data":
-            data_queue.put(data)
-        elif msg.topic == "worker/safety/alert":
-            alert_queue.put(data)
-    except Exception as e:
-        print(f"❌ Error in on_message: {e}")
-
-if 'mqtt_client' not in st.session_state:
-    st.session_state.mqtt_client = mqtt.Client()
-    st.session_state.mqtt_client.on_connect = on_connect
-    st.session_state.mqtt_client.on_message = on_message
-    try:
-        st.session_state.mqtt_client.connect("broker.emqx.io", 1883, 60)
-        st.session_state.mqtt_client.loop_start()
-        st.session_state.mqtt_connected = True
-        print("🔄 MQTT Loop started")
-    except Exception as e:
-        st.error(f"MQTT Error: {e}")
-        st.session_state.mqtt_connected = False
+# Frames and alerts are also kept on disk for incident review; set
+# SAFETY_DATA_DIR to an empty string to run memory-only. SAFETY_MQTT_HOST
+# and SAFETY_MQTT_PORT point the dashboard at another broker, e.g. the
+# local one from tools.broker.
+DATA_DIR = os.environ.get("SAFETY_DATA_DIR", "telemetry_data")
+MQTT_HOST = os.environ.get("SAFETY_MQTT_HOST", BROKER_HOST)
+MQTT_PORT = int(os.environ.get("SAFETY_MQTT_PORT", BROKER_PORT))
+# Stage timings and ingest counters in Prometheus text format: served on
+# 127.0.0.1:SAFETY_METRICS_PORT/metrics and/or rewritten every 15 s to
+# SAFETY_METRICS_FILE. The diagnostics tab is hidden unless
+# SAFETY_DIAGNOSTICS=1 or the page is opened with ?diagnostics=1.
+METRICS_PORT = os.environ.get("SAFETY_METRICS_PORT")
+METRICS_FILE = os.environ.get("SAFETY_METRICS_FILE")
+
+
+@st.cache_resource
+def get_telemetry_hub():
+    return TelemetryHub(MQTT_HOST, MQTT_PORT, store=TelemetryStore(DATA_DIR) if DATA_DIR else None)
+
+hub = get_telemetry_hub()
+hub.start()
+if hub.error is not None:
+    st.error(f"MQTT Error: {hub.error}")
+
+instruments = hub.instruments
+span = instruments.span
+
+
+@st.cache_resource
+def start_metrics_export():
+    targets = []
+    if METRICS_PORT:
+        serve(instruments, int(METRICS_PORT))
+        targets.append(f"http://127.0.0.1:{METRICS_PORT}/metrics")
+    if METRICS_FILE:
+        export_periodically(instruments, METRICS_FILE)
+        targets.append(METRICS_FILE)
+    return targets
+
+metrics_targets = start_metrics_export()
+show_diagnostics = os.environ.get("SAFETY_DIAGNOSTICS") == "1" or st.query_params.get("diagnostics") == "1"
 
 # --------------------------------------------------
-# INGEST QUEUES INTO SESSION STATE
+# SESSION STATE INIT
 # --------------------------------------------------
-while not data_queue.empty():
-    try:
-        data = data_queue.get_nowait()
-        data['timestamp'] = datetime.now().strftime("%H:%M:%S")
-        st.session_state.sensor_data.append(data)
-        st.session_state.latest = data
-        st.session_state.last_data_time = datetime.now()
-        if len(st.session_state.sensor_data) > 300:
-            st.session_state.sensor_data.pop(0)
-    except Exception:
-        break
-
-while not alert_queue.empty():
-    try:
-        data = alert_queue.get_nowait()
-        data['time'] = datetime.now().strftime("%H:%M:%S")
-        st.session_state.alerts.insert(0, data)
-        if len(st.session_state.alerts) > 50:
-            st.session_state.alerts.pop()
-    except Exception:
-        break
-
-latest = st.session_state.latest if st.session_state.latest else None
+if 'feed' not in st.session_state:
+    st.session_state.feed = hub.subscribe()
+    st.session_state.refresh = RefreshScheduler()
+
+fleet = hub.fleet
 
 # --------------------------------------------------
-# HELPER: COMPUTE RISK SCORES FROM EXISTING FIELDS
+# INGEST QUEUES INTO SESSION STATE
 # --------------------------------------------------
-def compute_risk_scores(latest_data):
-    if not latest_data:
-        return 0, 0, 0
-
-    temp = latest_data.get('body_temp', 0)
-    hr = latest_data.get('heart_rate', 0)
-    spo2 = latest_data.get('spo2', 100)
-    rad = latest_data.get('radiation_uSvh', 0)
-    gas = latest_data.get('gas_ppm', 0)
-    fall = latest_data.get('fall_detected', False)
-
-    # Physiological risk (0–100)
-    phys_risk = 0
-    # Temp contribution
-    if temp > 37.5:
-        phys_risk += min((temp - 37.5) * 25, 40)
-    # HR contribution
-    if hr > 100:
-        phys_risk += min((hr - 100) * 0.6, 35)
-    # SpO2 contribution
-    if spo2 < 95:
-        phys_risk += min((95 - spo2) * 3, 25)
-    phys_risk = max(0, min(100, phys_risk))
-
-    # Environmental risk
-    env_risk = 0
-    if gas > 300:
-        env_risk += min((gas - 300) / 3, 45)
-    if rad > 0.5:
-        env_risk += min((rad - 0.5) * 60, 35)
-    if fall:
-        env_risk += 30
-    env_risk = max(0, min(100, env_risk))
-
-    # Overall score (higher = more risky)
-    overall = int(min(100, (phys_risk * 0.55 + env_risk * 0.45)))
-    return int(phys_risk), int(env_risk), overall
-
-phys_risk, env_risk, overall_risk = compute_risk_scores(latest)
+def drain_feed():
+    # Frames are already routed into the shared fleet store and alerts into
+    # the hub's episode tracker; the session queues only tell us that
+    # something new arrived. Each drain is one lock acquisition.
+    st.session_state.feed.data_queue.drain()
+    st.session_state.feed.alert_queue.drain()
+
+ALERT_PAGE_SIZE = 6
+# Alert keys that are times rather than readings; formatted, not listed
+ALERT_TIME_KEYS = ("t", "ts", "time")
+# Label -> seconds back from now; None means no time bound
+ALERT_RANGES = {"Any time": None, "Last 15 min": 15 * 60, "Last hour": 60 * 60, "Last 12 hours": 12 * 60 * 60, "Last 7 days": 7 * 24 * 60 * 60}
+
+def reset_alert_page():
+    st.session_state.alert_page = 1
+
+TREND_CHANNELS = ("body_temp", "heart_rate", "gas_ppm", "radiation_uSvh")
+# Label -> seconds; None plots the raw history
+TREND_SPANS = {"Last 80 points": None, "15 min": 15 * 60, "1 hour": 60 * 60, "12 hours": 12 * 60 * 60}
+TREND_POINTS = 300
+LOCAL_TZ = datetime.now().astimezone().tzinfo
+# How long a fall found in the accelerometer stream keeps the posture card red
+FALL_HOLD = 60
+
+STATUS_PILL = {
+    "NORMAL": "status-pill-normal",
+    "WARNING": "status-pill-warning",
+    "CRITICAL": "status-pill-critical"
+}
+
+def format_duration(seconds):
+    minutes = int(seconds // 60)
+    return f"{minutes // 60} h {minutes % 60:02d} min" if minutes >= 60 else f"{minutes} min"
+
+def exposure_lines(exposure, field, digits):
+    """Sensor card lines for a shift exposure budget: use so far, time left and projection."""
+    if exposure is None or exposure.channels[field].last_t is None:
+        return ""
+    limit = LIMITS[field]
+    budget = exposure.budget(field)
+    lines = (
+        f'<div class="sensor-subvalue">{limit.label} {budget.value:.{digits}f} / {limit.limit:g} {limit.unit} '
+        f'({budget.used:.0%}) · end of shift &asymp; {budget.projected:.{digits}f} {limit.unit}</div>'
+    )
+    shift_left = max(0.0, SHIFT_HOURS * 3600 - exposure.elapsed)
+    if budget.left == 0:
+        outlook = "Budget used up"
+    elif budget.left is not None and budget.left < shift_left:
+        outlook = f"Limit in {format_duration(budget.left)} at the current rate"
+    else:
+        outlook = "Within budget for the shift at the current rate"
+    unmeasured = exposure.unmeasured(field)
+    if unmeasured >= 60:
+        outlook += f" · {format_duration(unmeasured)} unmeasured"
+    return lines + f'<div class="sensor-subvalue">{outlook}</div>'
+
+def forecast_line(forecast, field, age):
+    """"Projected critical" line when the worker's trend reaches the threshold within the horizon.
+
+    Forecasts count from the last sample, ``age`` seconds ago, so the
+    countdown runs on while the worker is quiet.
+    """
+    seconds = forecast.get(field, (None,))[0]
+    if not seconds:
+        # No crossing ahead, or already critical
+        return ""
+    if age > FORECAST_MAX_GAP:
+        return '<div class="sensor-subvalue">Projection: no recent data</div>'
+    seconds -= max(age, 0.0)
+    if seconds <= 0:
+        when = "now"
+    else:
+        when = "in under 1 min" if seconds < 60 else f"in {round(seconds / 60)} min"
+    return f'<div class="sensor-subvalue"><strong>Projected critical {when}</strong></div>'
 
 def risk_label(score):
     if score >= 70:
@@ -566,270 +188,284 @@ def risk_label(score):
     else:
         return "STABLE", "metric-pill-ok"
 
-
-
-
 # --------------------------------------------------
 # TOP NAVBAR
 # --------------------------------------------------
-connection_status = "Online" if st.session_state.mqtt_connected and latest else "Offline"
-last_update_txt = "N/A"
-if st.session_state.last_data_time:
-    last_secs = (datetime.now() - st.session_state.last_data_time).seconds
-    last_update_txt = f"{last_secs}s ago"
-
-st.markdown(f"""
-<div class="top-nav">
-  <div class="nav-left">
-    <div class="nav-icon-badge">
-      <i class="fa-solid fa-user-shield"></i>
-    </div>
-    <div>
-      <div class="nav-title">Industrial Worker Safety Monitoring</div>
-      <div class="nav-subtitle">
-        <i class="fa-solid fa-microchip"></i>&nbsp;
-        To Start Simulation · 
-        <a href="https://wokwi.com/projects/447224581770989569" target="_blank" style="
-            color:#60a5fa;
-            text-decoration:none;
-            font-weight:600;
-        ">
-            https://wokwi.com/projects/447224581770989569
-        </a>
+def render_navbar(worker, latest):
+    connection_status = "Online" if hub.connected and latest else "Offline"
+    last_update_txt = worker.last_seen.strftime("%H:%M:%S") if worker and worker.last_seen else "N/A"
+
+    st.markdown(f"""
+    <div class="top-nav">
+      <div class="nav-left">
+        <div class="nav-icon-badge">
+          <i class="fa-solid fa-user-shield"></i>
+        </div>
+        <div>
+          <div class="nav-title">Industrial Worker Safety Monitoring</div>
+          <div class="nav-subtitle">
+            <i class="fa-solid fa-microchip"></i>&nbsp;
+            To Start Simulation · 
+            <a href="https://wokwi.com/projects/447224581770989569" target="_blank" style="
+                color:#60a5fa;
+                text-decoration:none;
+                font-weight:600;
+            ">
+                https://wokwi.com/projects/447224581770989569
+            </a>
+          </div>
+        </div>
+      </div>
+      <div class="nav-right">
+        <div class="nav-pill">
+          <i class="fa-solid fa-circle-{ 'check' if connection_status=='Online' else 'xmark' }"></i>
+          <span><strong>MQTT:</strong> {connection_status}</span>
+        </div>
+        <div class="nav-pill">
+          <i class="fa-regular fa-clock"></i>
+          <span><strong>Last packet:</strong> {last_update_txt}</span>
+        </div>
+        <div class="nav-pill">
+          <i class="fa-solid fa-satellite-dish"></i>
+          <span><strong>Broker:</strong> {MQTT_HOST}:{MQTT_PORT}</span>
+        </div>
       </div>
     </div>
-  </div>
-  <div class="nav-right">
-    <div class="nav-pill">
-      <i class="fa-solid fa-circle-{ 'check' if connection_status=='Online' else 'xmark' }"></i>
-      <span><strong>MQTT:</strong> {connection_status}</span>
-    </div>
-    <div class="nav-pill">
-      <i class="fa-regular fa-clock"></i>
-      <span><strong>Last packet:</strong> {last_update_txt}</span>
-    </div>
-    <div class="nav-pill">
-      <i class="fa-solid fa-satellite-dish"></i>
-      <span><strong>Broker:</strong> broker.emqx.io</span>
-    </div>
-  </div>
-</div>
-""", unsafe_allow_html=True)
-
+    """, unsafe_allow_html=True)
 
 # --------------------------------------------------
 # TOP METRIC STRIP  (NEW ADVANCED VIEW)
 # --------------------------------------------------
-alerts_count = len(st.session_state.alerts)
-datapoints_count = len(st.session_state.sensor_data)
-worker_status = "NO DATA"
-if latest:
-    temp = latest.get('body_temp', 0)
-    hr = latest.get('heart_rate', 0)
-    rad = latest.get('radiation_uSvh', 0)
-    gas = latest.get('gas_ppm', 0)
-    critical_count = sum([temp > 38.5, hr > 110, rad > 1.0, gas > 500])
-    worker_status = "CRITICAL" if critical_count > 0 else "NORMAL"
-
-status_pill_class = {
-    "CRITICAL": "metric-pill-crit",
-    "NORMAL": "metric-pill-ok",
-    "NO DATA": "metric-pill-warn"
-}.get(worker_status, "metric-pill-warn")
-
-phys_label, phys_class = risk_label(phys_risk)
-env_label, env_class = risk_label(env_risk)
-overall_label, overall_class = risk_label(overall_risk)
-
-st.markdown("<div class='glass-card'><div class='glass-card-inner'>", unsafe_allow_html=True)
-
-st.markdown("<div class='metric-grid'>", unsafe_allow_html=True)
-
-# SYSTEM STATUS
-st.markdown(f"""
-<div class="metric-card">
-  <div class="metric-header">
-    <span>SYSTEM STATUS</span>
-    <div class="metric-icon">
-      <i class="fa-solid fa-tower-broadcast"></i>
-    </div>
-  </div>
-  <div class="metric-value">{worker_status}</div>
-  <div class="metric-sub">
-    <span>Device heartbeat</span>
-    <span class="{status_pill_class}">{worker_status}</span>
-  </div>
-</div>
-""", unsafe_allow_html=True)
-
-# ACTIVE ALERTS
-st.markdown(f"""
-<div class="metric-card">
-  <div class="metric-header">
-    <span>ACTIVE ALERTS</span>
-    <div class="metric-icon" style="background: radial-gradient(circle at 30% 0,#f97316,#f97316);">
-      <i class="fa-solid fa-bell-exclamation"></i>
-    </div>
-  </div>
-  <div class="metric-value">{alerts_count}</div>
-  <div class="metric-sub">
-    <span>Last 50 events</span>
-    <span class="{ 'metric-pill-crit' if alerts_count>0 else 'metric-pill-ok'}">
-      { 'ALERTING' if alerts_count>0 else 'CLEAR' }
-    </span>
-  </div>
-</div>
-""", unsafe_allow_html=True)
-
-# DATA POINTS
-st.markdown(f"""
-<div class="metric-card">
-  <div class="metric-header">
-    <span>DATA POINTS</span>
-    <div class="metric-icon" style="background: radial-gradient(circle at 30% 0,#0ea5e9,#3b82f6);">
-      <i class="fa-solid fa-database"></i>
-    </div>
-  </div>
-  <div class="metric-value">{datapoints_count}</div>
-  <div class="metric-sub">
-    <span>Session buffer</span>
-    <span class="metric-pill-ok">{'LIVE STREAM' if datapoints_count>0 else 'WAITING'}</span>
-  </div>
-</div>
-""", unsafe_allow_html=True)
-
-# PHYSIO RISK
-st.markdown(f"""
-<div class="metric-card">
-  <div class="metric-header">
-    <span>PHYSIOLOGICAL LOAD</span>
-    <div class="metric-icon" style="background: radial-gradient(circle at 30% 0,#a855f7,#6366f1);">
-      <i class="fa-solid fa-heart-pulse"></i>
+def render_metric_strip(worker_id, worker, latest):
+    history = worker.history if worker else None
+    phys_risk, env_risk, overall_risk = worker.risk if worker else (0, 0, 0)
+    # Open episodes of the selected worker; the fleet total goes underneath
+    open_episodes = list(hub.episodes.open.values())
+    alerts_count = sum(1 for ep in open_episodes if ep.worker_id == worker_id)
+    datapoints_count = len(history) if history else 0
+    worker_status = "NO DATA"
+    if latest:
+        worker_status = LEVEL_NAMES[worst(worker.levels)]
+
+    status_pill_class = {
+        "CRITICAL": "metric-pill-crit",
+        "WARNING": "metric-pill-warn",
+        "NORMAL": "metric-pill-ok",
+        "NO DATA": "metric-pill-warn"
+    }.get(worker_status, "metric-pill-warn")
+
+    phys_label, phys_class = risk_label(phys_risk)
+    env_label, env_class = risk_label(env_risk)
+    overall_label, overall_class = risk_label(overall_risk)
+
+    st.markdown("<div class='glass-card'><div class='glass-card-inner'>", unsafe_allow_html=True)
+
+    st.markdown("<div class='metric-grid'>", unsafe_allow_html=True)
+
+    # SYSTEM STATUS
+    st.markdown(f"""
+    <div class="metric-card">
+      <div class="metric-header">
+        <span>SYSTEM STATUS</span>
+        <div class="metric-icon">
+          <i class="fa-solid fa-tower-broadcast"></i>
+        </div>
+      </div>
+      <div class="metric-value">{worker_status}</div>
+      <div class="metric-sub">
+        <span>Device heartbeat</span>
+        <span class="{status_pill_class}">{worker_status}</span>
+      </div>
     </div>
-  </div>
-  <div class="metric-value">{phys_risk}</div>
-  <div class="metric-sub">
-    <span>Temperature · HR · SpO₂</span>
-    <span class="{phys_class}">{phys_label}</span>
-  </div>
-</div>
-""", unsafe_allow_html=True)
-
-# ENVIRONMENTAL RISK
-st.markdown(f"""
-<div class="metric-card">
-  <div class="metric-header">
-    <span>ENV. RISK SCORE</span>
-    <div class="metric-icon" style="background: radial-gradient(circle at 30% 0,#22c55e,#16a34a);">
-      <i class="fa-solid fa-cloud-bolt"></i>
+    """, unsafe_allow_html=True)
+
+    # ACTIVE ALERTS
+    st.markdown(f"""
+    <div class="metric-card">
+      <div class="metric-header">
+        <span>ACTIVE ALERTS</span>
+        <div class="metric-icon" style="background: radial-gradient(circle at 30% 0,#f97316,#f97316);">
+          <i class="fa-solid fa-bell-exclamation"></i>
+        </div>
+      </div>
+      <div class="metric-value">{alerts_count}</div>
+      <div class="metric-sub">
+        <span>fleet: {len(open_episodes)} open, {hub.episodes.total} since start</span>
+        <span class="{ 'metric-pill-crit' if alerts_count>0 else 'metric-pill-ok'}">
+          { 'ALERTING' if alerts_count>0 else 'CLEAR' }
+        </span>
+      </div>
     </div>
-  </div>
-  <div class="metric-value">{env_risk}</div>
-  <div class="metric-sub">
-    <span>Gas · Radiation · Fall</span>
-    <span class="{env_class}">{env_label}</span>
-  </div>
-</div>
-""", unsafe_allow_html=True)
-
-st.markdown("</div>", unsafe_allow_html=True)  # end metric-grid
-
-# Overall risk mini-bar
-st.markdown(f"""
-<div style="margin-top:0.5rem; display:flex; justify-content:space-between; align-items:center; gap:0.8rem; font-size:0.78rem; color:#9ca3af;">
-  <div style="display:flex; align-items:center; gap:0.45rem;">
-    <span style="text-transform:uppercase; letter-spacing:0.12em;">Overall risk index</span>
-    <span class="{overall_class}">{overall_label} · {overall_risk}</span>
-  </div>
-  <div style="flex:1;">
-    <div class="risk-bar">
-      <div class="risk-bar-fill" style="width:{overall_risk}%;"></div>
+    """, unsafe_allow_html=True)
+
+    # DATA POINTS
+    st.markdown(f"""
+    <div class="metric-card">
+      <div class="metric-header">
+        <span>DATA POINTS</span>
+        <div class="metric-icon" style="background: radial-gradient(circle at 30% 0,#0ea5e9,#3b82f6);">
+          <i class="fa-solid fa-database"></i>
+        </div>
+      </div>
+      <div class="metric-value">{datapoints_count}</div>
+      <div class="metric-sub">
+        <span>{worker_id or 'No device'} buffer</span>
+        <span class="metric-pill-ok">{'LIVE STREAM' if datapoints_count>0 else 'WAITING'}</span>
+      </div>
     </div>
-  </div>
-</div>
-""", unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
 
-st.markdown("</div></div>", unsafe_allow_html=True)  # end glass-card & inner
+    # PHYSIO RISK
+    st.markdown(f"""
+    <div class="metric-card">
+      <div class="metric-header">
+        <span>PHYSIOLOGICAL LOAD</span>
+        <div class="metric-icon" style="background: radial-gradient(circle at 30% 0,#a855f7,#6366f1);">
+          <i class="fa-solid fa-heart-pulse"></i>
+        </div>
+      </div>
+      <div class="metric-value">{phys_risk}</div>
+      <div class="metric-sub">
+        <span>Temperature · HR · SpO₂</span>
+        <span class="{phys_class}">{phys_label}</span>
+      </div>
+    </div>
+    """, unsafe_allow_html=True)
 
-# --------------------------------------------------
-# ALERTS RIBBON
-# --------------------------------------------------
-if st.session_state.alerts:
-    st.markdown("""
-    <div class="section-header">
-      <div class="section-title-text">Critical Events</div>
-      <div class="section-line"></div>
-      <div class="section-tag"><i class="fa-solid fa-bolt"></i>&nbsp;Live Alert Stream</div>
+    # ENVIRONMENTAL RISK
+    st.markdown(f"""
+    <div class="metric-card">
+      <div class="metric-header">
+        <span>ENV. RISK SCORE</span>
+        <div class="metric-icon" style="background: radial-gradient(circle at 30% 0,#22c55e,#16a34a);">
+          <i class="fa-solid fa-cloud-bolt"></i>
+        </div>
+      </div>
+      <div class="metric-value">{env_risk}</div>
+      <div class="metric-sub">
+        <span>Gas · Radiation · Fall</span>
+        <span class="{env_class}">{env_label}</span>
+      </div>
     </div>
     """, unsafe_allow_html=True)
 
-    st.markdown("""
-    <div class="alert-ribbon">
-      <div class="alert-icon-spinner"></div>
-      <span><strong>Attention:</strong> Safety engine is processing live alerts from the edge device.</span>
+    st.markdown("</div>", unsafe_allow_html=True)  # end metric-grid
+
+    # Overall risk mini-bar
+    st.markdown(f"""
+    <div style="margin-top:0.5rem; display:flex; justify-content:space-between; align-items:center; gap:0.8rem; font-size:0.78rem; color:#9ca3af;">
+      <div style="display:flex; align-items:center; gap:0.45rem;">
+        <span style="text-transform:uppercase; letter-spacing:0.12em;">Overall risk index</span>
+        <span class="{overall_class}">{overall_label} · {overall_risk}</span>
+      </div>
+      <div style="flex:1;">
+        <div class="risk-bar">
+          <div class="risk-bar-fill" style="width:{overall_risk}%;"></div>
+        </div>
+      </div>
     </div>
     """, unsafe_allow_html=True)
 
-    # Filter alerts by keyword (works with existing data structure)
-    filter_text = st.text_input("Filter alerts (type, metric, etc.)", "", key="alert_filter")
+    st.markdown("</div></div>", unsafe_allow_html=True)  # end glass-card & inner
 
-    filtered_alerts = st.session_state.alerts
-    if filter_text.strip():
-        keyword = filter_text.lower()
-        filtered_alerts = [
-            a for a in st.session_state.alerts
-            if any(keyword in str(v).lower() for v in a.values())
-        ]
+# --------------------------------------------------
+# ALERTS RIBBON
+# --------------------------------------------------
+def render_alert_header(active):
+    if active:
+        st.markdown("""
+        <div class="section-header">
+          <div class="section-title-text">Critical Events</div>
+          <div class="section-line"></div>
+          <div class="section-tag"><i class="fa-solid fa-bolt"></i>&nbsp;Live Alert Stream</div>
+        </div>
+        """, unsafe_allow_html=True)
 
-    for alert in filtered_alerts[:6]:
-        alert_msgs = [f"{k.replace('_alert','').upper()}: {v}" for k, v in alert.items() if k != "time"]
+        st.markdown("""
+        <div class="alert-ribbon">
+          <div class="alert-icon-spinner"></div>
+          <span><strong>Attention:</strong> Safety engine is processing live alerts from the edge device.</span>
+        </div>
+        """, unsafe_allow_html=True)
+    else:
+        st.markdown("""
+        <div class="section-header">
+          <div class="section-title-text">Critical Events</div>
+          <div class="section-line"></div>
+          <div class="section-tag"><i class="fa-regular fa-bell"></i>&nbsp;No Active Alerts</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+        if hub.episodes.total:
+            st.info("Alert engine is armed. All alert episodes have cleared.")
+        else:
+            st.info("Alert engine is armed. No alerts have been triggered yet.")
+
+
+def render_alert_list(alert_query):
+    filter_text, worker, kind, severity, since, page = alert_query
+    seconds = ALERT_RANGES[since]
+    total, alerts = hub.alerts.search(
+        filter_text,
+        worker=None if worker == "All" else worker,
+        kind=None if kind == "All" else kind,
+        severity=None if severity == "All" else severity,
+        start=time.time() - seconds if seconds else None,
+        offset=(page - 1) * ALERT_PAGE_SIZE,
+        limit=ALERT_PAGE_SIZE
+    )
+    if total and not alerts:
+        st.caption(f"Page {page} is past the last page ({-(-total // ALERT_PAGE_SIZE)}) of {total} matching alerts.")
+    elif total:
+        first = (page - 1) * ALERT_PAGE_SIZE + 1
+        st.caption(f"Showing {first}–{first + len(alerts) - 1} of {total} matching alerts")
+    elif len(hub.alerts):
+        st.caption("No alerts match the current filters.")
+
+    for alert in alerts:
+        alert_msgs = [f"{k.replace('_alert','').upper()}: {v}" for k, v in alert.items() if k not in ALERT_TIME_KEYS]
+        received = datetime.fromtimestamp(alert["t"]).strftime("%H:%M:%S")
         st.markdown(f"""
         <div class="alert-item">
           <div>
-            <strong><i class="fa-solid fa-triangle-exclamation"></i>&nbsp;{alert['time']}</strong> · {" | ".join(alert_msgs)}
+            <strong><i class="fa-solid fa-triangle-exclamation"></i>&nbsp;{received}</strong> · {" | ".join(alert_msgs)}
           </div>
           <div class="alert-badge">
             <i class="fa-solid fa-shield-halved"></i>&nbsp;Active
           </div>
         </div>
         """, unsafe_allow_html=True)
-else:
-    st.markdown("""
-    <div class="section-header">
-      <div class="section-title-text">Critical Events</div>
-      <div class="section-line"></div>
-      <div class="section-tag"><i class="fa-regular fa-bell"></i>&nbsp;No Active Alerts</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-    st.info("Alert engine is armed. No alerts have been triggered yet.")
-
-# --------------------------------------------------
-# MAIN TABS FOR ADVANCED UI
-# --------------------------------------------------
-tab_overview, tab_health, tab_environment, tab_system = st.tabs(
-    ["📊 Overview Dashboard", "❤️ Health & Biometrics", "🌫️ Environment & Fall", "🛠️ System Logs & Raw Data"]
-)
 
 # --------------------------------------------------
 # TAB 1: OVERVIEW DASHBOARD
 # --------------------------------------------------
-with tab_overview:
-    st.markdown("""
-    <div class="section-header" style="margin-top:1.5rem;">
-      <div class="section-title-text">Realtime Telemetry</div>
-      <div class="section-line"></div>
-      <div class="section-tag"><i class="fa-solid fa-wave-square"></i>&nbsp;Signal Overview</div>
-    </div>
-    """, unsafe_allow_html=True)
-
+def render_trend_rollup(worker, span_label):
+    # Bucket means from the rollup tiers, thinned with LTTB so any span
+    # sends a bounded number of points
+    tier, data = worker.rollups.series(TREND_SPANS[span_label], time.time())
+    ts = data["timestamp"]
+    if len(ts) == 0:
+        st.info("Not enough history yet for this span.")
+        return
+    keep = downsample(ts, [data[f"{ch}_mean"] for ch in TREND_CHANNELS], TREND_POINTS)
+    df = pd.DataFrame(
+        {ch: data[f"{ch}_mean"][keep] for ch in TREND_CHANNELS},
+        index=pd.to_datetime(ts[keep], unit="s", utc=True).tz_convert(LOCAL_TZ)
+    )
+    st.markdown(f"**Trends (last {span_label}, {tier} averages)**")
+    with span("chart.rollup_trend"):
+        st.line_chart(df, use_container_width=True)
+
+
+def render_overview(worker_id, worker, history, history_df, latest, trend_span):
     col_a, col_b = st.columns([1.8, 1.2])
 
     with col_a:
-        if st.session_state.sensor_data:
-            df = pd.DataFrame(st.session_state.sensor_data)
+        if history and TREND_SPANS[trend_span]:
+            render_trend_rollup(worker, trend_span)
+        elif history:
             # Use last 80 points for charts
-            df_tail = df.tail(80)
+            df_tail = history_df.tail(80)
 
             # Add a monotonic index for plotting instead of only string timestamps
             df_tail = df_tail.copy()
@@ -837,10 +473,22 @@ with tab_overview:
             df_tail.set_index("index", inplace=True)
 
             st.markdown("**Live Trends (last 80 points)**")
-            st.line_chart(
-                df_tail[["body_temp", "heart_rate", "gas_ppm", "radiation_uSvh"]],
-                use_container_width=True
-            )
+            with span("chart.live_trend"):
+                st.line_chart(
+                    df_tail[list(TREND_CHANNELS)],
+                    use_container_width=True
+                )
+
+            # Score every plotted frame in one vectorised pass
+            with span("rerun.risk"):
+                phys, env, overall = score_columns({name: df_tail[name].to_numpy() for name, _ in RISK_FIELDS})
+            st.markdown("**Risk Trend**")
+            with span("chart.risk_trend"):
+                st.line_chart(
+                    pd.DataFrame({"overall": overall, "physiological": phys, "environmental": env}, index=df_tail.index),
+                    height=180,
+                    use_container_width=True
+                )
         else:
             st.warning("Waiting for incoming data stream to render trend charts.")
 
@@ -849,8 +497,9 @@ with tab_overview:
         with st.container():
             st.markdown("<div class='glass-card'><div class='glass-card-inner'>", unsafe_allow_html=True)
             if latest:
-                worker_id = "Worker-01"
-                shift_start = st.session_state.sensor_data[0]["timestamp"] if st.session_state.sensor_data else "N/A"
+                exposure = worker.exposure
+                shift_start = datetime.fromtimestamp(exposure.shift_start).strftime("%H:%M:%S") if exposure.shift_start else "N/A"
+                gas_twa = exposure.budget("gas_ppm")
                 fall_flag = "Detected" if latest.get("fall_detected", False) else "None"
 
                 st.markdown(f"""
@@ -869,7 +518,7 @@ with tab_overview:
                 <div style="margin-top:0.8rem;font-size:0.82rem;color:#9ca3af;">
                   <ul style="padding-left:1.1rem;margin:0;">
                     <li>Fall detection: <strong>{fall_flag}</strong></li>
-                    <li>Gas exposure window: <strong>{latest.get('gas_ppm',0):.0f} ppm</strong></li>
+                    <li>Gas exposure (8-h TWA): <strong>{gas_twa.value:.0f} ppm</strong> · {gas_twa.used:.0%} of limit</li>
                     <li>Current heart rate: <strong>{latest.get('heart_rate',0)} BPM</strong></li>
                   </ul>
                 </div>
@@ -881,26 +530,14 @@ with tab_overview:
 # --------------------------------------------------
 # TAB 2: HEALTH & BIOMETRICS
 # --------------------------------------------------
-with tab_health:
-    st.markdown("""
-    <div class="section-header" style="margin-top:1.5rem;">
-      <div class="section-title-text">Biometric Envelope</div>
-      <div class="section-line"></div>
-      <div class="section-tag"><i class="fa-solid fa-heart-circle-bolt"></i>&nbsp;Body Vitals</div>
-    </div>
-    """, unsafe_allow_html=True)
-
+def render_health(latest, levels, phys_risk, motion, forecast, forecast_age):
     if latest:
         st.markdown("<div class='sensor-grid'>", unsafe_allow_html=True)
 
         # BODY TEMP
         temp = latest.get('body_temp', 0)
-        temp_status = "CRITICAL" if temp > 38.5 else ("WARNING" if temp > 38.0 else "NORMAL")
-        temp_class = {
-            "NORMAL": "status-pill-normal",
-            "WARNING": "status-pill-warning",
-            "CRITICAL": "status-pill-critical"
-        }[temp_status]
+        temp_status = LEVEL_NAMES[worst(levels, ("body_temp",))]
+        temp_class = STATUS_PILL[temp_status]
         st.markdown(f"""
         <div class="sensor-card">
           <div class="sensor-header">
@@ -908,7 +545,7 @@ with tab_health:
             <span class="sensor-chip"><i class="fa-solid fa-temperature-half"></i>&nbsp;DS18B20</span>
           </div>
           <div class="sensor-value-main">{temp:.1f}°C</div>
-          <div class="sensor-subvalue">Normal: 36.5 – 37.5°C</div>
+          <div class="sensor-subvalue">Normal: 36.5 – 37.5°C</div>{forecast_line(forecast, "body_temp", forecast_age)}
           <span class="status-pill {temp_class}">
             <span class="dot-green"></span> {temp_status}
           </span>
@@ -921,14 +558,8 @@ with tab_health:
         # HEART + SPO2
         hr = latest.get('heart_rate', 0)
         spo2 = latest.get('spo2', 0)
-        hr_status = "CRITICAL" if hr > 110 else ("WARNING" if hr > 100 else "NORMAL")
-        spo2_status = "CRITICAL" if spo2 < 90 else ("WARNING" if spo2 < 95 else "NORMAL")
-        vital_status = "CRITICAL" if (hr_status == "CRITICAL" or spo2_status == "CRITICAL") else hr_status
-        vital_class = {
-            "NORMAL": "status-pill-normal",
-            "WARNING": "status-pill-warning",
-            "CRITICAL": "status-pill-critical"
-        }[vital_status]
+        vital_status = LEVEL_NAMES[worst(levels, ("heart_rate", "spo2"))]
+        vital_class = STATUS_PILL[vital_status]
 
         st.markdown(f"""
         <div class="sensor-card">
@@ -937,12 +568,12 @@ with tab_health:
             <span class="sensor-chip"><i class="fa-solid fa-heart-pulse"></i>&nbsp;Pulse Oximeter</span>
           </div>
           <div class="sensor-value-main">{hr} BPM</div>
-          <div class="sensor-subvalue">SpO₂: {spo2}%</div>
+          <div class="sensor-subvalue">SpO₂: {spo2}%</div>{forecast_line(forecast, "heart_rate", forecast_age)}
           <span class="status-pill {vital_class}">
             <span class="dot-green"></span> {vital_status}
           </span>
           <div class="sensor-caption" style="margin-top:0.4rem;">
-            HR normal: 60–100 BPM · SpO₂ >95% recommended for safe operational duty.
+            HR normal: 60–{RULES['heart_rate'].warning} BPM · SpO₂ &ge;{RULES['spo2'].warning}% recommended for safe operational duty.
           </div>
         </div>
         """, unsafe_allow_html=True)
@@ -951,9 +582,20 @@ with tab_health:
         accel_x = latest.get('accel_x', 0)
         accel_y = latest.get('accel_y', 0)
         accel_z = latest.get('accel_z', 0)
-        fall_detected = latest.get('fall_detected', False)
+        fall_detected = worst(levels, ("fall_detected",)) == CRITICAL
+        # Server-side detection on the accelerometer stream, if the device sends one
+        motion_lines = ""
+        if motion is not None and motion.hz:
+            last_fall = motion.last_fall
+            motion_lines = f'<div class="sensor-subvalue">Stream: {motion.hz} Hz · {motion.falls} fall(s) detected</div>'
+            if last_fall is not None:
+                fall_detected = fall_detected or time.time() - last_fall.t < FALL_HOLD
+                motion_lines += (
+                    f'<div class="sensor-subvalue">Last fall {datetime.fromtimestamp(last_fall.t):%H:%M:%S} · '
+                    f'{last_fall.impact_g:.1f} g impact · {last_fall.tilt:.0f}° tilt</div>'
+                )
         fall_text = "FALL DETECTED" if fall_detected else "STABLE"
-        fall_class = "status-pill-critical" if fall_detected else "status-pill-normal"
+        fall_class = STATUS_PILL["CRITICAL" if fall_detected else "NORMAL"]
 
         st.markdown(f"""
         <div class="sensor-card">
@@ -963,7 +605,7 @@ with tab_health:
           </div>
           <div class="sensor-subvalue">Accel X: {accel_x:.3f} g</div>
           <div class="sensor-subvalue">Accel Y: {accel_y:.3f} g</div>
-          <div class="sensor-subvalue">Accel Z: {accel_z:.3f} g</div>
+          <div class="sensor-subvalue">Accel Z: {accel_z:.3f} g</div>{motion_lines}
           <span class="status-pill {fall_class}" style="margin-top:0.2rem;">
             {fall_text}
           </span>
@@ -1004,27 +646,15 @@ with tab_health:
 # --------------------------------------------------
 # TAB 3: ENVIRONMENT & FALL
 # --------------------------------------------------
-with tab_environment:
-    st.markdown("""
-    <div class="section-header" style="margin-top:1.5rem;">
-      <div class="section-title-text">Environmental Envelope</div>
-      <div class="section-line"></div>
-      <div class="section-tag"><i class="fa-solid fa-cloud"></i>&nbsp;Gas · Radiation · Motion</div>
-    </div>
-    """, unsafe_allow_html=True)
-
+def render_environment(latest, levels, env_risk, history, history_df, exposure, forecast, forecast_age):
     if latest:
         st.markdown("<div class='sensor-grid'>", unsafe_allow_html=True)
 
         # Radiation
         rad_cpm = latest.get('radiation_cpm', 0)
         rad_uSv = latest.get('radiation_uSvh', 0)
-        rad_status = "CRITICAL" if rad_uSv > 1.0 else ("WARNING" if rad_uSv > 0.5 else "NORMAL")
-        rad_class = {
-            "NORMAL": "status-pill-normal",
-            "WARNING": "status-pill-warning",
-            "CRITICAL": "status-pill-critical"
-        }[rad_status]
+        rad_status = LEVEL_NAMES[worst(levels, ("radiation_uSvh",))]
+        rad_class = STATUS_PILL[rad_status]
 
         st.markdown(f"""
         <div class="sensor-card">
@@ -1033,12 +663,12 @@ with tab_environment:
             <span class="sensor-chip"><i class="fa-solid fa-radiation"></i>&nbsp;Geiger Tube</span>
           </div>
           <div class="sensor-value-main">{rad_uSv:.3f} µSv/h</div>
-          <div class="sensor-subvalue">Counts per minute (CPM): {rad_cpm:.0f}</div>
+          <div class="sensor-subvalue">Counts per minute (CPM): {rad_cpm:.0f}</div>{exposure_lines(exposure, "radiation_uSvh", 2)}
           <span class="status-pill {rad_class}">
             {rad_status}
           </span>
           <div class="sensor-caption" style="margin-top:0.4rem;">
-            Safety envelope maintained when exposure remains &lt; 1.0 µSv/h for shift duration.
+            Safety envelope maintained when exposure remains &le; {RULES['radiation_uSvh'].critical} µSv/h for shift duration.
           </div>
         </div>
         """, unsafe_allow_html=True)
@@ -1046,14 +676,8 @@ with tab_environment:
         # Gas + fall (environment hazard)
         gas = latest.get('gas_ppm', 0)
         fall = latest.get('fall_detected', False)
-        gas_status = "CRITICAL" if gas > 500 else ("WARNING" if gas > 300 else "NORMAL")
-        fall_status = "CRITICAL" if fall else "NORMAL"
-        env_status = "CRITICAL" if gas_status == "CRITICAL" or fall_status == "CRITICAL" else gas_status
-        env_class = {
-            "NORMAL": "status-pill-normal",
-            "WARNING": "status-pill-warning",
-            "CRITICAL": "status-pill-critical"
-        }[env_status]
+        env_status = LEVEL_NAMES[worst(levels, ("gas_ppm", "fall_detected"))]
+        env_class = STATUS_PILL[env_status]
 
         st.markdown(f"""
         <div class="sensor-card">
@@ -1062,12 +686,12 @@ with tab_environment:
             <span class="sensor-chip"><i class="fa-solid fa-cloud-bolt"></i>&nbsp;MQ-2 · MPU6050</span>
           </div>
           <div class="sensor-value-main">{gas:.0f} PPM</div>
-          <div class="sensor-subvalue">Fall: {"DETECTED" if fall else "None"} </div>
+          <div class="sensor-subvalue">Fall: {"DETECTED" if fall else "None"} </div>{forecast_line(forecast, "gas_ppm", forecast_age)}{exposure_lines(exposure, "gas_ppm", 0)}
           <span class="status-pill {env_class}">
             {env_status}
           </span>
           <div class="sensor-caption" style="margin-top:0.4rem;">
-            Gas safe: &lt; 300 ppm · Any sharp motion spike triggers fall and impact analysis.
+            Gas safe: &le; {RULES['gas_ppm'].warning} ppm · Any sharp motion spike triggers fall and impact analysis.
           </div>
         </div>
         """, unsafe_allow_html=True)
@@ -1097,8 +721,8 @@ with tab_environment:
         """, unsafe_allow_html=True)
 
         # Environmental mini-history
-        if st.session_state.sensor_data:
-            df_env = pd.DataFrame(st.session_state.sensor_data).tail(50)
+        if history:
+            df_env = history_df.tail(50)
             df_env_plot = df_env.copy()
             df_env_plot["index"] = range(len(df_env_plot))
             df_env_plot.set_index("index", inplace=True)
@@ -1114,7 +738,8 @@ with tab_environment:
               </div>
             </div>
             """, unsafe_allow_html=True)
-            st.area_chart(df_env_plot[["gas_ppm", "radiation_uSvh"]], use_container_width=True)
+            with span("chart.env_history"):
+                st.area_chart(df_env_plot[["gas_ppm", "radiation_uSvh"]], use_container_width=True)
         else:
             st.info("Waiting for enough environmental data to show micro-history window.")
 
@@ -1125,6 +750,290 @@ with tab_environment:
 # --------------------------------------------------
 # TAB 4: SYSTEM LOGS & RAW DATA
 # --------------------------------------------------
+def render_alert_log():
+    # One row per episode: repeats of the same alert only bump its counters
+    episodes = hub.episodes.snapshot()
+    if episodes:
+        alerts_df = pd.DataFrame({
+            "worker_id": [ep.worker_id for ep in episodes],
+            "type": [ep.kind for ep in episodes],
+            "status": ["OPEN" if ep.open else "CLEARED" for ep in episodes],
+            "severity": [LEVEL_NAMES[ep.severity] for ep in episodes],
+            "started": [datetime.fromtimestamp(ep.start).strftime("%H:%M:%S") for ep in episodes],
+            "last_alert": [datetime.fromtimestamp(ep.end).strftime("%H:%M:%S") for ep in episodes],
+            "duration_s": [round(ep.duration) for ep in episodes],
+            "alerts": [ep.count for ep in episodes],
+            "peak": [None if ep.peak is None else f"{ep.peak:g} ({ep.field})" for ep in episodes],
+        })
+        st.dataframe(alerts_df, use_container_width=True, height=380, hide_index=True)
+    else:
+        st.info("No alerts recorded since the dashboard started.")
+
+
+def stat_text(stats, channel, attr, digits, unit):
+    """One summary figure, or "—" when the channel has no samples in view."""
+    if not stats[channel].count:
+        return "—"
+    return f"{getattr(stats[channel], attr):.{digits}f}{unit}"
+
+
+def render_statistics(worker, stats_window):
+    if worker and worker.stats.last_t is not None:
+        # Streaming accumulators updated at ingest; nothing is rescanned here.
+        # Windows are expired to now, so a silent worker ages out of them.
+        stats = worker.stats.view(None if stats_window == "Full shift" else stats_window, time.time())
+
+        col_a, col_b = st.columns(2)
+        with col_a:
+            st.metric("AVG BODY TEMP", stat_text(stats, 'body_temp', 'mean', 1, "°C"))
+            st.metric("MAX BODY TEMP", stat_text(stats, 'body_temp', 'max', 1, "°C"))
+            st.metric("AVG HEART RATE", stat_text(stats, 'heart_rate', 'mean', 0, " BPM"))
+            st.metric("MAX HEART RATE", stat_text(stats, 'heart_rate', 'max', 0, " BPM"))
+
+        with col_b:
+            st.metric("MAX RADIATION", stat_text(stats, 'radiation_uSvh', 'max', 3, " µSv/h"))
+            st.metric("AVG RADIATION", stat_text(stats, 'radiation_uSvh', 'mean', 3, " µSv/h"))
+            st.metric("MAX GAS LEVEL", stat_text(stats, 'gas_ppm', 'max', 0, " PPM"))
+            st.metric("AVG GAS LEVEL", stat_text(stats, 'gas_ppm', 'mean', 0, " PPM"))
+
+        if stats_window == "Full shift":
+            since = datetime.fromtimestamp(worker.stats.shift_start).strftime("%H:%M:%S")
+            scope = f"shift since {since}"
+        else:
+            scope = f"last {stats_window}"
+        st.caption(
+            f"{scope} · {stats['body_temp'].count} frames · "
+            f"body temp σ {stat_text(stats, 'body_temp', 'std', 2, '°C')} · "
+            f"heart rate σ {stat_text(stats, 'heart_rate', 'std', 1, ' BPM')}"
+        )
+    else:
+        st.info("Insufficient data for statistical summary.")
+
+
+def render_raw_table(history, history_df):
+    if history:
+        raw_df = history_df.tail(200)
+        st.dataframe(raw_df, use_container_width=True, height=280)
+    else:
+        st.info("No raw rows captured for this session.")
+
+
+def render_ingest_stats(queues):
+    decoder = hub.decoder
+    rejected = ", ".join(f"{reason} {count:,}" for reason, count in sorted(decoder.rejected.items()))
+    st.caption(
+        f"Decoder ({PARSER}) · {decoder.decoded:,} frames ({decoder.binary:,} binary), {decoder.partial:,} partial, "
+        f"{decoder.rejected_total:,} rejected{f' ({rejected})' if rejected else ''}"
+    )
+    if hub.ingest_errors:
+        errors = ", ".join(f"{name} {count:,}" for name, count in sorted(hub.ingest_errors.items()))
+        st.caption(f"Ingest errors · {errors}")
+    data, alerts = queues["data"], queues["alert"]
+    st.caption(
+        f"Session queues · frames: {data.enqueued:,} queued, {data.dropped:,} dropped, "
+        f"high water {data.high_water:,}/{DATA_QUEUE_SIZE:,} · alerts: {alerts.enqueued:,} queued, "
+        f"high water {alerts.high_water:,}/{ALERT_QUEUE_SIZE:,}"
+    )
+
+
+# --------------------------------------------------
+# TAB 5: SYSTEM DIAGNOSTICS (HIDDEN BY DEFAULT)
+# --------------------------------------------------
+def render_diagnostics(queues):
+    depths = hub.queue_depths()
+    col_a, col_b, col_c, col_d, col_e = st.columns(5)
+    col_a.metric("FRAMES / S", f"{instruments.rate('frames_decoded'):.1f}")
+    col_b.metric("ALERTS / S", f"{instruments.rate('alerts_received'):.1f}")
+    col_c.metric("QUEUE DEPTH", f"{depths['data']:,}/{DATA_QUEUE_SIZE:,}")
+    col_d.metric("DROPPED FRAMES", f"{queues['data'].dropped:,}")
+    col_e.metric("SESSIONS", hub.session_count)
+
+    # ingest.* run on the MQTT thread, rerun.*, render.* and chart.* in sessions
+    rows = instruments.stage_rows()
+    if rows:
+        stages_df = pd.DataFrame(rows, columns=["stage", "runs", "p50_ms", "p99_ms", "max_ms", "total_s"])
+        stages_df[["p50_ms", "p99_ms", "max_ms"]] = (stages_df[["p50_ms", "p99_ms", "max_ms"]] * 1e3).round(3)
+        stages_df["total_s"] = stages_df["total_s"].round(2)
+        st.dataframe(stages_df, use_container_width=True, height=420, hide_index=True)
+    else:
+        st.info("No timings recorded yet.")
+
+    st.caption(
+        f"Percentiles over the last {instruments.window} runs of each stage · Prometheus export: "
+        f"{', '.join(metrics_targets) if metrics_targets else 'off (set SAFETY_METRICS_PORT or SAFETY_METRICS_FILE)'}"
+    )
+    with st.expander("Prometheus exposition"):
+        st.code(instruments.prometheus(), language="text")
+
+
+# --------------------------------------------------
+# LIVE REGIONS (FRAGMENT)
+# --------------------------------------------------
+# The page skeleton below is only sent on full app runs. Everything that
+# changes with telemetry is drawn into placeholders by this fragment, and
+# each placeholder is redrawn only when its own inputs change; untouched
+# placeholders keep what they showed last. During a fragment run the
+# fragment blocks until the hub delivers something new and then reruns
+# itself, so idle sessions send nothing. run_every is the heartbeat that
+# starts the first fragment run after a full app run.
+@st.fragment(run_every=2)
+def live_updates(slots, worker_id, fleet_size, alert_query, stats_window, trend_span):
+    run_started = time.monotonic()
+    with span("rerun.drain"):
+        drain_feed()
+    if len(fleet) != fleet_size:
+        # New devices need a full run to appear in the worker selector.
+        st.rerun()
+
+    worker = fleet.get(worker_id) if worker_id else None
+    latest = worker.latest if worker and worker.latest else None
+    history = worker.history if worker else None
+    frames = worker.frame_count if worker else 0
+    motion = worker.motion if worker else None
+    forecast = fleet.forecasts.forecast(worker_id) if worker else {}
+    # Forecasts are stepped on the release timer, apart from frames; key the
+    # cards on the worker's last forecast update, and while a crossing is
+    # projected on a 10 s clock so the countdown runs on without new data
+    forecast_time = fleet.forecasts.last_sample(worker_id) if worker else None
+    forecast_age = time.time() - forecast_time if forecast_time is not None else 0.0
+    projected = any(seconds for seconds, _, _ in forecast.values()) and forecast_age <= FORECAST_MAX_GAP
+    forecast_sig = (forecast_time, int(time.time() // 10) if projected else None)
+    # History lags the live view by the reorder hold; it has its own count
+    recorded = history.total if history else 0
+    # Quiet episodes close on the clock, not on a new alert
+    hub.episodes.sweep(time.time())
+    episodes = hub.episodes.version
+    # Counters of open episodes change with every repeat; redraw them at
+    # most every 5 s instead of once per alert
+    episode_clock = int(time.time() // 5) if hub.episodes.open else None
+    phys_risk, env_risk, _ = worker.risk if worker else (0, 0, 0)
+    levels = worker.levels if worker else {}
+    # Windowed statistics age even when no frame arrives
+    stats_clock = int(time.time() // 10) if stats_window != "Full shift" else None
+    # Relative time ranges move with the clock; refresh them once a minute
+    alert_clock = int(time.time() // 60) if ALERT_RANGES[alert_query[4]] else None
+
+    # One DataFrame per worker, shared by every tab and every session. Only
+    # rows that arrived since the last rerun are converted.
+    with span("rerun.history_frame"):
+        history_df = history.frame() if history else None
+
+    # Only rejects, partial frames and sizing-relevant queue changes redraw
+    # the ingest lines, not every frame
+    queues = hub.queue_stats()
+    ingest_sig = (hub.decoder.rejected_total, hub.decoder.partial, sum(hub.ingest_errors.values()),
+                  queues["data"].dropped, queues["data"].high_water, queues["alert"].high_water)
+
+    sigs = st.session_state.region_sigs
+    regions = (
+        ("navbar", (hub.connected, frames), render_navbar, (worker, latest)),
+        ("metrics", (frames, episodes), render_metric_strip, (worker_id, worker, latest)),
+        ("alert_header", (bool(hub.episodes.open), hub.episodes.total > 0), render_alert_header, (bool(hub.episodes.open),)),
+        ("alert_list", (len(hub.alerts), alert_query, alert_clock), render_alert_list, (alert_query,)),
+        ("overview", (frames, recorded, trend_span), render_overview, (worker_id, worker, history, history_df, latest, trend_span)),
+        ("health", (frames, motion.falls if motion else None, forecast_sig), render_health,
+         (latest, levels, phys_risk, motion, forecast, forecast_age)),
+        ("environment", (frames, recorded, forecast_sig), render_environment,
+         (latest, levels, env_risk, history, history_df, worker.exposure if worker else None, forecast, forecast_age)),
+        ("alert_log", (episodes, episode_clock), render_alert_log, ()),
+        ("statistics", (recorded, stats_clock), render_statistics, (worker, stats_window)),
+        ("raw_table", recorded, render_raw_table, (history, history_df)),
+        ("ingest_stats", ingest_sig, render_ingest_stats, (queues,)),
+    )
+    if "diagnostics" in slots:
+        # Timings move constantly; a 5 s clock keeps the panel cheap
+        regions += (("diagnostics", int(time.time() // 5), render_diagnostics, (queues,)),)
+    for name, sig, render, args in regions:
+        if sigs.get(name) != sig:
+            with span(f"render.{name}"), slots[name].container():
+                render(*args)
+            sigs[name] = sig
+
+    if st.session_state.pop('full_run', False):
+        # Part of a full app run: the rest of the page still has to render.
+        return
+
+    refresh = st.session_state.refresh
+    instruments.record("rerun.fragment", time.monotonic() - run_started)
+    refresh.record_render(time.monotonic() - run_started)
+    refresh.wait(st.session_state.feed, run_started, yield_point=lambda: 'feed' in st.session_state)
+    st.rerun(scope="fragment")
+
+
+# --------------------------------------------------
+# PAGE SKELETON (FULL APP RUNS ONLY)
+# --------------------------------------------------
+slots = {"navbar": st.empty()}
+
+# --------------------------------------------------
+# WORKER SELECTION
+# --------------------------------------------------
+worker_ids = fleet.worker_ids()
+worker_id = None
+if worker_ids:
+    worker_id = st.selectbox("Worker", worker_ids, key="worker_id")
+
+slots["metrics"] = st.empty()
+slots["alert_header"] = st.empty()
+# Keyword search plus facets over every alert the hub has indexed
+alert_workers, alert_types, alert_severities = hub.alerts.facets()
+filter_cols = st.columns([2.2, 1, 1, 1, 1])
+with filter_cols[0]:
+    filter_text = st.text_input("Filter alerts (type, metric, etc.)", "", key="alert_filter", on_change=reset_alert_page)
+with filter_cols[1]:
+    alert_worker = st.selectbox("Worker", ["All", *alert_workers], key="alert_worker", on_change=reset_alert_page)
+with filter_cols[2]:
+    alert_kind = st.selectbox("Type", ["All", *alert_types], key="alert_type", on_change=reset_alert_page)
+with filter_cols[3]:
+    alert_severity = st.selectbox("Severity", ["All", *alert_severities], key="alert_severity", on_change=reset_alert_page)
+with filter_cols[4]:
+    alert_since = st.selectbox("Time", list(ALERT_RANGES), key="alert_range", on_change=reset_alert_page)
+slots["alert_list"] = st.empty()
+alert_page = st.number_input("Alert page", min_value=1, value=1, step=1, key="alert_page")
+alert_query = (filter_text, alert_worker, alert_kind, alert_severity, alert_since, alert_page)
+
+# --------------------------------------------------
+# MAIN TABS FOR ADVANCED UI
+# --------------------------------------------------
+tab_names = ["📊 Overview Dashboard", "❤️ Health & Biometrics", "🌫️ Environment & Fall", "🛠️ System Logs & Raw Data"]
+if show_diagnostics:
+    tab_names.append("🩺 System Diagnostics")
+tab_overview, tab_health, tab_environment, tab_system, *tab_diagnostics = st.tabs(tab_names)
+
+with tab_overview:
+    st.markdown("""
+    <div class="section-header" style="margin-top:1.5rem;">
+      <div class="section-title-text">Realtime Telemetry</div>
+      <div class="section-line"></div>
+      <div class="section-tag"><i class="fa-solid fa-wave-square"></i>&nbsp;Signal Overview</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    trend_span = st.radio("Trend span", list(TREND_SPANS), horizontal=True, key="trend_span")
+    slots["overview"] = st.empty()
+
+with tab_health:
+    st.markdown("""
+    <div class="section-header" style="margin-top:1.5rem;">
+      <div class="section-title-text">Biometric Envelope</div>
+      <div class="section-line"></div>
+      <div class="section-tag"><i class="fa-solid fa-heart-circle-bolt"></i>&nbsp;Body Vitals</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    slots["health"] = st.empty()
+
+with tab_environment:
+    st.markdown("""
+    <div class="section-header" style="margin-top:1.5rem;">
+      <div class="section-title-text">Environmental Envelope</div>
+      <div class="section-line"></div>
+      <div class="section-tag"><i class="fa-solid fa-cloud"></i>&nbsp;Gas · Radiation · Motion</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    slots["environment"] = st.empty()
+
 with tab_system:
     st.markdown("""
     <div class="section-header" style="margin-top:1.5rem;">
@@ -1137,52 +1046,32 @@ with tab_system:
     col1, col2 = st.columns(2)
 
     with col1:
-        st.markdown("**Alert History Log**")
-        if st.session_state.alerts:
-            alerts_df = pd.DataFrame(st.session_state.alerts)
-            st.dataframe(alerts_df, use_container_width=True, height=380)
-        else:
-            st.info("No alerts recorded in this session.")
+        st.markdown("**Alert Episodes**")
+        slots["alert_log"] = st.empty()
 
     with col2:
         st.markdown("**Safety Statistics Summary**")
-        if st.session_state.sensor_data:
-            df = pd.DataFrame(st.session_state.sensor_data)
-
-            avg_temp = df['body_temp'].mean()
-            max_temp = df['body_temp'].max()
-
-            avg_hr = df['heart_rate'].mean()
-            max_hr = df['heart_rate'].max()
-
-            max_radiation = df['radiation_uSvh'].max()
-            avg_radiation = df['radiation_uSvh'].mean()
-
-            max_gas = df['gas_ppm'].max()
-            avg_gas = df['gas_ppm'].mean()
-
-            col_a, col_b = st.columns(2)
-            with col_a:
-                st.metric("AVG BODY TEMP", f"{avg_temp:.1f}°C")
-                st.metric("MAX BODY TEMP", f"{max_temp:.1f}°C")
-                st.metric("AVG HEART RATE", f"{avg_hr:.0f} BPM")
-                st.metric("MAX HEART RATE", f"{max_hr:.0f} BPM")
-
-            with col_b:
-                st.metric("MAX RADIATION", f"{max_radiation:.3f} µSv/h")
-                st.metric("AVG RADIATION", f"{avg_radiation:.3f} µSv/h")
-                st.metric("MAX GAS LEVEL", f"{max_gas:.0f} PPM")
-                st.metric("AVG GAS LEVEL", f"{avg_gas:.0f} PPM")
-        else:
-            st.info("Insufficient data for statistical summary.")
+        stats_window = st.radio(
+            "Summary window", ["Full shift", *WINDOWS], horizontal=True, key="stats_window"
+        )
+        slots["statistics"] = st.empty()
 
         st.markdown("---")
         st.markdown("**Raw Sensor Table**")
-        if st.session_state.sensor_data:
-            raw_df = pd.DataFrame(st.session_state.sensor_data).tail(200)
-            st.dataframe(raw_df, use_container_width=True, height=280)
-        else:
-            st.info("No raw rows captured for this session.")
+        slots["raw_table"] = st.empty()
+        slots["ingest_stats"] = st.empty()
+
+if tab_diagnostics:
+    with tab_diagnostics[0]:
+        st.markdown("""
+        <div class="section-header" style="margin-top:1.5rem;">
+          <div class="section-title-text">Hot-Path Timings</div>
+          <div class="section-line"></div>
+          <div class="section-tag"><i class="fa-solid fa-microchip"></i>&nbsp;Diagnostics</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+        slots["diagnostics"] = st.empty()
 
 # --------------------------------------------------
 # FOOTER
@@ -1191,7 +1080,7 @@ st.markdown("<div class='footer-line'></div>", unsafe_allow_html=True)
 st.markdown(
     f"""
     <div class="footer-meta">
-      <span><i class="fa-regular fa-clock"></i>&nbsp;System Time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")} · Refresh Rate: 2s</span>
+      <span><i class="fa-regular fa-clock"></i>&nbsp;Page loaded: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")} · Refresh: pushed on new data</span>
       <span><i class="fa-solid fa-link"></i>&nbsp;Simulator: <a href="https://wokwi.com/projects/447224581770989569" target="_blank">Open Wokwi worker node</a></span>
     </div>
     """,
@@ -1199,7 +1088,9 @@ st.markdown(
 )
 
 # --------------------------------------------------
-# AUTO REFRESH LOOP
+# AUTO REFRESH (LIVE REGIONS)
 # --------------------------------------------------
-time.sleep(2)
-st.rerun()
+st.session_state.region_sigs = {}
+st.session_state.full_run = True
+live_updates(slots, worker_id, len(fleet), alert_query, stats_window, trend_span)
+instruments.record("rerun.full", time.perf_counter() - script_started)